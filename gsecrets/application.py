@@ -2,13 +2,19 @@
 from __future__ import annotations
 
 import logging
+import typing
 from gettext import gettext as _
 
 from gi.repository import Adw, Gio, GLib, Gtk
 
 from gsecrets import const
+from gsecrets.passphrase_generator import preload_word_list
+from gsecrets.scheduler import Scheduler
+from gsecrets.unlock_queue import UnlockQueue
 from gsecrets.widgets.mod import load_widgets
 from gsecrets.widgets.window import Window
+if typing.TYPE_CHECKING:
+    from gsecrets.unlock_database import UnlockDatabase
 
 
 class Application(Adw.Application):
@@ -37,6 +43,11 @@ class Application(Adw.Application):
         )
 
         self.executor = executor
+        # Runs the background work of all the windows.
+        self.scheduler = Scheduler()
+        # Shared by the windows so that opening many safes at once does not
+        # derive all their keys at the same time.
+        self.unlock_queue = UnlockQueue()
 
     def do_startup(self):  # pylint: disable=arguments-differ
         Adw.Application.do_startup(self)
@@ -48,6 +59,25 @@ class Application(Adw.Application):
 
         load_widgets()
 
+        GLib.idle_add(preload_word_list, priority=GLib.PRIORITY_LOW)
+
+    def do_shutdown(self):  # pylint: disable=arguments-differ
+        # Running saves are waited for, pending work is dropped.
+        self.scheduler.shutdown()
+        for priority, metrics in self.scheduler.metrics().items():
+            logging.debug(
+                "%s tasks: %d completed, %d cancelled, %.3f s waiting, "
+                "%.3f s running, %.3f s at most",
+                priority.name.capitalize(),
+                metrics.completed,
+                metrics.cancelled,
+                metrics.wait_time,
+                metrics.run_time,
+                metrics.max_run_time,
+            )
+
+        Adw.Application.do_shutdown(self)
+
     def do_open(self, gfile_list, _n_files, _hint):  # pylint: disable=arguments-differ
         for gfile in gfile_list:
             if not gfile.query_exists():
@@ -60,7 +90,7 @@ class Application(Adw.Application):
             else:
                 window = self.new_window()
                 window.present()
-                window.start_database_opening_routine(gfile.get_path())
+                window.start_database_opening_routine(gfile)
 
     def new_window(self) -> Window:
         """Creates a new window inside its own group. This is done
@@ -82,6 +112,27 @@ class Application(Adw.Application):
 
         return False
 
+    def locked_safes(self) -> list[UnlockDatabase]:
+        """The unlock pages of the safes which are not opened yet and
+        which are not being unlocked."""
+        pages = []
+        for window in self.get_windows():
+            page = getattr(window, "unlock_page", None)
+            if page is not None and page.can_unlock:
+                pages.append(page)
+
+        return pages
+
+    def update_locked_safes(self) -> None:
+        """Called when a safe starts or stops waiting to be unlocked."""
+        for page in self.locked_safes():
+            page.update_unlock_all()
+
+    def do_window_removed(self, window):  # pylint: disable=arguments-differ
+        Adw.Application.do_window_removed(self, window)
+
+        self.update_locked_safes()
+
     def do_handle_local_options(  # pylint: disable=arguments-differ
         self, options: GLib.VariantDict
     ) -> int:
@@ -9,6 +9,7 @@ from gettext import gettext as _
 from gi.repository import Adw, Gdk, Gio, GLib, Gtk
 
 from gsecrets import const
+from gsecrets.utils import write_bytes_async, write_bytes_finish
 
 if typing.TYPE_CHECKING:
     from pykeepass.attachment import Attachment
@@ -36,7 +37,7 @@ class AttachmentWarningDialog(Adw.MessageDialog):
         attachment = self.__attachment
         u_db = self.__unlocked_database
         self.__open_tmp_file(
-            u_db.database_manager.db.binaries[attachment.id], attachment.filename
+            u_db.database_manager.get_binary(attachment.id), attachment.filename
         )
 
     def __open_tmp_file(self, bytes_buffer, filename):
@@ -50,19 +51,11 @@ class AttachmentWarningDialog(Adw.MessageDialog):
 
         def callback(gfile, result):
             try:
-                gfile.replace_contents_finish(result)
+                write_bytes_finish(result)
             except GLib.Error as err:
                 logging.debug("Could not load attachment: %s", err.message)
                 window.send_notification(_("Could not load attachment"))
             else:
                 Gtk.show_uri(window, gfile.get_uri(), Gdk.CURRENT_TIME)
 
-        contents = GLib.Bytes.new(bytes_buffer)
-        gfile.replace_contents_bytes_async(
-            contents,
-            None,
-            False,
-            Gio.FileCreateFlags.PRIVATE | Gio.FileCreateFlags.REPLACE_DESTINATION,
-            None,
-            callback,
-        )
+        write_bytes_async(gfile, bytes_buffer, callback)
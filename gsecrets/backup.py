@@ -0,0 +1,128 @@
+# SPDX-License-Identifier: GPL-3.0-only
+"""Rotating local backups of safes.
+
+Every safe has its own directory of backups. Backups are named after the time
+they were taken and the SHA-256 digest of their contents, a snapshot
+identical to an existing backup is not stored again. The methods block, they
+are meant to be used from a worker thread.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import time
+from typing import NamedTuple
+
+SUFFIX = ".kdbx"
+DIGEST_LENGTH = 32
+
+
+class Backup(NamedTuple):
+    # pylint: disable=inherit-non-class
+    path: str
+    time: int
+    digest: str
+    size: int
+
+
+class BackupStore:
+    """Backups of a safe, the oldest ones are deleted once there are more
+    than max_generations of them or once they take more than max_bytes.
+
+    The newest backup is always kept.
+    """
+
+    def __init__(self, directory: str, max_generations: int, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_generations = max_generations
+        self.max_bytes = max_bytes
+
+    def backups(self) -> list[Backup]:
+        """The backups of the safe, newest first."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+
+        backups = []
+        for name in names:
+            stem, suffix = os.path.splitext(name)
+            timestamp, _sep, digest = stem.partition("-")
+            if (
+                suffix != SUFFIX
+                or not timestamp.isdigit()
+                or len(digest) != DIGEST_LENGTH
+            ):
+                continue
+
+            path = os.path.join(self.directory, name)
+            try:
+                size = os.stat(path).st_size
+            except FileNotFoundError:
+                continue
+
+            backups.append(Backup(path, int(timestamp), digest, size))
+
+        backups.sort(key=lambda backup: backup.time, reverse=True)
+        return backups
+
+    def snapshot(self, data: bytes) -> Backup | None:
+        """Stores data as the newest backup.
+
+        Returns the new backup, or None if an identical one already exists.
+        """
+        digest = hashlib.sha256(data).hexdigest()[:DIGEST_LENGTH]
+        backups = self.backups()
+        if any(backup.digest == digest for backup in backups):
+            logging.debug("Identical backup already stored")
+            return None
+
+        # Never go back in time if the clock changed, backups are sorted by it.
+        timestamp = int(time.time())
+        if backups:
+            timestamp = max(timestamp, backups[0].time + 1)
+
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        path = os.path.join(self.directory, f"{timestamp}-{digest}{SUFFIX}")
+        tmp_path = path + ".tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+
+        os.replace(tmp_path, path)
+
+        backup = Backup(path, timestamp, digest, len(data))
+        self.prune([backup] + backups)
+        return backup
+
+    def prune(self, backups: list[Backup] | None = None) -> list[Backup]:
+        """Deletes the backups above the limits, returns the deleted ones.
+
+        :param backups: the backups newest first, they are listed if None
+        """
+        if backups is None:
+            backups = self.backups()
+
+        deleted = []
+        total = 0
+        for generation, backup in enumerate(backups):
+            total += backup.size
+            if generation == 0:
+                continue
+
+            if generation >= self.max_generations or total > self.max_bytes:
+                try:
+                    os.remove(backup.path)
+                except FileNotFoundError:
+                    pass
+
+                deleted.append(backup)
+                total -= backup.size
+
+        return deleted
+
+    @staticmethod
+    def read(backup: Backup) -> bytes:
+        with open(backup.path, "rb") as file:
+            return file.read()
@@ -0,0 +1,121 @@
+# SPDX-License-Identifier: GPL-3.0-only
+"""Check passwords against a local copy of the Have I Been Pwned range files.
+
+The corpus is a directory with one file per five hex digit prefix of the
+SHA-1 hash of the breached passwords, named either after the prefix or after
+the prefix with a ``.txt`` extension. Each line of a file holds the
+remaining 35 hex digits of a hash and the number of times it was seen,
+separated by a colon, sorted by hash.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import mmap
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
+PREFIX_LENGTH = 5
+
+
+def sha1_hex(password: str) -> str:
+    """The upper case hex SHA-1 digest of password, as used by the corpus."""
+    return hashlib.sha1(password.encode("utf-8")).hexdigest().upper()
+
+
+def _search(buffer: mmap.mmap, suffix: bytes) -> int:
+    """Binary search suffix in a range file, returns its count or 0.
+
+    :raises ValueError: if the count of suffix is not a number
+    """
+    low, high = 0, len(buffer)
+    # Both low and high are always at the start of a line.
+    while low < high:
+        mid = (low + high) // 2
+        start = buffer.rfind(b"\n", 0, mid) + 1
+        end = buffer.find(b"\n", start)
+        if end == -1:
+            end = len(buffer)
+
+        key, _sep, count = buffer[start:end].partition(b":")
+        key = key.strip().upper()
+        if key == suffix:
+            return int(count.strip() or 0)
+
+        if key < suffix:
+            low = end + 1
+        else:
+            high = start
+
+    return 0
+
+
+class BreachChecker:
+    """Looks up SHA-1 hashes in a directory of range files.
+
+    Lookups are grouped by prefix so that every range file is mapped once,
+    the files of different prefixes are searched in a thread pool. Results
+    are cached per hash.
+    """
+
+    def __init__(self, directory: str, max_workers: int | None = None) -> None:
+        self.directory = directory
+        self._max_workers = max_workers
+        self._cache: dict[str, int] = {}
+
+    def _range_file(self, prefix: str) -> str | None:
+        for name in (prefix, prefix + ".txt"):
+            path = os.path.join(self.directory, name)
+            if os.path.isfile(path):
+                return path
+
+        return None
+
+    def _check_prefix(self, prefix: str, hashes: list[str]) -> dict[str, int]:
+        results = dict.fromkeys(hashes, 0)
+        if (path := self._range_file(prefix)) is None:
+            logging.debug("Missing range file for prefix %s", prefix)
+            return results
+
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return results
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                for sha1 in sorted(hashes):
+                    suffix = sha1[PREFIX_LENGTH:].encode("ascii")
+                    results[sha1] = _search(buffer, suffix)
+
+        return results
+
+    def check(self, hashes: Iterable[str]) -> dict[str, int]:
+        """Number of times each hash appears in the corpus.
+
+        :param hashes: upper case hex SHA-1 digests
+        :returns: a dictionary from the hashes to their count, 0 when the
+                  hash is not in the corpus
+        :raises OSError: if a range file cannot be read
+        :raises ValueError: if a range file is malformed
+        """
+        results: dict[str, int] = {}
+        by_prefix: dict[str, list[str]] = defaultdict(list)
+        for sha1 in set(hashes):
+            if (count := self._cache.get(sha1)) is not None:
+                results[sha1] = count
+            else:
+                by_prefix[sha1[:PREFIX_LENGTH]].append(sha1)
+
+        if by_prefix:
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                futures = [
+                    executor.submit(self._check_prefix, prefix, prefix_hashes)
+                    for prefix, prefix_hashes in by_prefix.items()
+                ]
+                for future in futures:
+                    counts = future.result()
+                    self._cache.update(counts)
+                    results.update(counts)
+
+        return results
@@ -0,0 +1,67 @@
+# SPDX-License-Identifier: GPL-3.0-only
+"""Choose how the payload of safes is compressed.
+
+pykeepass always compresses payloads with gzip level 6. Its encoder is
+replaced by one which uses the level set for the current thread with
+compression_level, so that several safes can be saved at the same time with
+different levels.
+"""
+from __future__ import annotations
+
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Iterator, NamedTuple
+
+from pykeepass.kdbx_parsing.common import Decompressed
+
+NONE = "none"
+LEVELS = {"fast": 1, "balanced": 6, "maximum": 9}
+DEFAULT = "balanced"
+
+_state = threading.local()
+
+
+class CompressionEstimate(NamedTuple):
+    # pylint: disable=inherit-non-class
+    size: int
+    seconds: float
+
+
+def _compress(data: bytes, level: int) -> bytes:
+    compressobj = zlib.compressobj(
+        level, zlib.DEFLATED, 16 + 15, zlib.DEF_MEM_LEVEL, 0
+    )
+    return compressobj.compress(data) + compressobj.flush()
+
+
+def _encode(_self, data, _con, _path):
+    return _compress(data, getattr(_state, "level", LEVELS[DEFAULT]))
+
+
+Decompressed._encode = _encode  # pylint: disable=protected-access
+
+
+@contextmanager
+def compression_level(level: int) -> Iterator[None]:
+    """Compress the safes saved by the current thread with the given gzip
+    level."""
+    previous = getattr(_state, "level", LEVELS[DEFAULT])
+    _state.level = level
+    try:
+        yield
+    finally:
+        _state.level = previous
+
+
+def estimate(data: bytes) -> dict[str, CompressionEstimate]:
+    """Measures the size and the time needed to compress data with each of
+    the options."""
+    estimates = {NONE: CompressionEstimate(len(data), 0.0)}
+    for name, level in LEVELS.items():
+        start = time.perf_counter()
+        size = len(_compress(data, level))
+        estimates[name] = CompressionEstimate(size, time.perf_counter() - start)
+
+    return estimates
@@ -14,6 +14,7 @@ DB_LOCK_TIMEOUT = "database-lock-timeout"
 SHOW_START_SCREEN = "first-start-screen"
 LAST_OPENED_DB = "last-opened-database"
 SAVE_AUTOMATICALLY = "save-automatically"
+SYNC_ON_SAVE = "sync-on-save"
 WINDOW_SIZE = "window-size"
 SORT_ORDER = "sort-order"
 LAST_OPENED_LIST = "last-opened-list"
@@ -26,9 +27,14 @@ GENERATOR_USE_UPPERCASE = "generator-use-uppercase"
 GENERATOR_USE_LOWERCASE = "generator-use-lowercase"
 GENERATOR_USE_NUMBERS = "generator-use-numbers"
 GENERATOR_USE_SYMBOLS = "generator-use-symbols"
+GENERATOR_EXCLUDE_AMBIGUOUS = "generator-exclude-ambiguous"
 GENERATOR_LENGTH = "generator-length"
 GENERATOR_WORDS = "generator-words"
 GENERATOR_SEPARATOR = "generator-separator"
+ATTACHMENT_SIZE_LIMIT = "attachment-size-limit"
+BREACH_CORPUS_DIRECTORY = "breach-corpus-directory"
+BACKUP_GENERATIONS = "backup-generations"
+BACKUP_SIZE_LIMIT = "backup-size-limit"
 
 
 def get_generator_use_uppercase() -> bool:
@@ -63,6 +69,14 @@ def set_generator_use_symbols(value: bool) -> None:
     setting.set_boolean(GENERATOR_USE_SYMBOLS, value)
 
 
+def get_generator_exclude_ambiguous() -> bool:
+    return setting.get_boolean(GENERATOR_EXCLUDE_AMBIGUOUS)
+
+
+def set_generator_exclude_ambiguous(value: bool) -> None:
+    setting.set_boolean(GENERATOR_EXCLUDE_AMBIGUOUS, value)
+
+
 def get_generator_length() -> int:
     return setting.get_int(GENERATOR_LENGTH)
 
@@ -87,6 +101,43 @@ def set_generator_separator(value: str) -> None:
     setting.set_string(GENERATOR_SEPARATOR, value)
 
 
+def get_attachment_size_limit() -> int:
+    """Maximum size of an attachment in bytes."""
+    return setting.get_int(ATTACHMENT_SIZE_LIMIT) * 1024 * 1024
+
+
+def set_attachment_size_limit(value: int) -> None:
+    """Sets the maximum size of an attachment in bytes, rounded up to MiB."""
+    setting.set_int(ATTACHMENT_SIZE_LIMIT, -(-value // (1024 * 1024)))
+
+
+def get_backup_generations() -> int:
+    """Number of backups kept for each safe, 0 if backups are disabled."""
+    return setting.get_int(BACKUP_GENERATIONS)
+
+
+def set_backup_generations(value: int) -> None:
+    setting.set_int(BACKUP_GENERATIONS, value)
+
+
+def get_backup_size_limit() -> int:
+    """Maximum size of the backups of each safe in bytes."""
+    return setting.get_int(BACKUP_SIZE_LIMIT) * 1024 * 1024
+
+
+def set_backup_size_limit(value: int) -> None:
+    """Sets the maximum size of the backups in bytes, rounded up to MiB."""
+    setting.set_int(BACKUP_SIZE_LIMIT, -(-value // (1024 * 1024)))
+
+
+def get_breach_corpus_directory() -> str:
+    return setting.get_string(BREACH_CORPUS_DIRECTORY)
+
+
+def set_breach_corpus_directory(value: str) -> None:
+    setting.set_string(BREACH_CORPUS_DIRECTORY, value)
+
+
 def get_clear_clipboard():
     return setting.get_int(CLEAR_CLIPBOARD)
 
@@ -138,6 +189,16 @@ def set_save_automatically(value):
     setting.set_boolean(SAVE_AUTOMATICALLY, value)
 
 
+def get_sync_on_save() -> bool:
+    """Whether saved safes are synced to the disk before they replace the
+    previous version."""
+    return setting.get_boolean(SYNC_ON_SAVE)
+
+
+def set_sync_on_save(value: bool) -> None:
+    setting.set_boolean(SYNC_ON_SAVE, value)
+
+
 def get_window_size():
     return setting.get_value(WINDOW_SIZE)
 
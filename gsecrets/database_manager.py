@@ -1,17 +1,71 @@
 # SPDX-License-Identifier: GPL-3.0-only
 from __future__ import annotations
 
+import hashlib
+import io
 import logging
+import os
+import secrets
+import threading
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import Callable, NamedTuple
+from uuid import UUID
 
 from gi.repository import Gio, GLib, GObject
+from lxml import etree
 from pykeepass import PyKeePass
+from pykeepass.group import Group
+from pykeepass.kdbx_parsing import KDBX
 
 import gsecrets.config_manager as config
-from gsecrets.safe_element import SafeEntry, SafeGroup
+from gsecrets import compression, const
+from gsecrets.backup import Backup, BackupStore
+from gsecrets.compression import CompressionEstimate
+from gsecrets.kdbx_header import HeaderError, KdbxHeader, parse_header
+from gsecrets.password_audit import PasswordAudit
+from gsecrets.safe_element import SafeElement, SafeEntry, SafeGroup
+from gsecrets.scheduler import Priority
+from gsecrets.unlock_queue import UnlockQueue
+from gsecrets.utils import (
+    StreamWriter,
+    discard_replace_stream,
+    read_kdbx_header_async,
+    read_kdbx_header_finish,
+    run_in_scheduler,
+)
 
 QUARK = GLib.quark_from_string("secrets")
 
+# Key of the safe custom data holding the gzip level used when saving.
+COMPRESSION_KEY = "SECRETS_COMPRESSION_LEVEL"
+
+# Attributes used for checking if there are changes in the file.
+FILE_MONITOR_ATTRIBUTES = (
+    f"{Gio.FILE_ATTRIBUTE_STANDARD_SIZE},{Gio.FILE_ATTRIBUTE_TIME_MODIFIED}"
+)
+
+
+class CompactionReport(NamedTuple):
+    # pylint: disable=inherit-non-class
+    removed_binaries: int
+    deduplicated_binaries: int
+    pruned_history: int
+    purged_elements: set[UUID]
+    size_before: int
+    size_after: int
+
+
+class SafeStatistics(NamedTuple):
+    # pylint: disable=inherit-non-class
+    entries: int
+    groups: int
+    passwords: int
+    attachment_bytes: int
+    history: int
+    expired: int
+    otp: int
+
 
 class DatabaseManager(GObject.Object):
     # pylint: disable=too-many-public-methods
@@ -22,6 +76,7 @@ class DatabaseManager(GObject.Object):
     Useful attributes:
      .path: str containing the filepath of the database
      .is_dirty: bool telling whether the database is in a dirty state
+     .read_only: bool telling whether changes are never saved
 
     Group objects are of type `pykeepass.group.Group`
     Entry objects are of type `pykeepass.entry.Entry`
@@ -48,63 +103,300 @@ class DatabaseManager(GObject.Object):
 
     trash_bin: SafeGroup | None = None
 
+    # Outer header of the safe, set by read_header_async.
+    header: KdbxHeader | None = None
+
     locked = GObject.Property(type=bool, default=False)
-    is_dirty = GObject.Property(type=bool, default=False)
+    # Read-only safes are never marked dirty, so they are never saved.
+    read_only = GObject.Property(type=bool, default=False)
+    # Whether unlocking waits for other safes to be unlocked first.
+    queued = GObject.Property(type=bool, default=False)
+
+    @GObject.Property(
+        type=bool,
+        default=False,
+        flags=GObject.ParamFlags.READWRITE | GObject.ParamFlags.EXPLICIT_NOTIFY,
+    )
+    def is_dirty(self) -> bool:
+        return self._is_dirty
+
+    @is_dirty.setter  # type: ignore
+    def is_dirty(self, value: bool) -> None:
+        if value and self.props.read_only:
+            return
 
-    def __init__(self, database_path: str) -> None:
+        if value != self._is_dirty:
+            self._is_dirty = value
+            self.notify("is-dirty")
+
+    def __init__(self, database: str | Gio.File) -> None:
         """Initialize the database handling logic.
 
-        :param str database_path: The database path
+        :param database: The database path or file
         """
         super().__init__()
 
         self.entries = Gio.ListStore.new(SafeEntry)
         self.groups = Gio.ListStore.new(SafeGroup)
 
-        self._path = database_path
+        if isinstance(database, Gio.File):
+            self._gfile = database
+        else:
+            self._gfile = Gio.File.new_for_path(database)
+
+        self._path = self._gfile.get_path() or self._gfile.get_uri()
         self.db: PyKeePass = None
+
+        # Saves and restores of the safe file run one at a time, saves are
+        # dropped once a backup is being restored.
+        self._write_lock = threading.Lock()
+        self._restoring = False
         self.keyfile_hash: str = ""
 
+        # Contents and etag of the safe file read by prefetch_async.
+        self._prefetched: tuple[bytes, str] | None = None
+
+        # Maps the SHA-256 digest of the binaries to their id.
+        self._binary_index: dict[bytes, int] | None = None
+        # Sizes of the binaries by id.
+        self._binary_sizes: list[int] | None = None
+        # Changed whenever binaries are added or deleted, ids of binaries
+        # are only valid for a given generation.
+        self._binaries_generation = 0
+
+        # Maps keyed hashes of passwords to the entries using them. The key
+        # is different for every session. The order of the entries store is
+        # mirrored to know which entries are removed from it, together with
+        # the hash each entry is indexed by.
+        self._password_key = secrets.token_bytes(32)
+        self._password_index: dict[bytes, dict[UUID, SafeEntry]] | None = None
+        self._password_order: list[UUID] = []
+        self._password_digests: dict[UUID, bytes] = {}
+        # Per entry counters of passwords, history, expired entries and
+        # entries with OTP, and their totals. The order of the entries store
+        # is mirrored to know which entries are removed from it. Attachments
+        # are counted by binary, as several entries can share a binary.
+        self._entry_counts: dict[UUID, tuple[int, ...]] | None = None
+        self._entry_binaries: dict[UUID, frozenset[int]] = {}
+        self._binary_refs: dict[int, int] = {}
+        self._entry_handlers: dict[UUID, tuple[SafeEntry, list[int]]] = {}
+        self._entry_order: list[UUID] = []
+        self._count_totals = [0] * 4
+        self.entries.connect("items-changed", self._on_entries_changed)
+
+        # Maps the UUID of the groups to their SafeGroup, the order of the
+        # groups store is mirrored to know which groups are removed from it.
+        self._groups_by_uuid: dict[UUID, SafeGroup] = {}
+        self._group_order: list[UUID] = []
+        self.groups.connect("items-changed", self._on_groups_changed)
+
+        self.password_audit = PasswordAudit(self)
+
+    def read_header_async(
+        self,
+        callback: Gio.AsyncReadyCallback,
+        cancellable: Gio.Cancellable | None = None,
+    ) -> None:
+        """Reads the outer header of the safe, the safe does not need to be
+        unlocked. Only the first kilobytes of the file are read.
+
+        :param GAsyncReadyCallback: callback run after the header is read
+        :param GCancellable cancellable: cancellable or None
+        """
+        task = Gio.Task.new(self, cancellable, callback)
+
+        def on_header(_gfile, result):
+            try:
+                header = read_kdbx_header_finish(result)
+            except GLib.Error as err:
+                task.return_error(err)
+            else:
+                self.header = header
+                task.return_value(header)
+
+        read_kdbx_header_async(self._gfile, cancellable, on_header)
+
+    def read_header_finish(self, result: Gio.AsyncResult) -> KdbxHeader:
+        """Finishes read_header_async, returns the header of the safe.
+        Can raise GLib.Error."""
+        _success, header = result.propagate_value()
+        return header
+
+    def load_async(
+        self,
+        callback: Gio.AsyncReadyCallback,
+        cancellable: Gio.Cancellable | None = None,
+    ) -> None:
+        """Reads the contents of the safe file through Gio.
+
+        Contents read by a previous prefetch_async or unlock_async are reused
+        if the etag of the file did not change since.
+
+        :param GAsyncReadyCallback: callback run after the safe is read
+        :param GCancellable cancellable: cancellable or None
+        """
+        task = Gio.Task.new(self, cancellable, callback)
+        prefetched = self._prefetched
+
+        def on_load(gfile, result):
+            try:
+                gbytes, etag = gfile.load_bytes_finish(result)
+            except GLib.Error as err:
+                task.return_error(err)
+            else:
+                task.return_value((gbytes.get_data(), etag))
+
+        def on_query_info(gfile, result):
+            try:
+                info = gfile.query_info_finish(result)
+            except GLib.Error as err:
+                logging.debug("Could not query safe etag: %s", err.message)
+            else:
+                if info.get_etag() == prefetched[1]:
+                    task.return_value(prefetched)
+                    return
+
+                logging.debug("Safe changed since it was prefetched")
+
+            gfile.load_bytes_async(cancellable, on_load)
+
+        if prefetched is None:
+            self._gfile.load_bytes_async(cancellable, on_load)
+        else:
+            self._gfile.query_info_async(
+                Gio.FILE_ATTRIBUTE_ETAG_VALUE,
+                Gio.FileQueryInfoFlags.NONE,
+                GLib.PRIORITY_DEFAULT,
+                cancellable,
+                on_query_info,
+            )
+
+    def load_finish(self, result: Gio.AsyncResult) -> tuple[bytes, str]:
+        """Finishes load_async, returns the contents of the safe and the etag
+        of the file. Can raise GLib.Error."""
+        _success, value = result.propagate_value()
+        return value
+
+    def prefetch_async(
+        self,
+        callback: Gio.AsyncReadyCallback,
+        cancellable: Gio.Cancellable | None = None,
+    ) -> None:
+        """Reads the safe into memory ahead of unlocking it.
+
+        The contents are used by unlock_async if the file did not change in
+        the meantime, so that unlocking starts directly with the key
+        derivation. The header of the safe is parsed from the contents.
+
+        :param GAsyncReadyCallback: callback run after the safe is read
+        :param GCancellable cancellable: cancellable or None
+        """
+        task = Gio.Task.new(self, cancellable, callback)
+
+        def on_load(_db_manager, result):
+            try:
+                data, etag = self.load_finish(result)
+            except GLib.Error as err:
+                task.return_error(err)
+                return
+
+            self._prefetched = (data, etag)
+            try:
+                self.header = parse_header(data)
+            except HeaderError as err:
+                logging.debug("Could not parse safe header: %s", err)
+
+            task.return_value(self.header)
+
+        self.load_async(on_load, cancellable)
+
+    def prefetch_finish(self, result: Gio.AsyncResult) -> KdbxHeader | None:
+        """Finishes prefetch_async, returns the header of the safe if it could
+        be parsed. Can raise GLib.Error."""
+        _success, header = result.propagate_value()
+        return header
+
     def unlock_async(
         self,
         password: str,
         keyfile: str = "",
         keyfile_hash: str = "",
         callback: Gio.AsyncReadyCallback = None,
+        unlock_queue: UnlockQueue | None = None,
     ) -> None:
         """Unlocks an opens a safe.
 
-        This pykeepass to open a safe database. If the database cannot
-        be opened, an exception is raised.
+        The safe file is read with load_async and then parsed from memory by
+        pykeepass. If the database cannot be opened, an exception is raised.
 
         :param str password: password to use or an empty string
         :param str keyfile: keyfile path to use or an empty string
         :param str keyfile_hash: keyfile_hash to set
         :param GAsyncReadyCallback: callback run after the unlock operation ends
+        :param UnlockQueue unlock_queue: queue limiting parallel unlocks, the
+            safe is parsed right away if None
         """
         self._opened = False
+        task = Gio.Task.new(self, None, callback)
 
-        def unlock_task(task, _source_object, _task_data, _cancellable):
-            if Path(self._path).suffix == ".kdb":
-                # NOTE kdb is a an older format for Keepass databases.
-                err = GLib.Error.new_literal(
-                    QUARK, "The kdb Format is not Supported", 0
-                )
-                task.return_error(err)
-                return
+        if Path(self._path).suffix == ".kdb":
+            # NOTE kdb is a an older format for Keepass databases.
+            err = GLib.Error.new_literal(QUARK, "The kdb Format is not Supported", 0)
+            task.return_error(err)
+            return
 
+        def on_load(_db_manager, result):
             try:
-                db = PyKeePass(self.path, password, keyfile)
-            except Exception as err:  # pylint: disable=broad-except
-                err = GLib.Error.new_literal(QUARK, str(err), 1)
+                data, etag = self.load_finish(result)
+            except GLib.Error as err:
+                err = GLib.Error.new_literal(QUARK, err.message, 1)
                 task.return_error(err)
-            else:
-                self.keyfile_hash = keyfile_hash
-                self._update_file_monitor()
-                task.return_value(db)
+                return
 
-        task = Gio.Task.new(self, None, callback)
-        task.run_in_thread(unlock_task)
+            # Kept in case unlocking has to be tried again.
+            self._prefetched = (data, etag)
+
+            def start(release=None):
+                self.props.queued = False
+
+                def unlock_task(task, _source_object, _task_data, _cancellable):
+                    try:
+                        db = PyKeePass(io.BytesIO(data), password, keyfile)
+                    except Exception as err:  # pylint: disable=broad-except
+                        err = GLib.Error.new_literal(QUARK, str(err), 1)
+                        task.return_error(err)
+                    else:
+                        # The stream is not needed anymore, saving passes its
+                        # own stream explicitly.
+                        db.filename = None
+                        self.keyfile_hash = keyfile_hash
+                        self._update_file_monitor()
+                        task.return_value(db)
+
+                # The task also completes if the scheduler drops it.
+                if release is not None:
+                    task.connect("notify::completed", lambda *_args: release())
+
+                run_in_scheduler(task, unlock_task, Priority.INTERACTIVE)
+
+            if unlock_queue is None:
+                start()
+                return
+
+            threads, memory = self._unlock_cost(data)
+            self.props.queued = not unlock_queue.submit(threads, memory, start)
+
+        self.load_async(on_load)
+
+    @staticmethod
+    def _unlock_cost(data: bytes) -> tuple[int, int]:
+        """The threads and memory needed to derive the key of a safe."""
+        try:
+            header = parse_header(data)
+        except HeaderError:
+            return 1, 0
+
+        return header.parallelism or 1, header.memory or 0
 
     def unlock_finish(self, result):
         try:
@@ -114,6 +406,7 @@ class DatabaseManager(GObject.Object):
         else:
             self.db = db
             self._opened = True
+            self._prefetched = None
             logging.debug("Opening of safe %s was successful", self.path)
 
             if not self._elements_loaded:
@@ -126,41 +419,204 @@ class DatabaseManager(GObject.Object):
     # Database Modifications
     #
 
+    @staticmethod
+    def _read_only_error() -> GLib.Error:
+        return GLib.Error.new_literal(QUARK, "The safe is read-only", 8)
+
     def save_async(self, callback: Gio.AsyncReadyCallback) -> None:
         """Write all changes to database
 
-        This consists in two parts, we first save it to a byte stream in memory
-        and then we write the contents of the stream into the database using
-        Gio. This is done in this way since pykeepass save is not atomic,
-        whereas GFile operations are.
-
-        Note that certain operations in pykeepass can fail at the middle of the
-        operation, nuking the database in the process."""
+        pykeepass serializes the safe directly into a Gio replace stream of
+        the safe file, the original file is only replaced once the new
+        contents are completely written. If serializing fails the original
+        file is left untouched."""
         task = Gio.Task.new(self, None, callback)
-        task.run_in_thread(self._save_task)
+        run_in_scheduler(task, self._save_task, Priority.SAVE)
 
     def _save_task(self, task, _obj, _data, _cancellable):
-        if self.save_running:
-            task.return_boolean(False)
-            logging.debug("Save already running")
-            return
+        with self._write_lock:
+            if self._restoring:
+                task.return_boolean(False)
+                logging.debug("Backup being restored, not saving")
+                return
+
+            if self.save_running:
+                task.return_boolean(False)
+                logging.debug("Save already running")
+                return
+
+            if not self.is_dirty:
+                task.return_boolean(False)
+                logging.debug("Safe is not dirty")
+                return
+
+            logging.debug("Saving database %s", self.path)
+            self.save_running = True
+
+            try:
+                self._snapshot()
+            except (GLib.Error, OSError) as err:
+                logging.warning("Could not back up safe: %s", err)
+
+            try:
+                info = self._write_safe()
+            except Exception as err:  # pylint: disable=broad-except
+                err = GLib.Error.new_literal(QUARK, str(err), 2)
+                task.return_error(err)
+            else:
+                self._update_file_monitor(info)
+                task.return_boolean(True)
+
+    def _write_safe(self) -> Gio.FileInfo | None:
+        """Serializes the safe into a replace stream of the safe file.
+
+        The stream writes to a temporary file which replaces the safe file
+        when it is closed. GIO only syncs it to the disk when a non-empty
+        file is replaced, so unless disabled by the sync-on-save setting it
+        is flushed and synced before closing it. Otherwise a crash right
+        after the rename could leave an empty safe file on some file
+        systems.
+
+        Returns the size and modification time of the written file if the
+        stream provides them. This is a blocking operation."""
+        level = compression.LEVELS.get(
+            self.compression, compression.LEVELS[compression.DEFAULT]
+        )
+        stream = self._gfile.replace(None, False, Gio.FileCreateFlags.PRIVATE, None)
+        try:
+            with compression.compression_level(level):
+                if stream.can_seek():
+                    self.db.save(StreamWriter(stream))
+                else:
+                    # pykeepass seeks back to write the checksums of the safe.
+                    buffer = io.BytesIO()
+                    self.db.save(buffer)
+                    StreamWriter(stream).write(buffer.getbuffer())
+
+            if config.get_sync_on_save():
+                stream.flush(None)
+                # Only local files have a file descriptor.
+                if (get_fd := getattr(stream, "get_fd", None)) is not None:
+                    os.fsync(get_fd())
+        except Exception:
+            discard_replace_stream(stream)
+            raise
+
+        try:
+            info = stream.query_info(FILE_MONITOR_ATTRIBUTES, None)
+        except GLib.Error:
+            info = None
+
+        stream.close(None)
+        return info
+
+    def _backup_store(self) -> BackupStore:
+        uri_hash = hashlib.sha256(self._gfile.get_uri().encode("utf-8")).hexdigest()
+        directory = os.path.join(
+            GLib.get_user_data_dir(), const.SHORT_NAME, "backups", uri_hash[:16]
+        )
+        return BackupStore(
+            directory, config.get_backup_generations(), config.get_backup_size_limit()
+        )
+
+    def _snapshot(self) -> Backup | None:
+        """Backs up the current contents of the safe file, this is a blocking
+        operation. Returns None if backups are disabled or if an identical
+        backup already exists."""
+        store = self._backup_store()
+        if store.max_generations == 0:
+            return None
+
+        _success, data, _etag = self._gfile.load_contents(None)
+        return store.snapshot(data)
+
+    def backup_async(self, callback: Gio.AsyncReadyCallback) -> None:
+        """Backs up the current contents of the safe file.
+
+        Backups are also taken before every save. The oldest backups are
+        deleted once the limits set in the preferences are reached.
+        """
+
+        def backup_task(task, _obj, _data, _cancellable):
+            try:
+                backup = self._snapshot()
+            except (GLib.Error, OSError) as err:
+                err = GLib.Error.new_literal(QUARK, str(err), 7)
+                task.return_error(err)
+            else:
+                task.return_value(backup)
 
-        if not self.is_dirty:
-            task.return_boolean(False)
-            logging.debug("Safe is not dirty")
+        task = Gio.Task.new(self, None, callback)
+        run_in_scheduler(task, backup_task, Priority.SAVE)
+
+    def backup_finish(self, result: Gio.AsyncResult) -> Backup | None:
+        """Finishes backup_async, returns the new backup or None if no backup
+        was needed. Can raise GLib.Error."""
+        _success, backup = result.propagate_value()
+        return backup
+
+    def list_backups_async(self, callback: Gio.AsyncReadyCallback) -> None:
+        """Lists the backups of the safe, newest first."""
+
+        def list_task(task, _obj, _data, _cancellable):
+            try:
+                backups = self._backup_store().backups()
+            except OSError as err:
+                err = GLib.Error.new_literal(QUARK, str(err), 7)
+                task.return_error(err)
+            else:
+                task.return_value(backups)
+
+        task = Gio.Task.new(self, None, callback)
+        run_in_scheduler(task, list_task, Priority.STATS)
+
+    def list_backups_finish(self, result: Gio.AsyncResult) -> list[Backup]:
+        """Finishes list_backups_async. Can raise GLib.Error."""
+        _success, backups = result.propagate_value()
+        return backups
+
+    def restore_backup_async(
+        self, backup: Backup, callback: Gio.AsyncReadyCallback
+    ) -> None:
+        """Replaces the safe file with a backup.
+
+        The current contents of the file are backed up first, so restoring
+        can be undone. The safe needs to be unlocked again afterwards, no
+        save is done from the moment the restore starts: a running save is
+        waited for, and pending and later saves are dropped so that they
+        cannot overwrite the restored file.
+        """
+        if self.props.read_only:
+            task = Gio.Task.new(self, None, callback)
+            task.return_error(self._read_only_error())
             return
 
-        logging.debug("Saving database %s", self.path)
-        self.save_running = True
+        def restore_task(task, _obj, _data, _cancellable):
+            with self._write_lock:
+                try:
+                    self._snapshot()
+                    data = BackupStore.read(backup)
+                    self._gfile.replace_contents(
+                        data, None, False, Gio.FileCreateFlags.PRIVATE, None
+                    )
+                except (GLib.Error, OSError) as err:
+                    err = GLib.Error.new_literal(QUARK, str(err), 7)
+                    task.return_error(err)
+                else:
+                    task.return_boolean(True)
+
+        self._restoring = True
+        task = Gio.Task.new(self, None, callback)
+        run_in_scheduler(task, restore_task, Priority.SAVE)
 
+    def restore_backup_finish(self, result: Gio.AsyncResult) -> bool:
+        """Finishes restore_backup_async. Can raise GLib.Error, saving is
+        possible again if restoring failed."""
         try:
-            self.db.save()
-        except Exception as err:  # pylint: disable=broad-except
-            err = GLib.Error.new_literal(QUARK, str(err), 2)
-            task.return_error(err)
-        else:
-            self._update_file_monitor()
-            task.return_boolean(True)
+            return result.propagate_boolean()
+        except GLib.Error:
+            self._restoring = False
+            raise
 
     def save_finish(self, result: Gio.AsyncResult) -> bool:
         """Finishes save_async, returns whether the safe was saved.
@@ -177,6 +633,754 @@ class DatabaseManager(GObject.Object):
 
             return is_saved
 
+    def compact_async(
+        self,
+        trash_max_age: int,
+        progress_callback: Callable[[float], None] | None = None,
+        callback: Gio.AsyncReadyCallback = None,
+    ) -> None:
+        """Remove dead weight from the safe.
+
+        Trash bin elements moved there more than `trash_max_age` days ago are
+        purged, histories are pruned to the limit stored in the safe, identical
+        attachments are merged and binaries no entry references are removed.
+
+        The binaries are hashed and the payload is measured in the scheduler,
+        the safe itself is only modified in the main thread, like any other
+        change.
+
+        :param int trash_max_age: age in days of trash bin elements to purge
+        :param progress_callback: called in the main loop with the progress
+        :param GAsyncReadyCallback: callback run after the operation ends
+        """
+        task = Gio.Task.new(self, None, callback)
+        if self.props.read_only:
+            task.return_error(self._read_only_error())
+            return
+
+        def report_progress(fraction):
+            if progress_callback:
+                GLib.idle_add(progress_callback, fraction)
+
+        def measure_task(subtask, _obj, _data, _cancellable):
+            try:
+                generation = self._binaries_generation
+                digests = self._binary_digests()
+                size_before = self._payload_size()
+            except Exception as err:  # pylint: disable=broad-except
+                err = GLib.Error.new_literal(QUARK, str(err), 4)
+                subtask.return_error(err)
+            else:
+                report_progress(0.5)
+                subtask.return_value((generation, digests, size_before))
+
+        def on_measured(_db_manager, result):
+            try:
+                _success, (generation, digests, size_before) = result.propagate_value()
+            except GLib.Error as err:
+                task.return_error(err)
+                return
+
+            # Binaries were added or deleted in the meantime.
+            if generation != self._binaries_generation:
+                digests = self._binary_digests()
+
+            changes = self._apply_compaction(trash_max_age, digests)
+            report_progress(0.75)
+
+            def size_task(subtask, _obj, _data, _cancellable):
+                try:
+                    size_after = self._payload_size()
+                except Exception as err:  # pylint: disable=broad-except
+                    err = GLib.Error.new_literal(QUARK, str(err), 4)
+                    subtask.return_error(err)
+                else:
+                    report_progress(1.0)
+                    report = CompactionReport(*changes, size_before, size_after)
+                    subtask.return_value(report)
+
+            subtask = Gio.Task.new(self, None, on_sized)
+            run_in_scheduler(subtask, size_task, Priority.SAVE)
+
+        def on_sized(_db_manager, result):
+            try:
+                _success, report = result.propagate_value()
+            except GLib.Error as err:
+                task.return_error(err)
+            else:
+                task.return_value(report)
+
+        subtask = Gio.Task.new(self, None, on_measured)
+        run_in_scheduler(subtask, measure_task, Priority.SAVE)
+
+    def _apply_compaction(
+        self, trash_max_age: int, digests: list[bytes]
+    ) -> tuple[int, int, int, set[UUID]]:
+        """Compacts the safe, to be run in the main thread.
+
+        Returns the number of removed binaries, deduplicated binaries and
+        pruned history items, and the uuids of the purged elements."""
+        purged = self._purge_trash_bin(trash_max_age)
+        pruned = self._prune_history()
+        deduplicated = self._deduplicate_binaries(digests)
+        removed = self._remove_orphaned_binaries()
+
+        for store in (self.entries, self.groups):
+            for pos in reversed(range(store.get_n_items())):
+                if store.get_item(pos).uuid in purged:
+                    store.remove(pos)
+
+        if removed or pruned or purged:
+            self.is_dirty = True
+
+        if pruned or removed or deduplicated:
+            self._reset_statistics()
+
+        return removed, deduplicated, pruned, purged
+
+    def compact_finish(self, result: Gio.AsyncResult) -> CompactionReport:
+        """Finishes compact_async, returns a report of the changes made.
+        Can raise GLib.Error."""
+        _success, report = result.propagate_value()
+        logging.debug(
+            "Safe compacted from %s to %s bytes",
+            report.size_before,
+            report.size_after,
+        )
+        return report
+
+    def _payload_size(self) -> int:
+        """Size in bytes of the unencrypted and uncompressed payload."""
+        return len(self.db.xml()) + sum(len(data) for data in self.db.binaries)
+
+    def _purge_trash_bin(self, max_age: int) -> set[UUID]:
+        """Deletes the elements that were trashed more than max_age days ago.
+
+        Returns the uuids of the deleted elements and their descendants."""
+        purged: set[UUID] = set()
+        trash_bin = self.db.recyclebin_group
+        if trash_bin is None:
+            return purged
+
+        limit = datetime.now(timezone.utc) - timedelta(days=max_age)
+        for element in trash_bin.entries + trash_bin.subgroups:
+            # pylint: disable=protected-access
+            trashed = element._get_times_property("LocationChanged")
+            trashed = trashed or element.mtime
+            if trashed is None or trashed > limit:
+                continue
+
+            if isinstance(element, Group):
+                stack = [element]
+                while stack:
+                    group = stack.pop()
+                    purged.add(group.uuid)
+                    purged.update(entry.uuid for entry in group.entries)
+                    stack.extend(group.subgroups)
+
+                self.db.delete_group(element)
+            else:
+                purged.add(element.uuid)
+                self.db.delete_entry(element)
+
+        return purged
+
+    def _prune_history(self) -> int:
+        """Deletes the oldest history items above the limit of the safe.
+
+        Returns the number of deleted history items."""
+        max_items = self.db.tree.getroot().findtext("Meta/HistoryMaxItems")
+        if not max_items or int(max_items) < 0:
+            return 0
+
+        pruned = 0
+        for entry in self.db.entries:
+            history = entry.history
+            excess = len(history) - int(max_items)
+            for history_entry in history[:max(excess, 0)]:
+                entry.delete_history(history_entry)
+                pruned += 1
+
+        return pruned
+
+    def _binary_references(self) -> list:
+        """References to binaries from entries and their history."""
+        return list(self.db.tree.getroot().iterfind(".//Binary/Value[@Ref]"))
+
+    def _binary_digests(self) -> list[bytes]:
+        """SHA-256 digests of the binaries, by id."""
+        if self.db.version >= (4, 0):
+            n_binaries = len(self.db.kdbx.body.payload.inner_header.binary)
+            return [
+                hashlib.sha256(self.get_binary(binary_id)).digest()
+                for binary_id in range(n_binaries)
+            ]
+
+        return [hashlib.sha256(data).digest() for data in self.db.binaries]
+
+    def _deduplicate_binaries(self, digests: list[bytes]) -> int:
+        """Points all the references of identical binaries to the first copy.
+
+        The duplicates are left orphaned. Returns the number of duplicates.
+
+        :param digests: digests of the binaries, see _binary_digests
+        """
+        first_ids: dict[bytes, int] = {}
+        replacements: dict[int, int] = {}
+        for binary_id, digest in enumerate(digests):
+            if digest in first_ids:
+                replacements[binary_id] = first_ids[digest]
+            else:
+                first_ids[digest] = binary_id
+
+        for value in self._binary_references():
+            ref = int(value.get("Ref"))
+            if ref in replacements:
+                value.set("Ref", str(replacements[ref]))
+
+        return len(replacements)
+
+    def _remove_orphaned_binaries(self) -> int:
+        """Removes the binaries which are not referenced by any entry.
+
+        Returns the number of removed binaries."""
+        references = self._binary_references()
+        used = {int(value.get("Ref")) for value in references}
+        orphans = set(range(len(self.db.binaries))) - used
+        if orphans:
+            self._delete_binaries(orphans, references)
+
+        return len(orphans)
+
+    def _delete_binaries(self, ids: set[int], references: list) -> None:
+        """Deletes the binaries in ids, which must not be referenced anymore.
+
+        Unlike pykeepass, this also updates the references from history
+        items to the binaries that are kept."""
+        n_binaries = len(self.db.binaries)
+        new_ids = {}
+        for binary_id in range(n_binaries):
+            if binary_id not in ids:
+                new_ids[binary_id] = len(new_ids)
+
+        if self.db.version >= (4, 0):
+            binaries = self.db.kdbx.body.payload.inner_header.binary
+            binaries[:] = [binary for i, binary in enumerate(binaries) if i not in ids]
+        else:
+            meta_binaries = self.db.tree.getroot().find("Meta/Binaries")
+            for elem in list(meta_binaries):
+                binary_id = int(elem.get("ID"))
+                if binary_id in ids:
+                    meta_binaries.remove(elem)
+                else:
+                    elem.set("ID", str(new_ids[binary_id]))
+
+        for value in references:
+            value.set("Ref", str(new_ids[int(value.get("Ref"))]))
+
+        if self._binary_index is not None:
+            self._binary_index = {
+                digest: new_ids[binary_id]
+                for digest, binary_id in self._binary_index.items()
+                if binary_id in new_ids
+            }
+
+        self._binary_sizes = None
+        self._binaries_generation += 1
+
+    def add_binary(self, data: bytes, digest: bytes | None = None) -> int:
+        """Add a binary to the safe, identical binaries are stored only once.
+
+        :param bytes data: binary content
+        :param bytes digest: SHA-256 digest of data if it is already known
+        :returns: id of the binary
+        """
+        if self._binary_index is None:
+            self._binary_index = {}
+            for binary_id, binary in enumerate(self.db.binaries):
+                self._binary_index.setdefault(
+                    hashlib.sha256(binary).digest(), binary_id
+                )
+
+        if digest is None:
+            digest = hashlib.sha256(data).digest()
+
+        if (binary_id := self._binary_index.get(digest)) is None:
+            binary_id = self.db.add_binary(data)
+            self._binary_index[digest] = binary_id
+            self._binaries_generation += 1
+            if self._binary_sizes is not None:
+                self._binary_sizes.append(len(data))
+
+        return binary_id
+
+    def get_binary(self, binary_id: int) -> bytes | memoryview:
+        """Content of a binary.
+
+        For KDBX 4 safes this is a view of the binary held by the safe, so it
+        does not copy the content. pykeepass copies all the binaries of the
+        safe whenever one of them is accessed.
+
+        :param int binary_id: id of the binary
+        """
+        if self.db.version >= (4, 0):
+            binary = self.db.kdbx.body.payload.inner_header.binary[binary_id]
+            # The first byte is the protection flag.
+            return memoryview(binary.data)[1:]
+
+        return self.db.binaries[binary_id]
+
+    def release_binary(self, binary_id: int) -> None:
+        """Delete a binary if no entry or history item references it.
+
+        :param int binary_id: id of the binary
+        """
+        references = self._binary_references()
+        if any(int(value.get("Ref")) == binary_id for value in references):
+            return
+
+        self._delete_binaries({binary_id}, references)
+        # The ids of the binaries referenced by the entries changed.
+        self._reset_statistics()
+
+    def _get_custom_data(self, key: str) -> str | None:
+        root = self.db.tree.getroot()
+        for item in root.iterfind("Meta/CustomData/Item"):
+            if item.findtext("Key") == key:
+                return item.findtext("Value")
+
+        return None
+
+    def _set_custom_data(self, key: str, value: str) -> None:
+        meta = self.db.tree.getroot().find("Meta")
+        custom_data = meta.find("CustomData")
+        if custom_data is None:
+            custom_data = etree.SubElement(meta, "CustomData")
+
+        for item in custom_data.iterfind("Item"):
+            if item.findtext("Key") == key:
+                item.find("Value").text = value
+                return
+
+        item = etree.SubElement(custom_data, "Item")
+        etree.SubElement(item, "Key").text = key
+        etree.SubElement(item, "Value").text = value
+
+    @property
+    def compression(self) -> str:
+        """How the payload is compressed when saving, either
+        compression.NONE or one of the keys of compression.LEVELS."""
+        header = self.db.kdbx.header.value
+        if not header.dynamic_header.compression_flags.data.compression:
+            return compression.NONE
+
+        level = self._get_custom_data(COMPRESSION_KEY)
+        return level if level in compression.LEVELS else compression.DEFAULT
+
+    @compression.setter
+    def compression(self, value: str) -> None:
+        if value == self.compression or self.props.read_only:
+            return
+
+        # The header is written from its raw data, it needs to be built again
+        # after changing it.
+        header = self.db.kdbx.header
+        flags = header.value.dynamic_header.compression_flags.data
+        flags.compression = value != compression.NONE
+        header.data = KDBX.header.build({"value": header.value})
+
+        if value != compression.NONE:
+            self._set_custom_data(COMPRESSION_KEY, value)
+
+        self.is_dirty = True
+
+    def estimate_compression_async(self, callback: Gio.AsyncReadyCallback) -> None:
+        """Measures the size of the payload and the time needed to compress it
+        with each of the compression options."""
+
+        def estimate_task(task, _obj, _data, _cancellable):
+            try:
+                data = self.db.xml() + b"".join(self.db.binaries)
+                estimates = compression.estimate(data)
+            except Exception as err:  # pylint: disable=broad-except
+                err = GLib.Error.new_literal(QUARK, str(err), 6)
+                task.return_error(err)
+            else:
+                task.return_value(estimates)
+
+        task = Gio.Task.new(self, None, callback)
+        run_in_scheduler(task, estimate_task, Priority.STATS)
+
+    def estimate_compression_finish(
+        self, result: Gio.AsyncResult
+    ) -> dict[str, CompressionEstimate]:
+        """Finishes estimate_compression_async, returns the estimates of each
+        compression option. Can raise GLib.Error."""
+        _success, estimates = result.propagate_value()
+        return estimates
+
+    def _on_groups_changed(self, groups, position, removed, added):
+        added_groups = [groups.get_item(i) for i in range(position, position + added)]
+        for group_uuid in self._group_order[position:position + removed]:
+            self._groups_by_uuid.pop(group_uuid, None)
+
+        self._group_order[position:position + removed] = [
+            safe_group.uuid for safe_group in added_groups
+        ]
+        for safe_group in added_groups:
+            self._groups_by_uuid[safe_group.uuid] = safe_group
+
+    def get_group(self, group_uuid: UUID) -> SafeGroup | None:
+        """The group of the groups store with the given UUID."""
+        return self._groups_by_uuid.get(group_uuid)
+
+    @staticmethod
+    def _store_runs(store: Gio.ListStore, uuids: set[UUID], gap: int = 0):
+        """Runs of positions of the elements of store with an uuid in uuids.
+
+        Runs separated by at most gap elements are merged together. Returns a
+        list of (position, length) pairs in ascending order.
+        """
+        runs: list[list[int]] = []
+        for pos in range(store.get_n_items()):
+            if store.get_item(pos).uuid not in uuids:
+                continue
+
+            if runs and pos - (runs[-1][0] + runs[-1][1]) <= gap:
+                runs[-1][1] = pos - runs[-1][0] + 1
+            else:
+                runs.append([pos, 1])
+
+        return runs
+
+    def _elements_changed(self, elements: list[SafeElement]) -> None:
+        """Notifies the stores that the elements changed, so that the filter
+        models of the groups are updated. Nearby elements are notified
+        together."""
+        for store, is_entry in ((self.entries, True), (self.groups, False)):
+            uuids = {
+                element.uuid for element in elements if element.is_entry == is_entry
+            }
+            if uuids:
+                for pos, length in self._store_runs(store, uuids, gap=32):
+                    store.items_changed(pos, length, length)
+
+    def _elements_removed(self, elements: list[SafeElement]) -> None:
+        for store, is_entry in ((self.entries, True), (self.groups, False)):
+            uuids = {
+                element.uuid for element in elements if element.is_entry == is_entry
+            }
+            if uuids:
+                for pos, length in reversed(self._store_runs(store, uuids)):
+                    store.splice(pos, length, [])
+
+    def delete_many(self, elements: list[SafeElement]) -> None:
+        """Deletes several elements, see SafeElement.delete.
+
+        The stores and the parent groups are notified once for all the
+        elements.
+        """
+        parents = {}
+        for element in elements:
+            parent = element.parentgroup
+            parents[parent.uuid] = parent
+            if element.is_entry:
+                self.db.delete_entry(element.element)
+            else:
+                if element.is_trash_bin:
+                    self.trash_bin = None
+
+                self.db.delete_group(element.element)
+
+        self._elements_removed(elements)
+        for parent in parents.values():
+            parent.updated()
+
+    def trash_many(
+        self, elements: list[SafeElement]
+    ) -> tuple[list[SafeElement], list[tuple[SafeElement, SafeGroup]]]:
+        """Moves several elements to the trash bin, see SafeElement.trash.
+
+        Elements already in the trash bin, and the trash bin itself, are
+        deleted instead. The stores and the parent groups are notified once
+        for all the elements. Returns the deleted elements, and the trashed
+        elements together with their previous parent group.
+        """
+        trash_bin_missing = SafeGroup.get_trash_bin(self) is None
+        deleted: list[SafeElement] = []
+        trashed: list[tuple[SafeElement, SafeGroup]] = []
+        parents = {}
+
+        # Entries are trashed before groups, as SafeElement.trash is used
+        # in that order by the selection mode.
+        elements = sorted(elements, key=lambda element: not element.is_entry)
+        for element in elements:
+            parent = element.parentgroup
+            if parent.is_trash_bin or element.is_trash_bin:
+                deleted.append(element)
+                continue
+
+            parents[parent.uuid] = parent
+            trashed.append((element, parent))
+            if element.is_entry:
+                self.db.trash_entry(element.element)
+            else:
+                self.db.trash_group(element.element)
+
+            element.mark_moved()
+
+        if deleted:
+            self.delete_many(deleted)
+
+        self._elements_changed([element for element, _parent in trashed])
+
+        if trash_bin_missing and trashed:
+            self.groups.append(SafeGroup.get_trash_bin(self))
+
+        for parent in parents.values():
+            parent.updated()
+
+        return deleted, trashed
+
+    def move_many(self, elements: list[SafeElement], dest: SafeGroup) -> None:
+        """Moves several elements to dest, see SafeElement.move_to.
+
+        The stores and the groups are notified once for all the elements.
+        """
+        moved = []
+        parents = {}
+        for element in elements:
+            parent = element.parentgroup
+            if parent == dest:
+                continue
+
+            parents[parent.uuid] = parent
+            moved.append(element)
+            if element.is_entry:
+                self.db.move_entry(element.element, dest.group)
+            else:
+                self.db.move_group(element.element, dest.group)
+
+            element.mark_moved()
+
+        if not moved:
+            return
+
+        self._elements_changed(moved)
+        for parent in parents.values():
+            parent.updated()
+
+        dest.updated()
+
+    def password_hash(self, password: str) -> bytes:
+        """Keyed hash of password, only valid for the current session."""
+        return hashlib.blake2b(
+            password.encode("utf-8"), key=self._password_key, digest_size=16
+        ).digest()
+
+    def in_trash_bin(self, element: SafeElement) -> bool:
+        """Whether element is inside the trash bin."""
+        if (trash_bin := self.db.recyclebin_group) is None:
+            return False
+
+        # pylint: disable=protected-access
+        trash_element = trash_bin._element
+        return any(
+            group is trash_element
+            for group in element.element._element.iterancestors()
+        )
+
+    def _get_password_index(self) -> dict[bytes, dict[UUID, SafeEntry]]:
+        if self._password_index is None:
+            self._password_index = {}
+            self._password_digests = {}
+            self._password_order = []
+            for safe_entry in self.entries:
+                self._password_order.append(safe_entry.uuid)
+                self._index_password(safe_entry)
+
+        return self._password_index
+
+    def _index_password(self, safe_entry: SafeEntry) -> None:
+        if password := safe_entry.props.password:
+            digest = self.password_hash(password)
+            self._password_digests[safe_entry.uuid] = digest
+            self._password_index.setdefault(digest, {})[safe_entry.uuid] = safe_entry
+
+    def _unindex_password(self, entry_uuid: UUID) -> None:
+        if (digest := self._password_digests.pop(entry_uuid, None)) is None:
+            return
+
+        if (entries := self._password_index.get(digest)) is not None:
+            entries.pop(entry_uuid, None)
+            if not entries:
+                del self._password_index[digest]
+
+    def _on_entries_changed(self, entries, position, removed, added):
+        added_entries = [entries.get_item(i) for i in range(position, position + added)]
+
+        if self._entry_counts is not None:
+            for entry_uuid in self._entry_order[position:position + removed]:
+                self._untrack_entry(entry_uuid)
+
+            self._entry_order[position:position + removed] = [
+                safe_entry.uuid for safe_entry in added_entries
+            ]
+            for safe_entry in added_entries:
+                self._track_entry(safe_entry)
+
+        if self._password_index is not None:
+            for entry_uuid in self._password_order[position:position + removed]:
+                self._unindex_password(entry_uuid)
+
+            self._password_order[position:position + removed] = [
+                safe_entry.uuid for safe_entry in added_entries
+            ]
+            for safe_entry in added_entries:
+                self._index_password(safe_entry)
+
+    def update_password_index(self, safe_entry: SafeEntry) -> None:
+        """Records that the password of an entry changed."""
+        if self._password_index is None:
+            return
+
+        self._unindex_password(safe_entry.uuid)
+        self._index_password(safe_entry)
+
+    def entries_with_password(self, password: str) -> set[UUID]:
+        """UUIDs of the entries outside of the trash bin whose password is
+        password."""
+        if not password:
+            return set()
+
+        entries = self._get_password_index().get(self.password_hash(password), {})
+        return {
+            entry_uuid
+            for entry_uuid, safe_entry in entries.items()
+            if not self.in_trash_bin(safe_entry)
+        }
+
+    def _binary_size(self, binary_id: int) -> int:
+        if self._binary_sizes is None:
+            if self.db.version >= (4, 0):
+                binaries = self.db.kdbx.body.payload.inner_header.binary
+                # The first byte is the protection flag.
+                self._binary_sizes = [len(binary.data) - 1 for binary in binaries]
+            else:
+                # pykeepass decodes all the binaries of KDBX 3 safes every
+                # time they are accessed.
+                self._binary_sizes = [len(data) for data in self.db.binaries]
+
+        if 0 <= binary_id < len(self._binary_sizes):
+            return self._binary_sizes[binary_id]
+
+        return 0
+
+    def _count_entry(self, safe_entry: SafeEntry) -> tuple[int, ...]:
+        return (
+            int(bool(safe_entry.props.password)),
+            len(safe_entry.entry.history),
+            int(safe_entry.props.expired),
+            int(bool(safe_entry.props.otp)),
+        )
+
+    def _add_counts(self, counts: tuple[int, ...], sign: int) -> None:
+        for i, count in enumerate(counts):
+            self._count_totals[i] += sign * count
+
+    def _add_binaries(self, binary_ids: frozenset[int], sign: int) -> None:
+        for binary_id in binary_ids:
+            refs = self._binary_refs.get(binary_id, 0) + sign
+            if refs > 0:
+                self._binary_refs[binary_id] = refs
+            else:
+                self._binary_refs.pop(binary_id, None)
+
+    def _set_entry_binaries(self, safe_entry: SafeEntry) -> None:
+        old_ids = self._entry_binaries.get(safe_entry.uuid, frozenset())
+        new_ids = frozenset(
+            attachment.id for attachment in safe_entry.props.attachments
+        )
+        self._entry_binaries[safe_entry.uuid] = new_ids
+        self._add_binaries(old_ids, -1)
+        self._add_binaries(new_ids, 1)
+
+    def _track_entry(self, safe_entry: SafeEntry) -> None:
+        counts = self._count_entry(safe_entry)
+        self._entry_counts[safe_entry.uuid] = counts
+        self._add_counts(counts, 1)
+        self._set_entry_binaries(safe_entry)
+
+        handlers = [
+            safe_entry.connect("updated", self._on_entry_counts_changed),
+            safe_entry.connect("notify::expired", self._on_entry_counts_changed),
+        ]
+        self._entry_handlers[safe_entry.uuid] = (safe_entry, handlers)
+
+    def _untrack_entry(self, entry_uuid: UUID) -> None:
+        if (counts := self._entry_counts.pop(entry_uuid, None)) is not None:
+            self._add_counts(counts, -1)
+
+        if (binary_ids := self._entry_binaries.pop(entry_uuid, None)) is not None:
+            self._add_binaries(binary_ids, -1)
+
+        if (tracked := self._entry_handlers.pop(entry_uuid, None)) is not None:
+            safe_entry, handlers = tracked
+            for handler_id in handlers:
+                safe_entry.disconnect(handler_id)
+
+    def _on_entry_counts_changed(self, safe_entry: SafeEntry, *_args) -> None:
+        old_counts = self._entry_counts.get(safe_entry.uuid)
+        if old_counts is None:
+            return
+
+        new_counts = self._count_entry(safe_entry)
+        self._entry_counts[safe_entry.uuid] = new_counts
+        self._add_counts(old_counts, -1)
+        self._add_counts(new_counts, 1)
+        self._set_entry_binaries(safe_entry)
+
+    def _reset_statistics(self) -> None:
+        """Drops the counters, they are recomputed the next time they are
+        needed."""
+        if self._entry_counts is None:
+            return
+
+        for entry_uuid in list(self._entry_handlers):
+            self._untrack_entry(entry_uuid)
+
+        self._entry_counts = None
+        self._entry_order = []
+        self._count_totals = [0] * 4
+
+    def get_statistics(self) -> SafeStatistics:
+        """Statistics of the safe.
+
+        The counters are computed the first time they are needed, and then
+        kept up to date as entries are added, removed or updated. A binary
+        shared by several attachments is counted once.
+        """
+        if self._entry_counts is None:
+            self._entry_counts = {}
+            self._entry_order = []
+            for safe_entry in self.entries:
+                self._entry_order.append(safe_entry.uuid)
+                self._track_entry(safe_entry)
+
+        passwords, history, expired, otp = self._count_totals
+        attachment_bytes = sum(
+            self._binary_size(binary_id) for binary_id in self._binary_refs
+        )
+        return SafeStatistics(
+            self.entries.get_n_items(),
+            self.groups.get_n_items(),
+            passwords,
+            attachment_bytes,
+            history,
+            expired,
+            otp,
+        )
+
     def set_credentials_async(
         self, password, keyfile="", keyfile_hash="", callback=None
     ):
@@ -184,8 +1388,13 @@ class DatabaseManager(GObject.Object):
 
         It does almost the same as save_async, with the difference that
         correctly handles errors, it won't leave the database in a state where
-        its fields have the incorrect values.
+        its fields have the incorrect values. Read-only safes are refused
+        before the credentials are changed.
         """
+        if self.props.read_only:
+            task = Gio.Task.new(self, None, callback)
+            task.return_error(self._read_only_error())
+            return
 
         def set_credentials_task(task, obj, data, cancellable):
             self.old_password = self.password
@@ -200,7 +1409,7 @@ class DatabaseManager(GObject.Object):
             self._save_task(task, obj, data, cancellable)
 
         task = Gio.Task.new(self, None, callback)
-        task.run_in_thread(set_credentials_task)
+        run_in_scheduler(task, set_credentials_task, Priority.SAVE)
 
     def set_credentials_finish(self, result):
         self.save_running = False
@@ -221,7 +1430,7 @@ class DatabaseManager(GObject.Object):
 
     def add_to_history(self) -> None:
         # Add database uri to history.
-        uri = Gio.File.new_for_path(self._path).get_uri()
+        uri = self._gfile.get_uri()
         uri_list = config.get_last_opened_list()
 
         if uri in uri_list:
@@ -249,32 +1458,30 @@ class DatabaseManager(GObject.Object):
 
         config.set_last_used_composite_key(new_pairs)
 
-    def _update_file_monitor(self):
+    def _update_file_monitor(self, info: Gio.FileInfo | None = None) -> None:
         """Updates the modified time and size of the database file, this is a
-        blocking operation."""
-        gfile = Gio.File.new_for_path(self._path)
-        attributes = (
-            f"{Gio.FILE_ATTRIBUTE_STANDARD_SIZE},{Gio.FILE_ATTRIBUTE_TIME_MODIFIED}"
-        )
-        try:
-            info = gfile.query_info(attributes, Gio.FileQueryInfoFlags.NONE, None)
-        except GLib.Error as err:
-            logging.error("Could not read file size: %s", err.message)
-        else:
-            self.file_size = info.get_size()
-            self.file_mtime = info.get_modification_date_time().to_unix()
+        blocking operation unless the info of the file is given."""
+        if info is None:
+            try:
+                info = self._gfile.query_info(
+                    FILE_MONITOR_ATTRIBUTES, Gio.FileQueryInfoFlags.NONE, None
+                )
+            except GLib.Error as err:
+                logging.error("Could not read file size: %s", err.message)
+                return
+
+        self.file_size = info.get_size()
+        self.file_mtime = info.get_modification_date_time().to_unix()
 
     def check_file_changes_async(self, callback: Gio.AsyncReadyCallback) -> None:
         task = Gio.Task.new(self, None, callback)
-        task.run_in_thread(self._check_file_changes_task)
+        run_in_scheduler(task, self._check_file_changes_task, Priority.SAVE)
 
     def _check_file_changes_task(self, task, _obj, _data, _cancellable):
-        gfile = Gio.File.new_for_path(self._path)
-        attributes = (
-            f"{Gio.FILE_ATTRIBUTE_STANDARD_SIZE},{Gio.FILE_ATTRIBUTE_TIME_MODIFIED}"
-        )
         try:
-            info = gfile.query_info(attributes, Gio.FileQueryInfoFlags.NONE, None)
+            info = self._gfile.query_info(
+                FILE_MONITOR_ATTRIBUTES, Gio.FileQueryInfoFlags.NONE, None
+            )
         except GLib.Error as err:
             err = GLib.Error.new_literal(QUARK, str(err), 3)
             task.return_error(err)
@@ -351,12 +1558,20 @@ class DatabaseManager(GObject.Object):
 
     def parent_checker(self, current_group, moved_group):
         """Returns True if moved_group is an ancestor of current_group"""
-        # recursively invoke ourself until we reach the root group
-        if current_group.is_root_group:
+        # The root group is never considered an ancestor. The parents of the
+        # lxml elements are followed, each step is constant time unlike
+        # pykeepass parentgroup which runs an XPath query.
+        # pylint: disable=protected-access
+        root_element = self.db.root_group._element
+        moved_element = moved_group.element._element
+        if moved_element is root_element:
             return False
-        if current_group.uuid == moved_group.uuid:
+
+        element = current_group.element._element
+        if element is moved_element:
             return True
-        return self.parent_checker(current_group.parentgroup, moved_group)
+
+        return any(parent is moved_element for parent in element.iterancestors())
 
     @property
     def version(self):
@@ -367,6 +1582,10 @@ class DatabaseManager(GObject.Object):
     def opened(self) -> bool:
         return self._opened
 
+    @property
+    def gfile(self) -> Gio.File:
+        return self._gfile
+
     @property
     def path(self) -> str:
         return self._path
@@ -6,12 +6,14 @@ import typing
 from gettext import gettext as _
 
 import validators
-from gi.repository import Gdk, GLib, GObject, Gtk
+from gi.repository import Gdk, Gio, GLib, GObject, Gtk
 
+import gsecrets.config_manager as config
 from gsecrets.attachment_warning_dialog import AttachmentWarningDialog
 from gsecrets.color_widget import ColorEntryRow
 from gsecrets.pathbar import Pathbar
 from gsecrets.safe_element import ICONS
+from gsecrets.utils import read_bytes_async, read_bytes_finish
 from gsecrets.widgets.add_attribute_dialog import AddAttributeDialog
 from gsecrets.widgets.attachment_entry_row import AttachmentEntryRow
 from gsecrets.widgets.attribute_entry_row import AttributeEntryRow
@@ -42,6 +44,7 @@ class EntryPage(Gtk.Box):
     otp_secret_entry_row = Gtk.Template.Child()
     otp_token_row = Gtk.Template.Child()
 
+    notes_detach_button = Gtk.Template.Child()
     notes_preferences_group = Gtk.Template.Child()
     notes_property_value_entry = Gtk.Template.Child()
 
@@ -51,6 +54,8 @@ class EntryPage(Gtk.Box):
 
     attachments_preferences_group = Gtk.Template.Child()
     attachment_list_box = Gtk.Template.Child()
+    attachment_import_box = Gtk.Template.Child()
+    attachment_import_progress_bar = Gtk.Template.Child()
 
     attribute_list_box = Gtk.Template.Child()
     attributes_preferences_group = Gtk.Template.Child()
@@ -80,6 +85,12 @@ class EntryPage(Gtk.Box):
         super().__init__()
 
         self.unlocked_database = u_d
+        self._import_cancellable: Gio.Cancellable | None = None
+        # Files to attach and the entry they are attached to, which is
+        # captured when they are selected.
+        self._import_queue: list[tuple[Gio.File, SafeEntry]] = []
+        self._import_total = 0
+
         self.toggeable_widget_list = [
             self.otp_preferences_group,
             self.notes_preferences_group,
@@ -106,11 +117,34 @@ class EntryPage(Gtk.Box):
         if not safe_entry.history:
             self.action_set_enabled("entry.password_history", False)
 
+        if safe_entry.read_only:
+            self._set_read_only()
+
+    def _set_read_only(self) -> None:
+        for entry_row in (
+            self.title_entry_row,
+            self.url_entry_row,
+            self.otp_secret_entry_row,
+        ):
+            entry_row.props.editable = False
+
+        self.notes_property_value_entry.props.editable = False
+        self.notes_detach_button.props.visible = False
+        self.color_property_bin.props.sensitive = False
+        self.icon_entry_box.props.sensitive = False
+
+        self.action_set_enabled("entry.add_attribute", False)
+        self.action_set_enabled("entry.add_attachment", False)
+        self.action_set_enabled("entry.save_in_history", False)
+
     def do_unroot(self) -> None:  # pylint: disable=arguments-differ
         if self.otp_timer_handler is not None:
             GLib.source_remove(self.otp_timer_handler)
             self.otp_timer_handler = None
 
+        if self._import_cancellable is not None:
+            self._import_cancellable.cancel()
+
         Gtk.Widget.do_unroot(self)
 
     def insert_entry_properties_into_listbox(self, add_all):
@@ -186,7 +220,7 @@ class EntryPage(Gtk.Box):
 
         # Attachments
         for attachment in safe_entry.attachments:
-            self.add_attachment_row(attachment)
+            self.add_attachment_row(safe_entry, attachment)
 
         self.show_row(
             self.attachments_preferences_group, safe_entry.attachments, add_all
@@ -371,25 +405,78 @@ class EntryPage(Gtk.Box):
         self, dialog: Gtk.Dialog, response: Gtk.ResponseType, _dialog: Gtk.Dialog
     ) -> None:
         dialog.destroy()
-        if response == Gtk.ResponseType.ACCEPT:
-            safe_entry: SafeEntry = self.unlocked_database.current_element
+        if response != Gtk.ResponseType.ACCEPT:
+            return
 
-            def callback(gfile, result):
-                try:
-                    gbytes, _stream = gfile.load_bytes_finish(result)
-                except GLib.Error as err:
-                    logging.debug("Could not read attachment: %s", err.message)
-                else:
-                    filename = gfile.get_basename()
-                    data = gbytes.get_data()
-                    new_attachment = safe_entry.add_attachment(data, filename)
-                    self.add_attachment_row(new_attachment)
-
-            for attachment in dialog.get_files():
-                attachment.load_bytes_async(None, callback)
-
-    def add_attachment_row(self, attachment):
         safe_entry: SafeEntry = self.unlocked_database.current_element
+        files = [(gfile, safe_entry) for gfile in dialog.get_files()]
+        if self._import_cancellable is not None:
+            self._import_queue.extend(files)
+            self._import_total += len(files)
+            return
+
+        self._import_queue = files
+        self._import_total = len(files)
+        self._import_cancellable = Gio.Cancellable()
+        self.attachment_import_box.props.visible = True
+        self._import_next_attachment()
+
+    def _import_next_attachment(self) -> None:
+        """Import the selected files one at a time, so that only the contents
+        of one file are held in memory at the same time."""
+        if not self._import_queue or self._import_cancellable.is_cancelled():
+            self._import_queue = []
+            self._import_cancellable = None
+            self.attachment_import_box.props.visible = False
+            return
+
+        gfile, safe_entry = self._import_queue.pop(0)
+        done = self._import_total - len(self._import_queue) - 1
+        self.attachment_import_progress_bar.props.text = gfile.get_basename()
+        self._on_import_progress(done, 0.0)
+
+        read_bytes_async(
+            gfile,
+            config.get_attachment_size_limit(),
+            self._import_cancellable,
+            lambda fraction: self._on_import_progress(done, fraction),
+            lambda gfile, result: self._on_attachment_read(gfile, result, safe_entry),
+        )
+
+    def _on_import_progress(self, done: int, fraction: float) -> None:
+        self.attachment_import_progress_bar.props.fraction = (
+            done + fraction
+        ) / self._import_total
+
+    def _on_attachment_read(
+        self, gfile: Gio.File, result: Gio.AsyncResult, safe_entry: SafeEntry
+    ) -> None:
+        try:
+            data, digest = read_bytes_finish(result)
+        except GLib.Error as err:
+            if err.matches(Gio.io_error_quark(), Gio.IOErrorEnum.MESSAGE_TOO_LARGE):
+                # NOTE: {} is a file name
+                message = _("{} is too large to be attached")
+                self.unlocked_database.window.send_notification(
+                    message.format(gfile.get_basename())
+                )
+            elif not err.matches(Gio.io_error_quark(), Gio.IOErrorEnum.CANCELLED):
+                logging.debug("Could not read attachment: %s", err.message)
+        else:
+            # The page may have been left after the file was read.
+            if not self._import_cancellable.is_cancelled():
+                filename = gfile.get_basename()
+                new_attachment = safe_entry.add_attachment(data, filename, digest)
+                self.add_attachment_row(safe_entry, new_attachment)
+
+        self._import_next_attachment()
+
+    @Gtk.Template.Callback()
+    def on_attachment_import_cancel_clicked(self, _button: Gtk.Button) -> None:
+        if self._import_cancellable is not None:
+            self._import_cancellable.cancel()
+
+    def add_attachment_row(self, safe_entry: SafeEntry, attachment):
         attachment_row = AttachmentEntryRow(safe_entry, attachment)
         self.attachment_list_box.append(attachment_row)
 
@@ -20,6 +20,7 @@ class GroupPage(Gtk.Box):
     _pathbar_bin = Gtk.Template.Child()
 
     title_entry_row = Gtk.Template.Child()
+    notes_detach_button = Gtk.Template.Child()
     notes_text_view = Gtk.Template.Child()
 
     def __init__(self, unlocked_database):
@@ -49,6 +50,11 @@ class GroupPage(Gtk.Box):
             GObject.BindingFlags.SYNC_CREATE | GObject.BindingFlags.BIDIRECTIONAL,
         )
 
+        if safe_group.read_only:
+            self.title_entry_row.props.editable = False
+            self.notes_text_view.props.editable = False
+            self.notes_detach_button.props.visible = False
+
         self._pathbar_bin.bind_property(
             "visible",
             unlocked_database.action_bar,
@@ -0,0 +1,163 @@
+# SPDX-License-Identifier: GPL-3.0-only
+"""Read the unencrypted outer header of KDBX files.
+
+The outer header is stored in plain text before the encrypted payload, it
+can be read without the credentials of the safe.
+"""
+from __future__ import annotations
+
+import struct
+from typing import NamedTuple
+from uuid import UUID
+
+SIGNATURE = (0x9AA2D903, 0xB54BFB67)
+
+# Amount of bytes which are read at a time from the start of a file to parse
+# its header, the header of a safe is typically well under a kilobyte.
+HEADER_READ_SIZE = 8 * 1024
+# Headers are not read further than this.
+MAX_HEADER_SIZE = 1024 * 1024
+
+# The names match the ones used by pykeepass.
+CIPHERS = {
+    UUID("31c1f2e6-bf71-4350-be58-05216afc5aff"): "aes256",
+    UUID("d6038a2b-8b6f-4cb5-a524-339a31dbb59a"): "chacha20",
+    UUID("ad68f29f-576f-4bb9-a36a-d47af965346c"): "twofish",
+}
+
+KDFS = {
+    UUID("ef636ddf-8c29-444b-91f7-a9a403e30a0c"): "argon2",
+    UUID("9e298b19-56db-4773-b23d-fc3ec6f0a1e6"): "argon2id",
+    UUID("c9d9f39a-628a-4460-bf74-0d08c18a4fea"): "aeskdf",
+}
+
+COMPRESSIONS = {0: "none", 1: "gzip"}
+
+_END = 0
+_CIPHER_ID = 2
+_COMPRESSION_FLAGS = 3
+_TRANSFORM_ROUNDS = 6
+_KDF_PARAMETERS = 11
+
+
+class HeaderError(ValueError):
+    """The data is not the start of a supported KDBX file."""
+
+
+class TruncatedHeaderError(HeaderError):
+    """The data ends before the end of the header, more data is needed."""
+
+
+class KdbxHeader(NamedTuple):
+    # pylint: disable=inherit-non-class
+    version: tuple[int, int]
+    cipher: str
+    kdf: str
+    compression: str = "unknown"
+    # Argon2 parameters, memory is in bytes.
+    memory: int | None = None
+    iterations: int | None = None
+    parallelism: int | None = None
+    # AES-KDF parameters.
+    rounds: int | None = None
+
+
+def _fields(data: bytes, offset: int, length_format: str):
+    """Yields the (id, value) pairs of the header fields."""
+    length_size = struct.calcsize(length_format)
+    while True:
+        if offset + 1 + length_size > len(data):
+            raise TruncatedHeaderError("Truncated header")
+
+        field_id = data[offset]
+        (length,) = struct.unpack_from(length_format, data, offset + 1)
+        offset += 1 + length_size
+        if offset + length > len(data):
+            raise TruncatedHeaderError("Truncated header")
+
+        if field_id == _END:
+            return
+
+        yield field_id, data[offset:offset + length]
+        offset += length
+
+
+def _variant_dictionary(data: bytes) -> dict[str, bytes]:
+    """Raw values of a KDBX 4 variant dictionary."""
+    items = {}
+    offset = 2  # Version
+    while offset < len(data):
+        value_type = data[offset]
+        if value_type == 0:
+            break
+
+        (key_length,) = struct.unpack_from("<I", data, offset + 1)
+        offset += 5
+        key = data[offset:offset + key_length].decode("utf-8", "replace")
+        offset += key_length
+        (value_length,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        items[key] = data[offset:offset + value_length]
+        offset += value_length
+
+    return items
+
+
+def _uint(value: bytes) -> int | None:
+    if len(value) not in (4, 8):
+        return None
+
+    return int.from_bytes(value, "little")
+
+
+def parse_header(data: bytes) -> KdbxHeader:
+    """Parses the outer header at the start of data.
+
+    :param bytes data: start of a KDBX file
+    :returns: the header
+    :raises TruncatedHeaderError: if data ends before the end of the header
+    :raises HeaderError: if data does not start with a valid header
+    """
+    if len(data) < 12:
+        raise TruncatedHeaderError("Truncated header")
+
+    sig1, sig2, minor, major = struct.unpack_from("<IIHH", data)
+    if (sig1, sig2) != SIGNATURE:
+        raise HeaderError("Not a KDBX file")
+
+    if major not in (3, 4):
+        raise HeaderError(f"Unsupported KDBX version {major}.{minor}")
+
+    cipher = "unknown"
+    kdf = "aeskdf" if major == 3 else "unknown"
+    compression = "unknown"
+    parameters: dict[str, bytes] = {}
+    try:
+        for field_id, value in _fields(data, 12, "<I" if major == 4 else "<H"):
+            if field_id == _CIPHER_ID and len(value) == 16:
+                cipher = CIPHERS.get(UUID(bytes=value), "unknown")
+            elif field_id == _COMPRESSION_FLAGS and len(value) == 4:
+                compression = COMPRESSIONS.get(_uint(value), "unknown")
+            elif field_id == _TRANSFORM_ROUNDS:
+                parameters["R"] = value
+            elif field_id == _KDF_PARAMETERS:
+                parameters = _variant_dictionary(value)
+                kdf_uuid = parameters.get("$UUID", b"")
+                if len(kdf_uuid) == 16:
+                    kdf = KDFS.get(UUID(bytes=kdf_uuid), "unknown")
+    except struct.error as err:
+        raise HeaderError("Malformed header") from err
+
+    def parameter(key):
+        return _uint(parameters[key]) if key in parameters else None
+
+    return KdbxHeader(
+        (major, minor),
+        cipher,
+        kdf,
+        compression,
+        parameter("M"),
+        parameter("I"),
+        parameter("P"),
+        parameter("R"),
+    )
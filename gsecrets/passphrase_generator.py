@@ -2,11 +2,66 @@
 """Generate a passphrase from a list of predefined words."""
 from __future__ import annotations
 
-import logging
 from secrets import randbelow
 
 from gi.repository import Gio, GLib, GObject
 
+WORD_LIST_PATH = "/org/gnome/World/Secrets/crypto/eff_large_wordlist.txt"
+
+_word_list: list[str] | None = None
+
+
+def get_word_list() -> list[str]:
+    """The list of words used for passphrases.
+
+    The list is parsed the first time it is needed and kept for the lifetime
+    of the application.
+    """
+    global _word_list  # pylint: disable=global-statement
+
+    if _word_list is None:
+        gbytes = Gio.resources_lookup_data(
+            WORD_LIST_PATH, Gio.ResourceLookupFlags.NONE
+        )
+        _word_list = gbytes.get_data().decode("utf-8").split()
+
+    return _word_list
+
+
+def preload_word_list() -> bool:
+    """Parse the word list, to be used as an idle callback."""
+    get_word_list()
+    return GLib.SOURCE_REMOVE
+
+
+def generate_passphrases(
+    count: int, num_words: int, separator: str = "-"
+) -> list[str]:
+    """Generate several passphrases at once.
+
+    :param int count: number of passphrases requested
+    :param int num_words: number of words of each passphrase
+    :param str separator: separator
+    :returns: list of passphrases
+    """
+    word_list = get_word_list()
+    len_words = len(word_list)
+
+    return [
+        separator.join(word_list[randbelow(len_words)] for _ in range(num_words))
+        for _ in range(count)
+    ]
+
+
+def generate_passphrase(num_words: int, separator: str = "-") -> str:
+    """Generate a passphrase.
+
+    :param int num_words: number of words requested
+    :param str separator: separator
+    :returns: passphrase
+    """
+    return generate_passphrases(1, num_words, separator)[0]
+
 
 class Passphrase(GObject.Object):
     """Generate a passphrase from a list of predefined words."""
@@ -17,25 +72,7 @@ class Passphrase(GObject.Object):
         :param int num_words: number of words requested
         :param str separator: separator
         """
-        word_file: Gio.File = Gio.File.new_for_uri(
-            "resource:///org/gnome/World/Secrets/crypto/eff_large_wordlist.txt"
-        )
-
-        def callback(gfile, result):
-            try:
-                gbytes, _ = gfile.load_bytes_finish(result)
-            except GLib.Error as err:
-                logging.debug("Could not read word file: %s", err.message)
-            else:
-                word_str: str = gbytes.get_data().decode("utf-8")
-                word_list: list[str] = word_str.split("\n")
-                len_words: int = len(word_list)
-
-                words = [word_list[randbelow(len_words)] for _ in range(0, num_words)]
-                passphrase: str = separator.join(words) or ""
-                self.emit("generated", passphrase)
-
-        word_file.load_bytes_async(None, callback)
+        self.emit("generated", generate_passphrase(num_words, separator))
 
     @GObject.Signal(arg_types=(str,))
     def generated(self, _passphrase):
@@ -0,0 +1,215 @@
+# SPDX-License-Identifier: GPL-3.0-only
+"""Audit the health of the passwords of a safe."""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import typing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+from gi.repository import Gio, GLib, GObject
+
+from gsecrets.breach_check import BreachChecker, sha1_hex
+from gsecrets.password_generator import strength
+from gsecrets.scheduler import Priority
+from gsecrets.utils import run_in_scheduler
+
+if typing.TYPE_CHECKING:
+    from uuid import UUID
+
+    from gsecrets.database_manager import DatabaseManager
+    from gsecrets.safe_element import SafeEntry
+
+QUARK = GLib.quark_from_string("secrets")
+
+# Passwords with a lower score are considered weak.
+WEAK_SCORE = 2
+
+# Below this many passwords it is not worth starting a process pool.
+POOL_THRESHOLD = 64
+
+# Passwords modified longer ago than this are reported as old.
+OLD_PASSWORD_AGE = timedelta(days=365)
+
+
+class AuditReport(NamedTuple):
+    # pylint: disable=inherit-non-class
+    weak: list[SafeEntry]
+    reused: list[SafeEntry]
+    old: list[SafeEntry]
+    expired: list[SafeEntry]
+
+
+def _score_passwords(passwords: list[str]) -> list[int]:
+    if len(passwords) < POOL_THRESHOLD:
+        return [strength(password) for password in passwords]
+
+    workers = os.cpu_count() or 1
+    chunksize = max(1, len(passwords) // (workers * 4))
+    # Forking a process with running threads is unsafe, the workers are
+    # started by a clean server process instead.
+    context = multiprocessing.get_context("forkserver")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        return list(executor.map(strength, passwords, chunksize=chunksize))
+
+
+def _build_report(
+    snapshot: list[tuple[SafeEntry, bytes]],
+    scores: dict[UUID, tuple[bytes, int]],
+    max_age: timedelta,
+    now: datetime,
+) -> AuditReport:
+    """Groups the audited entries by the problems of their password.
+
+    :param snapshot: the audited entries with the hash of their password
+    :param scores: the hash and the score of the passwords, by entry
+    """
+    usage = Counter(digest for _safe_entry, digest in snapshot)
+    report = AuditReport([], [], [], [])
+
+    for safe_entry, digest in snapshot:
+        cached = scores.get(safe_entry.uuid)
+        if cached is not None and cached[0] == digest:
+            if cached[1] < WEAK_SCORE:
+                report.weak.append(safe_entry)
+
+        if usage[digest] > 1:
+            report.reused.append(safe_entry)
+
+        mtime = safe_entry.entry.mtime
+        if mtime is not None and now - mtime > max_age:
+            report.old.append(safe_entry)
+
+        if safe_entry.props.expired:
+            report.expired.append(safe_entry)
+
+    return report
+
+
+class PasswordAudit(GObject.Object):
+    """Reports weak, reused, old and expired passwords of a safe.
+
+    Scores are cached per entry, an audit only scores the entries whose
+    password changed since the previous one. Passwords are compared through
+    the keyed hashes of DatabaseManager.password_hash.
+    """
+
+    def __init__(self, db_manager: DatabaseManager) -> None:
+        super().__init__()
+
+        self._db_manager = db_manager
+
+        # Maps entries to the keyed hash and score of their password.
+        self._scores: dict[UUID, tuple[bytes, int]] = {}
+        self._watched: set[UUID] = set()
+        self._breach_checker: BreachChecker | None = None
+
+    def _on_entry_updated(self, safe_entry: SafeEntry) -> None:
+        uuid = safe_entry.uuid
+        digest = self._db_manager.password_hash(safe_entry.props.password)
+        cached = self._scores.get(uuid)
+        if cached is not None and cached[0] != digest:
+            del self._scores[uuid]
+
+    def _audited_entries(self) -> list[SafeEntry]:
+        in_trash_bin = self._db_manager.in_trash_bin
+        return [
+            safe_entry
+            for safe_entry in self._db_manager.entries
+            if safe_entry.props.password and not in_trash_bin(safe_entry)
+        ]
+
+    def audit_async(
+        self, max_age: timedelta, callback: Gio.AsyncReadyCallback
+    ) -> None:
+        """Audits the passwords of all the entries outside of the trash bin.
+
+        Entries whose password was modified more than max_age ago are
+        reported as old.
+        """
+        snapshot = []
+        pending = []
+        for safe_entry in self._audited_entries():
+            password = safe_entry.props.password
+            digest = self._db_manager.password_hash(password)
+            snapshot.append((safe_entry, digest))
+
+            uuid = safe_entry.uuid
+            cached = self._scores.get(uuid)
+            if cached is None or cached[0] != digest:
+                pending.append((uuid, digest, password))
+
+            if uuid not in self._watched:
+                self._watched.add(uuid)
+                safe_entry.connect("updated", self._on_entry_updated)
+
+        def audit_task(task, _obj, _data, _cancellable):
+            try:
+                scores = _score_passwords([password for *_, password in pending])
+            except Exception as err:  # pylint: disable=broad-except
+                task.return_error(GLib.Error.new_literal(QUARK, str(err), 5))
+            else:
+                new_scores = {
+                    uuid: (digest, score)
+                    for (uuid, digest, _password), score in zip(pending, scores)
+                }
+                task.return_value((snapshot, new_scores, max_age))
+
+        task = Gio.Task.new(self, None, callback)
+        run_in_scheduler(task, audit_task, Priority.STATS)
+
+    def audit_finish(self, result: Gio.AsyncResult) -> AuditReport:
+        """Finishes audit_async, returns the report of the audit.
+        Can raise GLib.Error."""
+        _success, (snapshot, new_scores, max_age) = result.propagate_value()
+        self._scores.update(new_scores)
+
+        return _build_report(
+            snapshot, self._scores, max_age, datetime.now(timezone.utc)
+        )
+
+    def check_breaches_async(
+        self, directory: str, callback: Gio.AsyncReadyCallback
+    ) -> None:
+        """Looks up the passwords of all the entries outside of the trash bin
+        in a local directory of Have I Been Pwned range files."""
+        if (
+            self._breach_checker is None
+            or self._breach_checker.directory != directory
+        ):
+            self._breach_checker = BreachChecker(directory)
+
+        checker = self._breach_checker
+        snapshot = [
+            (safe_entry, sha1_hex(safe_entry.props.password))
+            for safe_entry in self._audited_entries()
+        ]
+
+        def check_task(task, _obj, _data, _cancellable):
+            try:
+                counts = checker.check(sha1 for _safe_entry, sha1 in snapshot)
+            except (OSError, ValueError) as err:
+                # ValueError is raised by malformed range files.
+                task.return_error(GLib.Error.new_literal(QUARK, str(err), 5))
+            else:
+                task.return_value(
+                    [
+                        (safe_entry, counts[sha1])
+                        for safe_entry, sha1 in snapshot
+                        if counts[sha1]
+                    ]
+                )
+
+        task = Gio.Task.new(self, None, callback)
+        run_in_scheduler(task, check_task, Priority.STATS)
+
+    def check_breaches_finish(
+        self, result: Gio.AsyncResult
+    ) -> list[tuple[SafeEntry, int]]:
+        """Finishes check_breaches_async, returns the breached entries and the
+        number of times their password was seen. Can raise GLib.Error."""
+        _success, breached = result.propagate_value()
+        return breached
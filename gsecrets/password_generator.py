@@ -1,12 +1,188 @@
 # SPDX-License-Identifier: GPL-3.0-only
 from __future__ import annotations
 
+import hashlib
+import logging
 import secrets
 import string
+import typing
+from collections import OrderedDict
+from typing import NamedTuple
 
-from gi.repository import Gio
+from gi.repository import Gio, GLib, GObject
 from zxcvbn import zxcvbn
 
+from gsecrets.scheduler import Priority
+from gsecrets.utils import get_scheduler
+
+if typing.TYPE_CHECKING:
+    from typing import Callable
+
+# Characters which are easily mistaken for one another.
+AMBIGUOUS_CHARACTERS = "0O1Il|`'\""
+
+# zxcvbn's running time grows faster than linearly with the length of the
+# password, only this many characters are evaluated.
+STRENGTH_MAX_LENGTH = 100
+STRENGTH_CACHE_SIZE = 256
+
+# Passwords are only kept in the cache as keyed hashes, the key is different
+# for every session.
+_strength_key = secrets.token_bytes(32)
+_strength_cache: OrderedDict[bytes, int] = OrderedDict()
+
+
+class PasswordPolicy(NamedTuple):
+    """Constraints for generated passwords.
+
+    Characters of a class are only used if the class is enabled, and at least
+    its minimum amount of them are present in the password. Characters in
+    exclude, and the ambiguous ones if exclude_ambiguous is set, are never
+    used. If no class is enabled all of them are used, without minimums.
+    """
+
+    # pylint: disable=inherit-non-class
+    length: int
+    use_uppercase: bool = True
+    use_lowercase: bool = True
+    use_numbers: bool = True
+    use_symbols: bool = True
+    min_uppercase: int = 0
+    min_lowercase: int = 0
+    min_numbers: int = 0
+    min_symbols: int = 0
+    exclude: str = ""
+    exclude_ambiguous: bool = False
+
+
+def _policy_classes(policy: PasswordPolicy) -> list[tuple[str, int]]:
+    """The characters of every enabled class and their minimum amount."""
+    excluded = set(policy.exclude)
+    if policy.exclude_ambiguous:
+        excluded.update(AMBIGUOUS_CHARACTERS)
+
+    classes = [
+        (string.ascii_uppercase, policy.use_uppercase, policy.min_uppercase),
+        (string.ascii_lowercase, policy.use_lowercase, policy.min_lowercase),
+        (string.digits, policy.use_numbers, policy.min_numbers),
+        (string.punctuation, policy.use_symbols, policy.min_symbols),
+    ]
+    if not any(used for _chars, used, _minimum in classes):
+        classes = [(chars, True, 0) for chars, _used, _minimum in classes]
+
+    result = []
+    for chars, used, minimum in classes:
+        if not used:
+            continue
+
+        chars = "".join(char for char in chars if char not in excluded)
+        if chars:
+            result.append((chars, minimum))
+        elif minimum:
+            raise ValueError("A required character class is fully excluded")
+
+    if not result:
+        raise ValueError("All the characters are excluded")
+
+    if sum(minimum for _chars, minimum in result) > policy.length:
+        raise ValueError("The password is too short for the required characters")
+
+    return result
+
+
+def _random_characters(characters: str, amount: int) -> str:
+    """Draw amount characters uniformly from characters.
+
+    Random bytes are mapped to characters with a translation table, bytes
+    above the largest multiple of the number of characters are rejected so
+    that every character is equally likely.
+    """
+    n_chars = len(characters)
+    limit = 256 - 256 % n_chars
+    table = bytes(ord(characters[i % n_chars]) if i < limit else 0 for i in range(256))
+    rejected = bytes(range(limit, 256))
+
+    result = b""
+    while len(result) < amount:
+        missing = amount - len(result)
+        # Draw slightly more than the expected amount of needed bytes, so that
+        # there is rarely a second draw.
+        draw = secrets.token_bytes(missing * 256 // limit + 16)
+        result += draw.translate(table, rejected)
+
+    return result[:amount].decode("ascii")
+
+
+def generate_with_policy(policy: PasswordPolicy, count: int = 1) -> list[str]:
+    """Generate passwords which comply with a policy.
+
+    The required characters of every class are drawn first, the rest of the
+    password is drawn from all the enabled classes and the result is shuffled.
+    Every password is compliant, there is no need to retry.
+
+    :param PasswordPolicy policy: constraints of the passwords
+    :param int count: number of passwords
+    :returns: list of passwords
+    :raises ValueError: if no password can satisfy the policy
+    """
+    classes = _policy_classes(policy)
+    rest = policy.length - sum(minimum for _chars, minimum in classes)
+    everything = "".join(chars for chars, _minimum in classes)
+
+    parts = [
+        (_random_characters(chars, minimum * count), minimum)
+        for chars, minimum in classes
+        if minimum
+    ]
+    parts.append((_random_characters(everything, rest * count), rest))
+
+    shuffler = secrets.SystemRandom()
+    passwords = []
+    for i in range(count):
+        password = []
+        for chars, amount in parts:
+            password.extend(chars[i * amount:(i + 1) * amount])
+
+        shuffler.shuffle(password)
+        passwords.append("".join(password))
+
+    return passwords
+
+
+def generate_batch(
+    count: int,
+    length: int,
+    use_uppercase: bool,
+    use_lowercase: bool,
+    use_numbers: bool,
+    use_symbols: bool,
+    exclude_ambiguous: bool = False,
+) -> list[str]:
+    """Generate several passwords at once.
+
+    Every enabled class of characters is present in the passwords, as long as
+    they are long enough.
+
+    :param int count: number of passwords
+    :param int length: password number of characters
+    :param bool use_uppercase: password must contain uppercase letters
+    :param bool use_lowercase: password must contain low letters
+    :param bool use_numbers: password must contain digits
+    :param bool use_symbols: password must contain special characters
+    :param bool exclude_ambiguous: do not use easily confused characters
+    :returns: list of passwords
+    """
+    uses = (use_uppercase, use_lowercase, use_numbers, use_symbols)
+    minimum = 1 if length >= sum(uses) else 0
+    policy = PasswordPolicy(
+        max(length, 0),
+        *uses,
+        *(minimum if use else 0 for use in uses),
+        exclude_ambiguous=exclude_ambiguous,
+    )
+
+    return generate_with_policy(policy, count)
+
 
 def generate(
     length: int,
@@ -14,6 +190,7 @@ def generate(
     use_lowercase: bool,
     use_numbers: bool,
     use_symbols: bool,
+    exclude_ambiguous: bool = False,
 ) -> str:
     """Generate a password based on some criteria.
 
@@ -22,57 +199,116 @@ def generate(
     :param bool low_letter: password must contain low letters
     :param bool numbers: password must contain digits
     :param bool special: password must contain special characters
+    :param bool exclude_ambiguous: do not use easily confused characters
     :returns: a password
     :rtype: str
     """
-    characters: str = ""
-
-    if use_uppercase:
-        characters += string.ascii_uppercase
-
-    if use_lowercase:
-        characters += string.ascii_lowercase
-
-    if use_numbers:
-        characters += string.digits
-
-    if use_symbols:
-        characters += string.punctuation
-
-    # If all options are disabled, generate a password using
-    # arbitrary ASCII characters.
-    # TODO Revisit this. It might be a sane default, but
-    # it is highly un-intuitive.
-    if characters == "":
-        characters = (
-            string.ascii_uppercase
-            + string.ascii_lowercase
-            + string.digits
-            + string.punctuation
-        )
-
-    return "".join([secrets.choice(characters) for _ in range(0, length)])
+    return generate_batch(
+        1,
+        length,
+        use_uppercase,
+        use_lowercase,
+        use_numbers,
+        use_symbols,
+        exclude_ambiguous,
+    )[0]
 
 
 def strength(password: str) -> int:
     """Get strength of a password between 0 and 4.
 
-    The higher the score is, the more secure the password is.
+    The higher the score is, the more secure the password is. Only the first
+    STRENGTH_MAX_LENGTH characters are evaluated.
 
     :param str password: password to test
     :returns: strength of password
     :rtype: int
     """
     if password:
-        return zxcvbn(password)["score"]
+        return zxcvbn(password[:STRENGTH_MAX_LENGTH])["score"]
 
     return 0
 
 
-def strength_async(password, callback):
-    def cb_wrapper(future):
-        callback(future.result())
+def _strength_cache_key(password: str) -> bytes:
+    return hashlib.blake2b(
+        password[:STRENGTH_MAX_LENGTH].encode("utf-8"),
+        key=_strength_key,
+        digest_size=16,
+    ).digest()
+
+
+def strength_async(
+    password: str,
+    callback: Callable[[int], None],
+    cancellable: Gio.Cancellable | None = None,
+) -> None:
+    """Compute the strength of password in the application executor.
+
+    The computation is submitted to the application scheduler, which hands
+    it over to the executor without waiting for it. Recent results are
+    cached. The callback is always invoked in the main loop, and not at all
+    if cancellable is cancelled before the result is delivered. Cancelling
+    also drops the computation if it did not start yet, so that superseded
+    requests do not queue up.
+    """
+    key = _strength_cache_key(password)
+
+    if (score := _strength_cache.get(key)) is not None:
+        _strength_cache.move_to_end(key)
+
+        def deliver_cached():
+            if cancellable is None or not cancellable.is_cancelled():
+                callback(score)
+
+            return GLib.SOURCE_REMOVE
+
+        GLib.idle_add(deliver_cached)
+        return
+
+    future = None
+
+    def deliver(score):
+        if cancellable is not None:
+            GObject.Object.disconnect(cancellable, handler_id)
+
+        if score is None:
+            return GLib.SOURCE_REMOVE
+
+        _strength_cache[key] = score
+        if len(_strength_cache) > STRENGTH_CACHE_SIZE:
+            _strength_cache.popitem(last=False)
+
+        if cancellable is None or not cancellable.is_cancelled():
+            callback(score)
+
+        return GLib.SOURCE_REMOVE
+
+    def on_done(done_future):
+        score = None
+        if not done_future.cancelled():
+            try:
+                score = done_future.result()
+            except Exception as err:  # pylint: disable=broad-except
+                logging.warning("Could not compute password strength: %s", err)
+
+        GLib.idle_add(deliver, score)
 
     executor = Gio.Application.get_default().executor
-    future = executor.submit(strength, password)
-    future.add_done_callback(cb_wrapper)
+
+    def strength_job():
+        nonlocal future
+        future = executor.submit(strength, password)
+        future.add_done_callback(on_done)
+
+    def on_cancelled(_cancellable):
+        if not job.cancel() and future is not None:
+            future.cancel()
+
+    job = get_scheduler().submit(
+        strength_job,
+        Priority.STRENGTH,
+        on_cancelled=lambda: GLib.idle_add(deliver, None),
+    )
+    if cancellable is not None:
+        handler_id = GObject.Object.connect(cancellable, "cancelled", on_cancelled)
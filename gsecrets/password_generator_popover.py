@@ -6,7 +6,7 @@ from gettext import gettext as _
 from gi.repository import GObject, Gtk
 
 import gsecrets.config_manager as config
-from gsecrets.passphrase_generator import Passphrase
+from gsecrets.passphrase_generator import generate_passphrase
 from gsecrets.password_generator import generate as generate_pwd
 
 
@@ -101,19 +101,19 @@ class PasswordGeneratorPopover(Gtk.Popover):
 
             length: int = self._digit_spin_button.get_value_as_int()
             pass_text: str = generate_pwd(
-                length, use_uppercase, use_lowercase, use_numbers, use_symbols
+                length,
+                use_uppercase,
+                use_lowercase,
+                use_numbers,
+                use_symbols,
+                config.get_generator_exclude_ambiguous(),
             )
             self.emit("generated", pass_text)
         else:
             separator: str = self._separator_entry.props.text
             words: int = self._words_spin_button.get_value_as_int()
-            passphrase_generator = Passphrase()
-            passphrase_generator.connect("generated", self.on_passphrase_generated)
-            passphrase_generator.generate(words, separator)
+            self.emit("generated", generate_passphrase(words, separator))
 
     @GObject.Signal(arg_types=(str,))
     def generated(self, _password):
         return
-
-    def on_passphrase_generated(self, _passphrase_gen, passphrase):
-        self.emit("generated", passphrase)
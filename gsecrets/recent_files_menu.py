@@ -1,37 +1,233 @@
 # SPDX-License-Identifier: GPL-3.0-only
 from __future__ import annotations
 
+import json
 import logging
 import os
 from gettext import gettext as _
+from typing import NamedTuple
 
-from gi.repository import Gio
+from gi.repository import Gio, GLib, GObject
 
 import gsecrets.config_manager as config
+from gsecrets import const
+from gsecrets.utils import (
+    format_cipher,
+    format_kdf,
+    read_kdbx_header_async,
+    read_kdbx_header_finish,
+)
 
+CACHE_FILENAME = "recent-files.json"
+QUERY_ATTRIBUTES = "standard::type,standard::size,time::modified"
 
-class RecentFilesMenu:
-    def __init__(self):
-        """Recently opened files page menu
 
-        The `menu` attribute contains a GMenuModel to be used on popovers.
-        """
+class RecentFile(NamedTuple):
+    # pylint: disable=inherit-non-class
+    size: int
+    mtime: int
+    cipher: str
+    kdf: str
+    keyfile: bool
+
+
+class RecentFilesMenu(GObject.Object):
+    """Recently opened files page menu
+
+    The `menu` attribute contains a GMenuModel to be used on popovers. The
+    menu is filled right away from the settings, the files are then queried
+    in the background and the ones which do not exist anymore are removed
+    from it.
+
+    The size, modification time and header of the files are kept in a small
+    cache, headers are only read again when a file changed. Once known, the
+    algorithms of a file and whether it uses a key file are shown in its item.
+    """
+
+    is_empty = GObject.Property(type=bool, default=True)
+
+    def __init__(self):
+        super().__init__()
 
         self.menu = Gio.Menu.new()
         self.section = Gio.Menu.new()
-        self.is_empty = True
 
-        for path_uri in reversed(config.get_last_opened_list()):
-            gfile: Gio.File = Gio.File.new_for_uri(path_uri)
-            # TODO Remove the file from config if it does not exist.
-            if not gfile.query_exists():
-                logging.info("Ignoring nonexistent recent file: %s", gfile.get_path())
-                continue  # only work with existing files
+        self._cancellable = Gio.Cancellable()
+        self._metadata: dict[str, RecentFile] = {}
+        self._cache_changed = False
+        self._pending = 0
 
-            basename = os.path.splitext(gfile.get_basename())[0]
-            path = gfile.get_path()
-            self.section.append(basename, f"win.open_database::{path}")
-            self.is_empty = False
+        # The uris of the items of the section, in the same order.
+        self._uris: list[str] = []
+        for uri in reversed(config.get_last_opened_list()):
+            self.section.append_item(self._menu_item(uri))
+            self._uris.append(uri)
 
+        self.props.is_empty = not self._uris
         self.menu.append_section(_("Recent Files"), self.section)
-        self.menu.freeze()
+
+        cache_path = os.path.join(
+            GLib.get_user_cache_dir(), const.SHORT_NAME, CACHE_FILENAME
+        )
+        self._cache_file = Gio.File.new_for_path(cache_path)
+        self._cache_file.load_contents_async(self._cancellable, self._on_cache_loaded)
+
+    def cancel(self) -> None:
+        """Stops querying the files, to be called when the menu is dropped."""
+        self._cancellable.cancel()
+
+    def get_metadata(self, uri: str) -> RecentFile | None:
+        """The cached metadata of a recent file, if known."""
+        return self._metadata.get(uri)
+
+    def _menu_item(self, uri: str) -> Gio.MenuItem:
+        gfile = Gio.File.new_for_uri(uri)
+        basename = os.path.splitext(gfile.get_basename())[0]
+        path = gfile.get_path()
+
+        label = basename
+        if (metadata := self._metadata.get(uri)) is not None:
+            cipher = format_cipher(metadata.cipher)
+            kdf = format_kdf(metadata.kdf)
+            if metadata.keyfile:
+                # NOTE: A recent file, its encryption and key derivation
+                # algorithms, e.g. "Passwords (AES 256-bit, Argon2, key file)"
+                label = _("{name} ({cipher}, {kdf}, key file)")
+            else:
+                # NOTE: A recent file, its encryption and key derivation
+                # algorithms, e.g. "Passwords (AES 256-bit, Argon2)"
+                label = _("{name} ({cipher}, {kdf})")
+            label = label.format(name=basename, cipher=cipher, kdf=kdf)
+
+        return Gio.MenuItem.new(label, f"win.open_database::{path}")
+
+    def _update(self, uri: str) -> None:
+        """Shows the current metadata of a file in its item."""
+        index = self._uris.index(uri)
+        self.section.remove(index)
+        self.section.insert_item(index, self._menu_item(uri))
+
+    def _remove(self, uri: str) -> None:
+        index = self._uris.index(uri)
+        self.section.remove(index)
+        del self._uris[index]
+        if not self._uris:
+            self.props.is_empty = True
+
+    def _on_cache_loaded(self, gfile, result):
+        try:
+            _success, contents, _etag = gfile.load_contents_finish(result)
+            for uri, values in json.loads(contents.decode("utf-8")).items():
+                self._metadata[uri] = RecentFile(*values)
+
+            for uri in self._uris:
+                if uri in self._metadata:
+                    self._update(uri)
+        except GLib.Error as err:
+            if err.matches(Gio.io_error_quark(), Gio.IOErrorEnum.CANCELLED):
+                return
+
+            if not err.matches(Gio.io_error_quark(), Gio.IOErrorEnum.NOT_FOUND):
+                logging.warning("Could not load recent files cache: %s", err.message)
+        except (ValueError, TypeError) as err:
+            logging.warning("Could not parse recent files cache: %s", err)
+            self._metadata.clear()
+
+        keyfile_uris = {pair[0] for pair in config.get_last_used_composite_key()}
+        uris = list(self._uris)
+        self._pending = len(uris)
+        for uri in uris:
+            Gio.File.new_for_uri(uri).query_info_async(
+                QUERY_ATTRIBUTES,
+                Gio.FileQueryInfoFlags.NONE,
+                GLib.PRIORITY_LOW,
+                self._cancellable,
+                self._on_query_info,
+                (uri, uri in keyfile_uris),
+            )
+
+    def _on_query_info(self, gfile, result, data):
+        uri, keyfile = data
+        try:
+            info = gfile.query_info_finish(result)
+        except GLib.Error as err:
+            if err.matches(Gio.io_error_quark(), Gio.IOErrorEnum.CANCELLED):
+                return
+
+            # TODO Remove the file from config if it does not exist.
+            logging.info("Ignoring nonexistent recent file: %s", gfile.get_path())
+            self._remove(uri)
+            self._file_done()
+            return
+
+        size = info.get_size()
+        modified = info.get_modification_date_time()
+        mtime = modified.to_unix() if modified is not None else 0
+
+        cached = self._metadata.get(uri)
+        if cached is not None and (cached.size, cached.mtime) == (size, mtime):
+            if cached.keyfile != keyfile:
+                self._metadata[uri] = cached._replace(keyfile=keyfile)
+                self._cache_changed = True
+                self._update(uri)
+
+            self._file_done()
+            return
+
+        def on_header(gfile, result):
+            try:
+                header = read_kdbx_header_finish(result)
+            except GLib.Error as err:
+                if err.matches(Gio.io_error_quark(), Gio.IOErrorEnum.CANCELLED):
+                    return
+
+                if err.matches(Gio.io_error_quark(), Gio.IOErrorEnum.INVALID_DATA):
+                    logging.info("Ignoring invalid recent file: %s", gfile.get_path())
+                    self._remove(uri)
+                else:
+                    logging.debug("Could not read header: %s", err.message)
+            else:
+                self._metadata[uri] = RecentFile(
+                    size, mtime, header.cipher, header.kdf, keyfile
+                )
+                self._cache_changed = True
+                self._update(uri)
+
+            self._file_done()
+
+        read_kdbx_header_async(gfile, self._cancellable, on_header)
+
+    def _file_done(self) -> None:
+        self._pending -= 1
+        if self._pending == 0:
+            self._save_cache()
+
+    def _save_cache(self) -> None:
+        stale = self._metadata.keys() - set(self._uris)
+        if not self._cache_changed and not stale:
+            return
+
+        metadata = {
+            uri: list(self._metadata[uri])
+            for uri in self._uris
+            if uri in self._metadata
+        }
+        cache_dir = self._cache_file.get_parent().get_path()
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+        def callback(gfile, result):
+            try:
+                gfile.replace_contents_finish(result)
+            except GLib.Error as err:
+                logging.warning("Could not save recent files cache: %s", err.message)
+
+        contents = GLib.Bytes.new(json.dumps(metadata).encode("utf-8"))
+        self._cache_file.replace_contents_bytes_async(
+            contents,
+            None,
+            False,
+            Gio.FileCreateFlags.PRIVATE,
+            self._cancellable,
+            callback,
+        )
@@ -12,6 +12,7 @@ from typing import NamedTuple
 from uuid import UUID
 
 from gi.repository import GLib, GObject, Gio, Gtk
+from lxml import etree
 from pyotp import OTP, TOTP, parse_uri
 
 if typing.TYPE_CHECKING:
@@ -73,9 +74,30 @@ class SafeElement(GObject.Object):
 
     def touch(self, modify: bool = False) -> None:
         """Updates the last accessed time. If modify is true
-        it also updates the last modified time."""
+        it also updates the last modified time. Elements of read-only safes
+        are never touched."""
+        if self.read_only:
+            return
+
         self._element.touch(modify)
 
+    def mark_moved(self) -> None:
+        """Sets the location changed time to now, pykeepass does not update
+        it when moving elements. It is used to know since when an element
+        is in the trash bin."""
+        # pylint: disable=protected-access
+        times = self._element._element.find("Times")
+        if times is None:
+            return
+
+        location_changed = times.find("LocationChanged")
+        if location_changed is None:
+            location_changed = etree.SubElement(times, "LocationChanged")
+
+        location_changed.text = self._db_manager.db._encode_time(
+            datetime.now(timezone.utc)
+        )
+
     def delete(self) -> None:
         """Delete an Element from the database."""
         element = self._element
@@ -113,11 +135,13 @@ class SafeElement(GObject.Object):
 
         if self.is_entry:
             self._db_manager.db.trash_entry(element)
+            self.mark_moved()
             found, pos = self._db_manager.entries.find(self)
             if found:
                 self._db_manager.entries.items_changed(pos, 1, 1)
         else:
             self._db_manager.db.trash_group(element)
+            self.mark_moved()
             found, pos = self._db_manager.groups.find(self)
             if found:
                 self._db_manager.groups.items_changed(pos, 1, 1)
@@ -140,11 +164,13 @@ class SafeElement(GObject.Object):
         # propagated to the filter models used by each group.
         if self.is_entry:
             self._db_manager.db.move_entry(self._element, dest.group)
+            self.mark_moved()
             found, pos = self._db_manager.entries.find(self)
             if found:
                 self._db_manager.entries.items_changed(pos, 1, 1)
         else:
             self._db_manager.db.move_group(self._element, dest.group)
+            self.mark_moved()
             found, pos = self._db_manager.groups.find(self)
             if found:
                 self._db_manager.groups.items_changed(pos, 1, 1)
@@ -156,6 +182,12 @@ class SafeElement(GObject.Object):
     def element(self) -> Entry | Group:
         return self._element
 
+    @property
+    def read_only(self) -> bool:
+        """Whether the safe of the element is read-only, its widgets should
+        not allow editing it."""
+        return self._db_manager.props.read_only
+
     @GObject.Property(type=str, default="")
     def name(self) -> str:
         """Get element title or name
@@ -210,9 +242,8 @@ class SafeElement(GObject.Object):
         if self.is_root_group:
             return self
 
-        for group in self._db_manager.groups:
-            if group.uuid == self._element.parentgroup.uuid:
-                return group
+        if (group := self._db_manager.get_group(self.parentgroup_uuid)) is not None:
+            return group
 
         logging.error("This should be unreachable: parentgroup")
         return SafeGroup(self._db_manager, self._element.parentgroup)
@@ -314,13 +345,12 @@ class SafeGroup(SafeElement):
     @staticmethod
     def get_root(db_manager: DatabaseManager) -> SafeGroup:
         """Method to obtain the root group."""
-        # pylint: disable=no-member
-        for group in db_manager.groups:
-            if group.is_root_group:
-                return group
+        root_group = db_manager.db.root_group
+        if (group := db_manager.get_group(root_group.uuid)) is not None:
+            return group
 
         logging.error("This should be unreachable: get_root")
-        return SafeGroup(db_manager, db_manager.db.root_group)
+        return SafeGroup(db_manager, root_group)
 
     @staticmethod
     def get_trash_bin(db_manager: DatabaseManager) -> SafeGroup | None:
@@ -497,6 +527,10 @@ class SafeEntry(SafeElement):
             value: str = entry.custom_properties[key] or ""
             clone_entry.set_custom_property(key, value)
 
+        # Attachments reference the binaries of the original entry.
+        for attachment in self._attachments:
+            clone_entry.add_attachment(attachment.id, attachment.filename)
+
         safe_entry = SafeEntry(self._db_manager, clone_entry)
 
         self.parentgroup.updated()
@@ -546,15 +580,20 @@ class SafeEntry(SafeElement):
     def attachments(self) -> list[Attachment]:
         return self._attachments
 
-    def add_attachment(self, byte_buffer: bytes, filename: str) -> Attachment:
+    def add_attachment(
+        self, byte_buffer: bytes, filename: str, digest: bytes | None = None
+    ) -> Attachment:
         """Add an attachment to the entry
 
+        The content is shared with any other attachment with the same content.
+
         :param bytes byte_buffer: attachment content
         :param str filename: attachment name
+        :param bytes digest: SHA-256 digest of the content if already known
         :returns: attachment
         :rtype: Attachment
         """
-        attachment_id = self._db_manager.db.add_binary(byte_buffer)
+        attachment_id = self._db_manager.add_binary(byte_buffer, digest)
         attachment = self._entry.add_attachment(attachment_id, filename)
         self._attachments.append(attachment)
         self.updated()
@@ -567,7 +606,9 @@ class SafeEntry(SafeElement):
 
         :param Attachmennt attachment: attachment to delete
         """
-        self._db_manager.db.delete_binary(attachment.id)
+        binary_id = attachment.id
+        self._entry.delete_attachment(attachment)
+        self._db_manager.release_binary(binary_id)
         self._attachments.remove(attachment)
         self.notify("attachments")
         self.updated()
@@ -585,12 +626,12 @@ class SafeEntry(SafeElement):
 
         return None
 
-    def get_attachment_content(self, attachment: Attachment) -> bytes:
+    def get_attachment_content(self, attachment: Attachment) -> bytes | memoryview:
         """Get an attachment content
 
         :param Attachmennt attachment: attachment
         """
-        return self._db_manager.db.binaries[attachment.id]
+        return self._db_manager.get_binary(attachment.id)
 
     @GObject.Property(type=object, flags=GObject.ParamFlags.READABLE)
     def attributes(self) -> dict[str, str]:
@@ -767,6 +808,7 @@ class SafeEntry(SafeElement):
         if new_password != self._password:
             self._password = new_password
             self._entry.password = new_password
+            self._db_manager.update_password_index(self)
             self.updated()
 
     @GObject.Property(type=str, default="")
@@ -0,0 +1,266 @@
+# SPDX-License-Identifier: GPL-3.0-only
+"""Run the background work of the application in a shared pool of threads.
+
+Jobs are run by priority and then in the order they were submitted. One
+worker is kept for interactive jobs, so that a search never waits for a
+save or an audit to finish. The number of pending jobs of each priority is
+bounded, once it is reached the oldest pending job of that priority is
+cancelled. Saves are never dropped, as they can be the only copy of a
+change such as new credentials. The time jobs wait and run is recorded for
+each priority.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from enum import IntEnum
+from typing import Any, Callable, NamedTuple
+
+MAX_PENDING = 64
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0  # Searching, unlocking.
+    STRENGTH = 1  # Password strength.
+    STATS = 2  # Statistics, audits, estimates.
+    SAVE = 3  # Saving, backups.
+
+
+class JobState(IntEnum):
+    PENDING = 0
+    RUNNING = 1
+    DONE = 2
+    CANCELLED = 3
+
+
+class TaskMetrics(NamedTuple):
+    # pylint: disable=inherit-non-class
+    completed: int = 0
+    cancelled: int = 0
+    # In seconds.
+    wait_time: float = 0.0
+    run_time: float = 0.0
+    max_run_time: float = 0.0
+
+
+class Job:
+    """A function submitted to the scheduler."""
+
+    def __init__(
+        self,
+        scheduler: Scheduler,
+        func: Callable[[], Any],
+        priority: Priority,
+        name: str,
+        on_cancelled: Callable[[], None] | None,
+    ) -> None:
+        self.func = func
+        self.priority = priority
+        self.name = name
+        self.state = JobState.PENDING
+        self.submitted = time.monotonic()
+        self._scheduler = scheduler
+        self._on_cancelled = on_cancelled
+
+    def cancel(self) -> bool:
+        """Drops the job if it did not start yet.
+
+        :returns: True if the job will not run
+        """
+        return self._scheduler.cancel(self)
+
+    def _cancelled(self) -> None:
+        if self._on_cancelled is not None:
+            self._on_cancelled()
+
+
+def _default_workers() -> int:
+    return max(2, min(8, os.cpu_count() or 1))
+
+
+class Scheduler:
+    """A pool of worker threads running jobs by priority."""
+
+    def __init__(
+        self, max_workers: int | None = None, max_pending: int = MAX_PENDING
+    ) -> None:
+        self.max_workers = max(2, max_workers or _default_workers())
+        self.max_pending = max_pending
+
+        self._lock = threading.Condition()
+        self._heap: list[tuple[int, int, Job]] = []
+        self._counter = itertools.count()
+        self._pending = {priority: 0 for priority in Priority}
+        self._metrics = {priority: TaskMetrics() for priority in Priority}
+        self._busy = 0
+        self._shutdown = False
+        self._workers: list[threading.Thread] = []
+
+    def submit(
+        self,
+        func: Callable[[], Any],
+        priority: Priority,
+        name: str = "",
+        on_cancelled: Callable[[], None] | None = None,
+    ) -> Job:
+        """Runs func in a worker thread.
+
+        :param func: function to run, its result is ignored
+        :param Priority priority: priority of the job, once max_pending jobs
+            of that priority wait the oldest is dropped, except for saves
+        :param str name: name used in the logs
+        :param on_cancelled: called if the job is cancelled before it runs,
+            possibly from another thread, or right away once the scheduler
+            is shut down
+        :returns: the job
+        """
+        job = Job(self, func, priority, name or func.__name__, on_cancelled)
+        with self._lock:
+            if self._shutdown:
+                job.state = JobState.CANCELLED
+                dropped = job
+            else:
+                dropped = None
+                if (
+                    priority != Priority.SAVE
+                    and self._pending[priority] >= self.max_pending
+                ):
+                    dropped = self._oldest_pending(priority)
+                    self._remove(dropped)
+                    logging.debug("Too many pending tasks, dropping %s", dropped.name)
+
+                heapq.heappush(self._heap, (priority, next(self._counter), job))
+                self._pending[priority] += 1
+
+                if len(self._workers) < self.max_workers and (
+                    self._busy + len(self._heap) > len(self._workers)
+                ):
+                    self._start_worker()
+
+                self._lock.notify()
+
+        if dropped is not None:
+            dropped._cancelled()  # pylint: disable=protected-access
+
+        return job
+
+    def cancel(self, job: Job) -> bool:
+        with self._lock:
+            if job.state == JobState.CANCELLED:
+                return True
+
+            if job.state != JobState.PENDING:
+                return False
+
+            self._remove(job)
+
+        job._cancelled()  # pylint: disable=protected-access
+        return True
+
+    def metrics(self) -> dict[Priority, TaskMetrics]:
+        """The timings of the jobs which ended, by priority."""
+        with self._lock:
+            return dict(self._metrics)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Cancels the pending jobs and stops the workers.
+
+        :param bool wait: whether to wait for the running jobs to end
+        """
+        with self._lock:
+            self._shutdown = True
+            pending = [job for _priority, _count, job in self._heap]
+            for job in pending:
+                self._remove(job)
+
+            self._lock.notify_all()
+            workers = list(self._workers)
+
+        for job in pending:
+            job._cancelled()  # pylint: disable=protected-access
+
+        if wait:
+            for worker in workers:
+                worker.join()
+
+    def _oldest_pending(self, priority: Priority) -> Job:
+        return min(
+            (item for item in self._heap if item[0] == priority),
+            key=lambda item: item[1],
+        )[2]
+
+    def _remove(self, job: Job) -> None:
+        """Removes a pending job, the lock must be held."""
+        self._heap = [item for item in self._heap if item[2] is not job]
+        heapq.heapify(self._heap)
+        self._pending[job.priority] -= 1
+        job.state = JobState.CANCELLED
+
+        metrics = self._metrics[job.priority]
+        self._metrics[job.priority] = metrics._replace(
+            cancelled=metrics.cancelled + 1
+        )
+
+    def _start_worker(self) -> None:
+        worker = threading.Thread(
+            target=self._work, name=f"scheduler-{len(self._workers)}", daemon=True
+        )
+        self._workers.append(worker)
+        worker.start()
+
+    def _can_run(self) -> bool:
+        if not self._heap:
+            return False
+
+        # The last free worker only runs interactive jobs.
+        priority = self._heap[0][0]
+        return priority == Priority.INTERACTIVE or self._busy < self.max_workers - 1
+
+    def _next_job(self) -> Job | None:
+        with self._lock:
+            while not self._can_run():
+                if self._shutdown:
+                    return None
+
+                self._lock.wait()
+
+            _priority, _count, job = heapq.heappop(self._heap)
+            self._pending[job.priority] -= 1
+            self._busy += 1
+            job.state = JobState.RUNNING
+            return job
+
+    def _work(self) -> None:
+        while (job := self._next_job()) is not None:
+            started = time.monotonic()
+            try:
+                job.func()
+            except Exception:  # pylint: disable=broad-except
+                logging.exception("Task %s failed", job.name)
+
+            finished = time.monotonic()
+            wait_time = started - job.submitted
+            run_time = finished - started
+            logging.debug(
+                "Task %s ran for %.3f s after waiting %.3f s",
+                job.name,
+                run_time,
+                wait_time,
+            )
+
+            with self._lock:
+                job.state = JobState.DONE
+                self._busy -= 1
+                metrics = self._metrics[job.priority]
+                self._metrics[job.priority] = metrics._replace(
+                    completed=metrics.completed + 1,
+                    wait_time=metrics.wait_time + wait_time,
+                    run_time=metrics.run_time + run_time,
+                    max_run_time=max(metrics.max_run_time, run_time),
+                )
+                # A job which waited for the reserved worker may run now.
+                self._lock.notify_all()
@@ -1,4 +1,6 @@
 # SPDX-License-Identifier: GPL-3.0-only
+from gettext import gettext as _
+
 from gi.repository import Adw, Gio, Gtk
 
 import gsecrets.config_manager as config
@@ -10,6 +12,12 @@ class SettingsDialog(Adw.PreferencesWindow):
 
     __gtype_name__ = "SettingsDialog"
 
+    _attachment_size_spin_button = Gtk.Template.Child()
+    _backup_generations_spin_button = Gtk.Template.Child()
+    _backup_size_spin_button = Gtk.Template.Child()
+    _breach_corpus_button = Gtk.Template.Child()
+    _breach_corpus_clear_button = Gtk.Template.Child()
+    _breach_corpus_row = Gtk.Template.Child()
     _clear_button = Gtk.Template.Child()
     _clearcb_spin_button = Gtk.Template.Child()
     _dark_theme_row = Gtk.Template.Child()
@@ -53,6 +61,28 @@ class SettingsDialog(Adw.PreferencesWindow):
         save_automatically_action = settings.create_action("save-automatically")
         action_group.add_action(save_automatically_action)
 
+        sync_on_save_action = settings.create_action("sync-on-save")
+        action_group.add_action(sync_on_save_action)
+
+        settings.bind(
+            "attachment-size-limit",
+            self._attachment_size_spin_button,
+            "value",
+            Gio.SettingsBindFlags.DEFAULT,
+        )
+        settings.bind(
+            "backup-generations",
+            self._backup_generations_spin_button,
+            "value",
+            Gio.SettingsBindFlags.DEFAULT,
+        )
+        settings.bind(
+            "backup-size-limit",
+            self._backup_size_spin_button,
+            "value",
+            Gio.SettingsBindFlags.DEFAULT,
+        )
+
         # Password Generator
         settings.bind(
             "generator-length",
@@ -73,6 +103,11 @@ class SettingsDialog(Adw.PreferencesWindow):
         use_symbols_action = settings.create_action("generator-use-symbols")
         action_group.add_action(use_symbols_action)
 
+        exclude_ambiguous_action = settings.create_action(
+            "generator-exclude-ambiguous"
+        )
+        action_group.add_action(exclude_ambiguous_action)
+
         # Passphrase Generation
         settings.bind(
             "generator-words",
@@ -105,6 +140,17 @@ class SettingsDialog(Adw.PreferencesWindow):
         if not config.get_last_opened_list():
             self._clear_button.props.sensitive = False
 
+        self._breach_corpus_button.connect(
+            "clicked", self._on_breach_corpus_button_clicked
+        )
+        self._breach_corpus_clear_button.connect(
+            "clicked", lambda _button: config.set_breach_corpus_directory("")
+        )
+        settings.connect(
+            "changed::breach-corpus-directory", self._on_breach_corpus_changed
+        )
+        self._on_breach_corpus_changed(settings, "breach-corpus-directory")
+
         # Unlock
         remember_composite_key_action = settings.create_action("remember-composite-key")
         action_group.add_action(remember_composite_key_action)
@@ -114,6 +160,35 @@ class SettingsDialog(Adw.PreferencesWindow):
 
         self.insert_action_group("settings", action_group)
 
+    def _on_breach_corpus_changed(self, settings, key):
+        directory = settings.get_string(key)
+        self._breach_corpus_clear_button.props.sensitive = bool(directory)
+        if directory:
+            self._breach_corpus_row.props.subtitle = directory
+        else:
+            self._breach_corpus_row.props.subtitle = _(
+                "Directory of Have I Been Pwned range files to check passwords against."  # pylint: disable=line-too-long # noqa: E501
+            )
+
+    def _on_breach_corpus_button_clicked(self, _button):
+        dialog = Gtk.FileChooserNative.new(
+            _("Select Breached Passwords Directory"),
+            self,
+            Gtk.FileChooserAction.SELECT_FOLDER,
+            None,
+            None,
+        )
+        dialog.connect("response", self._on_breach_corpus_response)
+        dialog.show()
+
+    def _on_breach_corpus_response(self, dialog, response):
+        dialog.destroy()
+        if response != Gtk.ResponseType.ACCEPT:
+            return
+
+        if (directory := dialog.get_file()) and directory.get_path():
+            config.set_breach_corpus_directory(directory.get_path())
+
     def _on_remember_composite_key(self, action, _param):
         if not action.props.state:
             config.set_last_used_composite_key([])
@@ -2,17 +2,16 @@
 from __future__ import annotations
 
 import logging
-import os
 import typing
 from gettext import gettext as _
 
-from gi.repository import Gio, GLib, Gtk
+from gi.repository import Gio, GLib, GObject, Gtk
 
 import gsecrets.config_manager
 from gsecrets import const
 from gsecrets.database_manager import DatabaseManager
 from gsecrets.unlocked_database import UnlockedDatabase
-from gsecrets.utils import KeyFileFilter
+from gsecrets.utils import KeyFileFilter, format_kdf_parameters
 if typing.TYPE_CHECKING:
     from gsecrets.widgets.window import Window
 
@@ -25,6 +24,8 @@ class UnlockDatabase(Gtk.Box):
 
     keyfile_path = None
     _keyfile_hash = None
+    # Whether the credentials were entered for another safe.
+    _shared_unlock = False
 
     database_manager: DatabaseManager | None = None
 
@@ -34,10 +35,13 @@ class UnlockDatabase(Gtk.Box):
     keyfile_spinner = Gtk.Template.Child()
     keyfile_stack = Gtk.Template.Child()
     password_entry = Gtk.Template.Child()
+    queue_label = Gtk.Template.Child()
+    read_only_check_button = Gtk.Template.Child()
     spinner = Gtk.Template.Child()
     spinner_stack = Gtk.Template.Child()
     status_page = Gtk.Template.Child()
     headerbar = Gtk.Template.Child()
+    unlock_all_check_button = Gtk.Template.Child()
     unlock_button = Gtk.Template.Child()
 
     def __init__(self, window: Window, database_file: Gio.File) -> None:
@@ -59,13 +63,53 @@ class UnlockDatabase(Gtk.Box):
                 self.database_manager = database.database_manager
 
         if not self.database_manager:
-            self.database_manager = DatabaseManager(filepath)
+            self.database_manager = DatabaseManager(database_file)
+
+        self.database_manager.bind_property(
+            "queued", self.queue_label, "visible", GObject.BindingFlags.SYNC_CREATE
+        )
+
+        # The safe is read while the password is typed.
+        if self.database_manager.opened:
+            self.read_only_check_button.props.active = (
+                self.database_manager.props.read_only
+            )
+            self.read_only_check_button.props.sensitive = False
+            self.database_manager.read_header_async(self._on_read_header)
+        else:
+            self.database_manager.prefetch_async(self._on_prefetch)
 
         if gsecrets.config_manager.get_remember_composite_key():
             self._set_last_used_keyfile()
 
-        if gsecrets.const.IS_DEVEL:
-            self.status_page.props.icon_name = gsecrets.const.APP_ID
+        if const.IS_DEVEL:
+            self.status_page.props.icon_name = const.APP_ID
+
+    def _on_prefetch(self, database_manager, result):
+        try:
+            header = database_manager.prefetch_finish(result)
+        except GLib.Error as err:
+            logging.debug("Could not prefetch safe: %s", err.message)
+            return
+
+        if header is not None:
+            self._set_kdf_description(header)
+
+    def _on_read_header(self, database_manager, result):
+        try:
+            header = database_manager.read_header_finish(result)
+        except GLib.Error as err:
+            logging.debug("Could not read safe header: %s", err.message)
+            return
+
+        self._set_kdf_description(header)
+
+    def _set_kdf_description(self, header):
+        if parameters := format_kdf_parameters(header):
+            # NOTE: The cost of the key derivation, e.g. 64 MiB, 10 iterations.
+            self.status_page.props.description = _("Key Derivation: {}").format(
+                parameters
+            )
 
     def do_realize(self):  # pylint: disable=arguments-differ
         Gtk.Widget.do_realize(self)
@@ -141,6 +185,31 @@ class UnlockDatabase(Gtk.Box):
 
         return is_open and not is_current
 
+    @property
+    def can_unlock(self) -> bool:
+        """Whether the safe is neither opened nor being unlocked."""
+        return (
+            not self.database_manager.opened
+            and self.unlock_button.props.sensitive
+        )
+
+    def update_unlock_all(self) -> None:
+        """Offers to unlock the other locked safes if there are any."""
+        others = [
+            page
+            for page in self.window.application.locked_safes()
+            if page is not self
+        ]
+        self.unlock_all_check_button.props.visible = bool(others)
+
+    def unlock_with(self, password: str, keyfile: str | None, keyfile_hash):
+        """Tries to unlock the safe with the credentials entered for another
+        safe, nothing is reported if they are wrong."""
+        if self.is_safe_open_elsewhere():
+            return
+
+        self._open_database(password, keyfile, keyfile_hash, shared=True)
+
     @Gtk.Template.Callback()
     def _on_password_entry_activate(self, _entry):
         self.unlock_button.activate()
@@ -159,7 +228,7 @@ class UnlockDatabase(Gtk.Box):
             return
 
         if not self.database_manager.opened:
-            self._open_database()
+            self._open_database(entered_pwd, self.keyfile_path, self.keyfile_hash)
             return
 
         if (
@@ -173,7 +242,7 @@ class UnlockDatabase(Gtk.Box):
 
     def _set_last_used_keyfile(self):
         pairs = gsecrets.config_manager.get_last_used_composite_key()
-        uri = Gio.File.new_for_path(self.database_manager.path).get_uri()
+        uri = self.database_manager.gfile.get_uri()
         if pairs:
             keyfile_path = None
 
@@ -191,34 +260,45 @@ class UnlockDatabase(Gtk.Box):
     # Open Database
     #
 
-    def _open_database(self):
+    def _open_database(self, password, keyfile, keyfile_hash, shared=False):
         self.spinner_stack.props.visible_child_name = "spinner"
         self.spinner.start()
 
+        self._shared_unlock = shared
         self._set_sensitive(False)
 
-        password = self.password_entry.props.text
-        keyfile = self.keyfile_path
-
+        self.database_manager.props.read_only = (
+            self.read_only_check_button.props.active
+        )
         self.database_manager.unlock_async(
             password,
             keyfile,
-            self.keyfile_hash,
+            keyfile_hash,
             self._unlock_callback,
+            self.window.application.unlock_queue,
         )
 
+        # The other safes are unlocked in parallel, as far as the unlock
+        # queue allows it.
+        if not shared and self.unlock_all_check_button.props.active:
+            for page in self.window.application.locked_safes():
+                page.unlock_with(password, keyfile, keyfile_hash)
+
     def _unlock_callback(self, database_manager, result):
         try:
             database_manager.unlock_finish(result)
         except GLib.Error as err:
             logging.debug("Could not unlock safe: %s", err.message)
-            self._unlock_failed()
-            return
+            if self._shared_unlock:
+                self._set_sensitive(True)
+                self._reset_unlock_button()
+            else:
+                self._unlock_failed()
 
-        opened = Gio.File.new_for_path(database_manager.path)
+            return
 
         if gsecrets.config_manager.get_development_backup_mode():
-            self.store_backup(opened)
+            self.store_backup()
 
         database_manager.add_to_history()
 
@@ -229,6 +309,7 @@ class UnlockDatabase(Gtk.Box):
 
         self.window.view = self.window.View.UNLOCKED_DATABASE
         self._reset_page()
+        self.window.application.update_locked_safes()
 
     #
     # Helper Functions
@@ -275,8 +356,12 @@ class UnlockDatabase(Gtk.Box):
         self.keyfile_button.set_sensitive(sensitive)
         self.unlock_button.set_sensitive(sensitive)
         self.headerbar.set_sensitive(sensitive)
+        if not self.database_manager.opened:
+            self.read_only_check_button.set_sensitive(sensitive)
 
+        self.unlock_all_check_button.set_sensitive(sensitive)
         self.action_set_enabled("clear-keyfile", sensitive)
+        self.window.application.update_locked_safes()
 
     def on_clear_keyfile(self, _widget, _name, _param):
         self.keyfile_path = None
@@ -284,31 +369,14 @@ class UnlockDatabase(Gtk.Box):
 
         self._reset_keyfile_button()
 
-    def store_backup(self, gfile):
-        cache_dir = os.path.join(GLib.get_user_cache_dir(), const.SHORT_NAME, "backup")
-        if not os.path.exists(cache_dir):
-            os.makedirs(cache_dir)
-
-        current_time = GLib.DateTime.new_now_local().format("%F_%T")
-        basename = os.path.splitext(gfile.get_basename())[0]
-        backup_name = basename + "_backup_" + current_time + ".kdbx"
-        backup = Gio.File.new_for_path(os.path.join(cache_dir, backup_name))
-
-        def callback(gfile, result):
+    def store_backup(self):
+        def callback(database_manager, result):
             try:
-                gfile.copy_finish(result)
+                database_manager.backup_finish(result)
             except GLib.Error as err:
                 logging.warning("Could not save database backup: %s", err.message)
 
-        gfile.copy_async(
-            backup,
-            Gio.FileCopyFlags.NONE,
-            GLib.PRIORITY_DEFAULT,
-            None,
-            None,
-            None,
-            callback,
-        )
+        self.database_manager.backup_async(callback)
 
     @property
     def keyfile_hash(self) -> str | None:
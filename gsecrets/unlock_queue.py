@@ -0,0 +1,130 @@
+# SPDX-License-Identifier: GPL-3.0-only
+"""Limit how many safes are unlocked at the same time.
+
+Deriving the key of a safe can take several threads and, with Argon2, a lot
+of memory. Opening many safes at once would otherwise start all their key
+derivations together. Unlocks are started in order, as long as the threads
+and memory they need fit in the budget of the queue. An unlock is always
+started if nothing else is running, so that a safe which needs more than the
+whole budget can still be opened.
+
+The queue is not thread safe, it is meant to be used from the main loop.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from collections import deque
+from typing import Callable, NamedTuple
+
+# Used when the amount of physical memory cannot be queried.
+FALLBACK_MEMORY = 1024 * 1024 * 1024
+
+
+class _Unlock(NamedTuple):
+    # pylint: disable=inherit-non-class
+    threads: int
+    memory: int
+    start: Callable[[Callable[[], None]], None]
+
+
+def physical_memory() -> int:
+    """The amount of physical memory in bytes, or FALLBACK_MEMORY."""
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return FALLBACK_MEMORY
+
+
+class UnlockQueue:
+    """Starts unlocks once the threads and memory they need are available.
+
+    By default as many threads as there are cores and half of the physical
+    memory are available.
+    """
+
+    def __init__(
+        self, max_threads: int | None = None, max_memory: int | None = None
+    ) -> None:
+        self.max_threads = max_threads or os.cpu_count() or 1
+        self.max_memory = (
+            max_memory if max_memory is not None else physical_memory() // 2
+        )
+
+        self._pending: deque[_Unlock] = deque()
+        self._threads = 0
+        self._memory = 0
+        self._running = 0
+
+    @property
+    def n_pending(self) -> int:
+        return len(self._pending)
+
+    @property
+    def n_running(self) -> int:
+        return self._running
+
+    def submit(
+        self,
+        threads: int,
+        memory: int,
+        start: Callable[[Callable[[], None]], None],
+    ) -> bool:
+        """Adds an unlock to the queue.
+
+        start is called once the unlock can run, possibly right away. It is
+        given a function which has to be called exactly once when the unlock
+        ends, successfully or not.
+
+        :param int threads: threads used by the key derivation
+        :param int memory: memory used by the key derivation, in bytes
+        :param start: starts the unlock
+        :returns: True if the unlock was started right away
+        """
+        threads = max(1, min(threads, self.max_threads))
+        unlock = _Unlock(threads, max(0, memory), start)
+        self._pending.append(unlock)
+        self._schedule()
+
+        return all(pending is not unlock for pending in self._pending)
+
+    def _fits(self, unlock: _Unlock) -> bool:
+        if self._running == 0:
+            return True
+
+        return (
+            self._threads + unlock.threads <= self.max_threads
+            and self._memory + unlock.memory <= self.max_memory
+        )
+
+    def _schedule(self) -> None:
+        # Unlocks are started in order, a large unlock is not overtaken by
+        # smaller ones submitted after it.
+        while self._pending and self._fits(self._pending[0]):
+            unlock = self._pending.popleft()
+            self._threads += unlock.threads
+            self._memory += unlock.memory
+            self._running += 1
+
+            logging.debug(
+                "Starting unlock, %d running, %d pending",
+                self._running,
+                len(self._pending),
+            )
+            unlock.start(self._release_func(unlock))
+
+    def _release_func(self, unlock: _Unlock) -> Callable[[], None]:
+        released = False
+
+        def release():
+            nonlocal released
+            if released:
+                return
+
+            released = True
+            self._threads -= unlock.threads
+            self._memory -= unlock.memory
+            self._running -= 1
+            self._schedule()
+
+        return release
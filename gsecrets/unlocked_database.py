@@ -28,10 +28,23 @@ from gsecrets.widgets.selection_mode_headerbar import SelectionModeHeaderbar
 from gsecrets.widgets.unlocked_database_page import UnlockedDatabasePage
 
 if typing.TYPE_CHECKING:
+    from uuid import UUID
+
     from gsecrets.database_manager import DatabaseManager
     from gsecrets.widgets.window import Window
 
 
+# Window actions which modify the safe.
+EDIT_ACTIONS = [
+    "db.add_entry",
+    "db.add_group",
+    "db.selection",
+    "db.undo_delete",
+    "element.delete",
+    "entry.duplicate",
+]
+
+
 class UndoData:
     def __init__(self, elements, toast):
         self.elements = elements
@@ -119,6 +132,10 @@ class UnlockedDatabase(Gtk.Box):
         save_action = window.lookup_action("db.save_dirty")
         dbm.bind_property("is-dirty", save_action, "enabled")
 
+        # The actions are shared by all the safes opened in the window.
+        for name in EDIT_ACTIONS:
+            window.lookup_action(name).set_enabled(not dbm.props.read_only)
+
         search_action = Gio.PropertyAction.new("db.search", self, "search-active")
         window.add_action(search_action)
 
@@ -143,7 +160,10 @@ class UnlockedDatabase(Gtk.Box):
             self.db_locked_handler = None
 
     def setup(self):
-        self.start_save_loop()
+        # Read-only safes are never saved.
+        if not self.database_manager.props.read_only:
+            self.start_save_loop()
+
         self.start_database_lock_timer()
 
         app = self.window.props.application
@@ -236,7 +256,10 @@ class UnlockedDatabase(Gtk.Box):
         return self._stack.get_child_by_name(element_uuid.urn)
 
     def delete_page(self, element):
-        if (page := self._stack.get_child_by_name(element.uuid.urn)):
+        self.delete_page_by_uuid(element.uuid)
+
+    def delete_page_by_uuid(self, element_uuid):
+        if (page := self._stack.get_child_by_name(element_uuid.urn)):
             self._stack.remove(page)
 
     #
@@ -346,8 +369,13 @@ class UnlockedDatabase(Gtk.Box):
 
     def undo_delete(self):
         if (data := self.undo_data):
+            by_parent: dict[UUID, tuple[SafeGroup, list[SafeElement]]] = {}
             for element, element_parent in data.elements:
-                element.move_to(element_parent)
+                by_parent.setdefault(element_parent.uuid, (element_parent, []))
+                by_parent[element_parent.uuid][1].append(element)
+
+            for element_parent, elements in by_parent.values():
+                self.database_manager.move_many(elements, element_parent)
 
             self.undo_data = None
 
@@ -501,10 +529,7 @@ class UnlockedDatabase(Gtk.Box):
 
             self.session_handler_id = None
 
-        # stop the save loop
-        if self.save_loop:
-            GLib.source_remove(self.save_loop)
-            self.save_loop = None
+        self.stop_save_loop()
 
         # Cleanup temporal files created when opening attachments.
         def callback(gfile, result):
@@ -525,6 +550,9 @@ class UnlockedDatabase(Gtk.Box):
 
         Shows a notification after saving.
         """
+        if self.database_manager.props.read_only:
+            return
+
         def on_check_file_changes(dbm, result):
             self.on_check_file_changes(dbm, result, self.on_save)
 
@@ -532,6 +560,9 @@ class UnlockedDatabase(Gtk.Box):
 
     def auto_save_database(self) -> None:
         """Save the database."""
+        if self.database_manager.props.read_only:
+            return
+
         logging.debug("Automatically saving database")
 
         def on_check_file_changes(dbm, result):
@@ -570,6 +601,11 @@ class UnlockedDatabase(Gtk.Box):
         logging.debug("Starting automatic save loop")
         self.save_loop = GLib.timeout_add_seconds(30, self.threaded_save_loop)
 
+    def stop_save_loop(self):
+        if self.save_loop:
+            GLib.source_remove(self.save_loop)
+            self.save_loop = None
+
     def threaded_save_loop(self) -> bool:
         """Saves the safe as long as it returns True."""
         if gsecrets.config_manager.get_save_automatically():
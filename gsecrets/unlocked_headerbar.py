@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import typing
+from gettext import gettext as _
 
 from gi.repository import Adw, GObject, Gtk
 
@@ -14,7 +15,9 @@ class UnlockedHeaderBar(Adw.Bin):
 
     __gtype_name__ = "UnlockedHeaderBar"
 
+    _add_button = Gtk.Template.Child()
     _pathbar_bin = Gtk.Template.Child()
+    _window_title = Gtk.Template.Child()
     selection_button = Gtk.Template.Child()
 
     def __init__(self, unlocked_database):
@@ -38,6 +41,12 @@ class UnlockedHeaderBar(Adw.Bin):
         self._pathbar_bin.set_child(self._pathbar)
         self._pathbar.props.visible = not is_mobile
 
+        if self._unlocked_database.database_manager.props.read_only:
+            self._add_button.props.visible = False
+            # Selected elements can only be moved or trashed.
+            self.selection_button.props.visible = False
+            self._window_title.props.subtitle = _("Read-Only")
+
     def _setup_signals(self):
         self._window.connect("notify::mobile-layout", self._on_mobile_layout_changed)
 
@@ -1,19 +1,38 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import hashlib
 import os
 import secrets
 import stat
 import typing
 from gettext import gettext as _
+from gettext import ngettext
 
 from Cryptodome.Cipher import AES
 from Cryptodome.Random import get_random_bytes
 
-from gi.repository import Gio, GLib, Gtk
+from gi.repository import Gio, GLib, GObject, Gtk
+
+from gsecrets.kdbx_header import (
+    HEADER_READ_SIZE,
+    MAX_HEADER_SIZE,
+    HeaderError,
+    TruncatedHeaderError,
+    parse_header,
+)
+from gsecrets.scheduler import Priority, Scheduler
 
 if typing.TYPE_CHECKING:
-    from typing import Tuple
+    from typing import Callable, Tuple
+
+    from gsecrets.kdbx_header import KdbxHeader
+
+READ_CHUNK_SIZE = 256 * 1024
+WRITE_CHUNK_SIZE = 64 * 1024
+
+# Used when there is no application, e.g. in the tests.
+_scheduler: Scheduler | None = None
 
 
 def format_time(time: GLib.DateTime | None, hours: bool = True) -> str:
@@ -28,6 +47,110 @@ def format_time(time: GLib.DateTime | None, hours: bool = True) -> str:
     return time.to_local().format(time_format)
 
 
+def format_kdf_parameters(header: KdbxHeader) -> str:
+    """Describes the cost of the key derivation of a safe, which dominates the
+    time needed to unlock it. Returns an empty string if it is not known."""
+    if header.memory is not None and header.iterations is not None:
+        memory = GLib.format_size_full(header.memory, GLib.FormatSizeFlags.IEC_UNITS)
+        iterations = ngettext(
+            "{} iteration", "{} iterations", header.iterations
+        ).format(header.iterations)
+        # NOTE: The memory and iterations of the Argon2 key derivation.
+        return _("{memory}, {iterations}").format(memory=memory, iterations=iterations)
+
+    if header.rounds is not None:
+        return ngettext(
+            "{} transformation round", "{} transformation rounds", header.rounds
+        ).format(header.rounds)
+
+    return ""
+
+
+def format_cipher(cipher: str) -> str:
+    """The name of the encryption algorithm of a safe header."""
+    if cipher == "aes256":
+        # NOTE: AES is a proper name
+        return _("AES 256-bit")
+    if cipher == "chacha20":
+        # NOTE: ChaCha20 is a proper name
+        return _("ChaCha20 256-bit")
+    if cipher == "twofish":
+        # NOTE: Twofish is a proper name
+        return _("Twofish 256-bit")
+
+    return _("Unknown")
+
+
+def format_kdf(kdf: str) -> str:
+    """The name of the key derivation algorithm of a safe header."""
+    if kdf == "argon2":
+        # NOTE: Argon2 is a proper name
+        return _("Argon2")
+    if kdf == "argon2id":
+        # NOTE: Argon2id is a proper name
+        return _("Argon2id")
+    if kdf == "aeskdf":
+        # NOTE: AES-KDF is a proper name
+        return _("AES-KDF")
+
+    return _("Unknown")
+
+
+def get_scheduler() -> Scheduler:
+    """The scheduler of the application."""
+    global _scheduler  # pylint: disable=global-statement
+
+    app = Gio.Application.get_default()
+    if (scheduler := getattr(app, "scheduler", None)) is not None:
+        return scheduler
+
+    if _scheduler is None:
+        _scheduler = Scheduler()
+
+    return _scheduler
+
+
+def run_in_scheduler(
+    task: Gio.Task,
+    task_func: Callable[[Gio.Task, GObject.Object, None, Gio.Cancellable], None],
+    priority: Priority,
+) -> None:
+    """Replaces Gio.Task.run_in_thread, runs task_func in the scheduler of
+    the application with the given priority.
+
+    If the task is cancelled before it starts, or if it is dropped by the
+    scheduler, it returns G_IO_ERROR_CANCELLED. The cancellable of the task
+    is not watched anymore once the task completes.
+    """
+    cancellable = task.get_cancellable()
+
+    def func():
+        task_func(task, task.get_source_object(), None, cancellable)
+
+    def on_cancelled():
+        err = GLib.Error.new_literal(
+            Gio.io_error_quark(),
+            "Operation was cancelled",
+            Gio.IOErrorEnum.CANCELLED,
+        )
+        task.return_error(err)
+
+    job = get_scheduler().submit(func, priority, task_func.__name__, on_cancelled)
+    if cancellable is not None:
+        if cancellable.is_cancelled():
+            job.cancel()
+        else:
+            handler_id = GObject.Object.connect(
+                cancellable, "cancelled", lambda _cancellable: job.cancel()
+            )
+
+            def on_completed(task, _pspec):
+                GObject.Object.disconnect(cancellable, handler_id)
+                task.disconnect(completed_id)
+
+            completed_id = task.connect("notify::completed", on_completed)
+
+
 def create_random_data(bytes_buffer):
     return secrets.token_bytes(bytes_buffer)
 
@@ -65,13 +188,283 @@ def generate_keyfile_async(gfile: Gio.File, callback: Gio.AsyncReadyCallback) ->
             task.return_value(keyfile_hash)
 
     task = Gio.Task.new(gfile, None, callback)
-    task.run_in_thread(generate_keyfile_task)
+    run_in_scheduler(task, generate_keyfile_task, Priority.INTERACTIVE)
 
 
 def generate_keyfile_finish(result: Gio.AsyncResult) -> Tuple[bool, str]:
     return result.propagate_value()
 
 
+def write_bytes_async(
+    gfile: Gio.File,
+    data: bytes | memoryview,
+    callback: Gio.AsyncReadyCallback,
+) -> None:
+    """Replace the contents of gfile with data.
+
+    The data is written in chunks through a replace stream, so there are never
+    more than WRITE_CHUNK_SIZE bytes copied at the same time. If writing fails
+    the original contents of the file are preserved."""
+    view = memoryview(data)
+    task = Gio.Task.new(gfile, None, callback)
+
+    def on_close(stream, result):
+        try:
+            stream.close_finish(result)
+        except GLib.Error as err:
+            task.return_error(err)
+        else:
+            task.return_boolean(True)
+
+    def abort(stream, err):
+        discard_replace_stream(stream)
+        task.return_error(err)
+
+    def write_chunk(stream, offset):
+        if offset >= len(view):
+            stream.close_async(GLib.PRIORITY_DEFAULT, None, on_close)
+            return
+
+        chunk = GLib.Bytes.new(view[offset:offset + WRITE_CHUNK_SIZE].tobytes())
+        stream.write_bytes_async(
+            chunk, GLib.PRIORITY_DEFAULT, None, on_write, offset
+        )
+
+    def on_write(stream, result, offset):
+        try:
+            written = stream.write_bytes_finish(result)
+        except GLib.Error as err:
+            abort(stream, err)
+        else:
+            write_chunk(stream, offset + written)
+
+    def on_replace(gfile, result):
+        try:
+            stream = gfile.replace_finish(result)
+        except GLib.Error as err:
+            task.return_error(err)
+        else:
+            write_chunk(stream, 0)
+
+    flags = Gio.FileCreateFlags.PRIVATE | Gio.FileCreateFlags.REPLACE_DESTINATION
+    gfile.replace_async(None, False, flags, GLib.PRIORITY_DEFAULT, None, on_replace)
+
+
+def write_bytes_finish(result: Gio.AsyncResult) -> bool:
+    return result.propagate_boolean()
+
+
+def discard_replace_stream(stream: Gio.FileOutputStream) -> None:
+    """Close a replace stream without replacing the original file."""
+    # Closing a replace stream with a cancelled cancellable discards the
+    # temporary file instead of replacing the original one.
+    cancellable = Gio.Cancellable()
+    cancellable.cancel()
+    try:
+        stream.close(cancellable)
+    except GLib.Error:
+        pass
+
+
+class StreamWriter:
+    """File-like wrapper of a seekable Gio.OutputStream.
+
+    Its methods block, it is meant to be used from a worker thread. Writes are
+    split in chunks of WRITE_CHUNK_SIZE bytes."""
+
+    _SEEK_TYPES = (GLib.SeekType.SET, GLib.SeekType.CUR, GLib.SeekType.END)
+
+    def __init__(
+        self, stream: Gio.OutputStream, cancellable: Gio.Cancellable | None = None
+    ) -> None:
+        self._stream = stream
+        self._cancellable = cancellable
+
+    def write(self, data: bytes | memoryview) -> int:
+        view = memoryview(data)
+        for offset in range(0, len(view), WRITE_CHUNK_SIZE):
+            chunk = view[offset:offset + WRITE_CHUNK_SIZE].tobytes()
+            self._stream.write_all(chunk, self._cancellable)
+
+        return len(view)
+
+    def tell(self) -> int:
+        return self._stream.tell()
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        self._stream.seek(offset, self._SEEK_TYPES[whence], self._cancellable)
+        return self._stream.tell()
+
+
+def read_bytes_async(
+    gfile: Gio.File,
+    max_size: int,
+    cancellable: Gio.Cancellable | None,
+    progress_callback: Callable[[float], None] | None,
+    callback: Gio.AsyncReadyCallback,
+) -> None:
+    """Read the contents of gfile, at most max_size bytes.
+
+    The file is read in chunks of READ_CHUNK_SIZE bytes and hashed while it is
+    read, progress_callback receives the fraction of the file read so far.
+    Files larger than max_size are rejected with G_IO_ERROR_MESSAGE_TOO_LARGE
+    before reading their contents."""
+    task = Gio.Task.new(gfile, cancellable, callback)
+    buffer = bytearray()
+    checksum = hashlib.sha256()
+
+    def too_large():
+        return GLib.Error.new_literal(
+            Gio.io_error_quark(),
+            _("File is larger than {}").format(GLib.format_size(max_size)),
+            Gio.IOErrorEnum.MESSAGE_TOO_LARGE,
+        )
+
+    def read_chunk(stream, size):
+        stream.read_bytes_async(
+            READ_CHUNK_SIZE, GLib.PRIORITY_DEFAULT, cancellable, on_read, size
+        )
+
+    def on_close(stream, result):
+        try:
+            stream.close_finish(result)
+        except GLib.Error:
+            pass
+
+    def on_read(stream, result, size):
+        try:
+            gbytes = stream.read_bytes_finish(result)
+        except GLib.Error as err:
+            stream.close_async(GLib.PRIORITY_DEFAULT, None, on_close)
+            task.return_error(err)
+            return
+
+        chunk = gbytes.get_data()
+        if not chunk:
+            stream.close_async(GLib.PRIORITY_DEFAULT, None, on_close)
+            task.return_value((buffer, checksum.digest()))
+            return
+
+        # The file can grow after its size was queried.
+        if len(buffer) + len(chunk) > max_size:
+            stream.close_async(GLib.PRIORITY_DEFAULT, None, on_close)
+            task.return_error(too_large())
+            return
+
+        buffer.extend(chunk)
+        checksum.update(chunk)
+        if progress_callback and size:
+            progress_callback(min(len(buffer) / size, 1.0))
+
+        read_chunk(stream, size)
+
+    def on_open(gfile, result, size):
+        try:
+            stream = gfile.read_finish(result)
+        except GLib.Error as err:
+            task.return_error(err)
+        else:
+            read_chunk(stream, size)
+
+    def on_query_info(gfile, result):
+        try:
+            info = gfile.query_info_finish(result)
+        except GLib.Error as err:
+            task.return_error(err)
+            return
+
+        size = info.get_size()
+        if size > max_size:
+            task.return_error(too_large())
+            return
+
+        gfile.read_async(GLib.PRIORITY_DEFAULT, cancellable, on_open, size)
+
+    gfile.query_info_async(
+        Gio.FILE_ATTRIBUTE_STANDARD_SIZE,
+        Gio.FileQueryInfoFlags.NONE,
+        GLib.PRIORITY_DEFAULT,
+        cancellable,
+        on_query_info,
+    )
+
+
+def read_bytes_finish(result: Gio.AsyncResult) -> Tuple[bytearray, bytes]:
+    """Returns the contents of the file and their SHA-256 digest."""
+    _success, value = result.propagate_value()
+    return value
+
+
+def read_kdbx_header_async(
+    gfile: Gio.File,
+    cancellable: Gio.Cancellable | None,
+    callback: Gio.AsyncReadyCallback,
+) -> None:
+    """Read the outer header of a safe, only the start of the file is read.
+
+    Fails with G_IO_ERROR_INVALID_DATA if the file is not a safe, and with
+    G_IO_ERROR_PARTIAL_INPUT if the file or the data read end before the end
+    of the header.
+    """
+    task = Gio.Task.new(gfile, cancellable, callback)
+    buffer = bytearray()
+
+    def on_close(stream, result):
+        try:
+            stream.close_finish(result)
+        except GLib.Error:
+            pass
+
+    def return_error(stream, message, code):
+        stream.close_async(GLib.PRIORITY_DEFAULT, None, on_close)
+        task.return_error(
+            GLib.Error.new_literal(Gio.io_error_quark(), message, code)
+        )
+
+    def on_read(stream, result):
+        try:
+            gbytes = stream.read_bytes_finish(result)
+        except GLib.Error as err:
+            stream.close_async(GLib.PRIORITY_DEFAULT, None, on_close)
+            task.return_error(err)
+            return
+
+        chunk = gbytes.get_data()
+        buffer.extend(chunk)
+        try:
+            header = parse_header(bytes(buffer))
+        except TruncatedHeaderError as err:
+            # Reads can be short, only give up at the end of the file.
+            if not chunk or len(buffer) >= MAX_HEADER_SIZE:
+                return_error(stream, str(err), Gio.IOErrorEnum.PARTIAL_INPUT)
+            else:
+                stream.read_bytes_async(
+                    HEADER_READ_SIZE, GLib.PRIORITY_DEFAULT, cancellable, on_read
+                )
+        except HeaderError as err:
+            return_error(stream, str(err), Gio.IOErrorEnum.INVALID_DATA)
+        else:
+            stream.close_async(GLib.PRIORITY_DEFAULT, None, on_close)
+            task.return_value(header)
+
+    def on_open(gfile, result):
+        try:
+            stream = gfile.read_finish(result)
+        except GLib.Error as err:
+            task.return_error(err)
+        else:
+            stream.read_bytes_async(
+                HEADER_READ_SIZE, GLib.PRIORITY_DEFAULT, cancellable, on_read
+            )
+
+    gfile.read_async(GLib.PRIORITY_DEFAULT, cancellable, on_open)
+
+
+def read_kdbx_header_finish(result: Gio.AsyncResult) -> KdbxHeader:
+    _success, header = result.propagate_value()
+    return header
+
+
 class KeyFileFilter:
     """Filter out Keyfiles in the file chooser dialog"""
 
@@ -5,7 +5,9 @@ import logging
 import typing
 from gettext import gettext as _
 
-from gi.repository import Adw, Gio, GLib, Gtk
+from gi.repository import Adw, GLib, Gtk
+
+from gsecrets.utils import write_bytes_async, write_bytes_finish
 
 if typing.TYPE_CHECKING:
     from gsecrets.safe_element import SafeEntry
@@ -27,6 +29,7 @@ class AttachmentEntryRow(Adw.ActionRow):
         self.attachment = attachment
 
         self.set_title(attachment.filename)
+        self.delete_button.props.visible = not entry.read_only
         # TODO Display mime type in subtitle
 
     @Gtk.Template.Callback()
@@ -52,9 +55,9 @@ class AttachmentEntryRow(Adw.ActionRow):
         listbox = self.get_parent()
         listbox.remove(self)
 
-    def _replace_contents_callback(self, gfile, result):
+    def _write_bytes_callback(self, _gfile, result):
         try:
-            gfile.replace_contents_finish(result)
+            write_bytes_finish(result)
         except GLib.Error as err:
             logging.debug("Could not store attachment: %s", err.message)
             window = self.get_root()
@@ -73,14 +76,5 @@ class AttachmentEntryRow(Adw.ActionRow):
                 logging.debug("No file selected")
                 return
 
-            bytes_buffer = self.entry.get_attachment_content(self.attachment)
-            gbytes = GLib.Bytes.new(bytes_buffer)
-
-            gfile.replace_contents_bytes_async(
-                gbytes,
-                None,
-                False,
-                Gio.FileCreateFlags.PRIVATE | Gio.FileCreateFlags.REPLACE_DESTINATION,
-                None,
-                self._replace_contents_callback,
-            )
+            content = self.entry.get_attachment_content(self.attachment)
+            write_bytes_async(gfile, content, self._write_bytes_callback)
@@ -13,6 +13,8 @@ class AttributeEntryRow(Adw.EntryRow):
 
     __gtype_name__ = "AttributeEntryRow"
 
+    remove_button = Gtk.Template.Child()
+
     def __init__(
             self, entry: SafeEntry, key: str, value: str, list_box: Gtk.ListBox
     ) -> None:
@@ -26,6 +28,10 @@ class AttributeEntryRow(Adw.EntryRow):
         if value:
             self.props.text = value
 
+        if entry.read_only:
+            self.props.editable = False
+            self.remove_button.props.visible = False
+
     @Gtk.Template.Callback()
     def _on_remove_button_clicked(self, _button):
         self.entry.delete_attribute(self.key)
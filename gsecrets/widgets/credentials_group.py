@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import typing
 from gettext import gettext as _
+from gettext import ngettext
 
 from gi.repository import Adw, GObject, Gtk
 
@@ -22,9 +23,11 @@ class CredentialsGroup(Adw.PreferencesGroup):
     _copy_password_button = Gtk.Template.Child()
     _generate_password_button = Gtk.Template.Child()
     _password_entry_row = Gtk.Template.Child()
+    _password_reuse_label = Gtk.Template.Child()
     _username_entry_row = Gtk.Template.Child()
 
     _unlocked_database: UnlockedDatabase | None = None
+    _password_notify_id: int | None = None
 
     @property
     def username(self):
@@ -55,6 +58,35 @@ class CredentialsGroup(Adw.PreferencesGroup):
             GObject.BindingFlags.SYNC_CREATE | GObject.BindingFlags.BIDIRECTIONAL,
         )
 
+        self._password_notify_id = self._safe_entry.connect(
+            "notify::password", self._on_password_notify
+        )
+        self._on_password_notify(self._safe_entry, None)
+
+        if self._safe_entry.read_only:
+            self._username_entry_row.props.editable = False
+            self._password_entry_row.props.editable = False
+            self._generate_password_button.props.visible = False
+
+    def do_unroot(self) -> None:  # pylint: disable=arguments-differ
+        if self._password_notify_id is not None:
+            self._safe_entry.disconnect(self._password_notify_id)
+            self._password_notify_id = None
+
+        Adw.PreferencesGroup.do_unroot(self)
+
+    def _on_password_notify(self, safe_entry: SafeEntry, _pspec) -> None:
+        others = self._db_manager.entries_with_password(safe_entry.props.password)
+        others.discard(safe_entry.uuid)
+        if n_others := len(others):
+            self._password_reuse_label.props.label = ngettext(
+                "Password used by {} other entry",
+                "Password used by {} other entries",
+                n_others,
+            ).format(n_others)
+
+        self._password_reuse_label.props.visible = bool(n_others)
+
     @Gtk.Template.Callback()
     def _on_copy_password_button_clicked(self, _widget: Gtk.Button) -> None:
         self.copy_password()
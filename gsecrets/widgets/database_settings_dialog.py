@@ -3,14 +3,24 @@ from __future__ import annotations
 
 import logging
 import os
-import threading
 from gettext import gettext as _
+from gettext import ngettext
 from pathlib import Path
 
 from gi.repository import Adw, Gio, GLib, Gtk
 
+import gsecrets.config_manager as config
+from gsecrets import compression
+from gsecrets.password_audit import OLD_PASSWORD_AGE
 from gsecrets.utils import KeyFileFilter
-from gsecrets.utils import format_time, generate_keyfile_async, generate_keyfile_finish
+from gsecrets.utils import (
+    format_cipher,
+    format_kdf,
+    format_kdf_parameters,
+    format_time,
+    generate_keyfile_async,
+    generate_keyfile_finish,
+)
 
 
 @Gtk.Template(resource_path="/org/gnome/World/Secrets/gtk/database_settings_dialog.ui")
@@ -26,23 +36,45 @@ class DatabaseSettingsDialog(Adw.PreferencesWindow):
     new_keyfile_hash = None
     new_keyfile_path = None
 
-    entries_number = None
-    groups_number = None
-    passwords_number = None
+    # Elements in the trash bin older than this many days are purged when
+    # compacting the safe.
+    trash_max_age = 30
+
+    # In the same order as the items of compression_combo_row.
+    compression_options = [compression.NONE, "fast", "balanced", "maximum"]
+    compression_estimates: dict[str, compression.CompressionEstimate] = {}
 
     auth_apply_button = Gtk.Template.Child()
+    auth_page = Gtk.Template.Child()
     select_keyfile_button = Gtk.Template.Child()
     generate_keyfile_button = Gtk.Template.Child()
 
     level_bar = Gtk.Template.Child()
 
+    backups_row = Gtk.Template.Child()
+    breach_check_button = Gtk.Template.Child()
+    breached_row = Gtk.Template.Child()
+    expired_row = Gtk.Template.Child()
+    old_row = Gtk.Template.Child()
+    reused_row = Gtk.Template.Child()
+    weak_row = Gtk.Template.Child()
+    compact_button = Gtk.Template.Child()
+    compression_combo_row = Gtk.Template.Child()
+    compact_progress_bar = Gtk.Template.Child()
+
     keyfile_error_revealer = Gtk.Template.Child()
 
     encryption_algorithm_row = Gtk.Template.Child()
     date_row = Gtk.Template.Child()
     derivation_algorithm_row = Gtk.Template.Child()
+    derivation_parameters_row = Gtk.Template.Child()
+    attachments_size_row = Gtk.Template.Child()
+    compression_row = Gtk.Template.Child()
     n_entries_row = Gtk.Template.Child()
+    n_expired_row = Gtk.Template.Child()
     n_groups_row = Gtk.Template.Child()
+    n_history_row = Gtk.Template.Child()
+    n_otp_row = Gtk.Template.Child()
     n_passwords_row = Gtk.Template.Child()
     name_row = Gtk.Template.Child()
     path_row = Gtk.Template.Child()
@@ -58,6 +90,8 @@ class DatabaseSettingsDialog(Adw.PreferencesWindow):
 
         self.unlocked_database = unlocked_database
         self.database_manager = unlocked_database.database_manager
+        # Rows of the last breach check, removed when checking again.
+        self._breached_rows: list[Adw.ActionRow] = []
 
         self.__setup_widgets()
         self.__setup_signals()
@@ -75,10 +109,17 @@ class DatabaseSettingsDialog(Adw.PreferencesWindow):
         self.set_transient_for(self.unlocked_database.window)
 
         self.set_detail_values()
-
-        stats_thread = threading.Thread(target=self.start_stats_thread)
-        stats_thread.daemon = True
-        stats_thread.start()
+        self.set_stats_values()
+        self.set_compression_values()
+        self.set_backups_values()
+        self.set_health_values()
+
+        # Read-only safes are never saved, nothing that changes them is
+        # offered.
+        if self.database_manager.props.read_only:
+            self.auth_page.props.sensitive = False
+            self.compression_combo_row.props.sensitive = False
+            self.compact_button.props.sensitive = False
 
     @Gtk.Template.Callback()
     def on_password_entry_changed(self, _entry: Gtk.Entry) -> None:
@@ -320,28 +361,49 @@ class DatabaseSettingsDialog(Adw.PreferencesWindow):
         self.new_password_entry.props.text = password
 
     def set_detail_values(self):
+        gfile = self.database_manager.gfile
+
         # Name
-        self.name_row.props.subtitle = Path(self.database_manager.path).stem
+        self.name_row.props.subtitle = Path(gfile.get_basename()).stem
 
         # Path
         path = self.database_manager.path
-        gfile = Gio.File.new_for_path(path)
-        if "/home/" in path:
+        if gfile.get_path() is not None and "/home/" in path:
             self.path_row.props.subtitle = "~/" + os.path.relpath(path)
         else:
             self.path_row.props.subtitle = path
 
-        # Size
+        # Size and Date
         def query_info_cb(gfile, result):
             try:
                 file_info = gfile.query_info_finish(result)
             except GLib.Error as err:
                 logging.error("Could not query file info: %s", err.message)
-            else:
-                size = file_info.get_size()  # In bytes.
-                self.size_row.props.subtitle = GLib.format_size(size)
+                return
 
-        attributes = Gio.FILE_ATTRIBUTE_STANDARD_SIZE
+            size = file_info.get_size()  # In bytes.
+            self.size_row.props.subtitle = GLib.format_size(size)
+
+            # TODO g_file_info_get_creation_date_time introduced in GLib 2.70.
+            # Not all file systems record the creation time, the time of the
+            # last status change is shown instead, as stat does.
+            for attribute in (
+                Gio.FILE_ATTRIBUTE_TIME_CREATED,
+                Gio.FILE_ATTRIBUTE_TIME_CHANGED,
+            ):
+                if file_info.has_attribute(attribute):
+                    epoch_time = file_info.get_attribute_uint64(attribute)
+                    gdate = GLib.DateTime.new_from_unix_utc(epoch_time)
+                    self.date_row.props.subtitle = format_time(gdate)
+                    break
+
+        attributes = ",".join(
+            [
+                Gio.FILE_ATTRIBUTE_STANDARD_SIZE,
+                Gio.FILE_ATTRIBUTE_TIME_CREATED,
+                Gio.FILE_ATTRIBUTE_TIME_CHANGED,
+            ]
+        )
         gfile.query_info_async(
             attributes,
             Gio.FileQueryInfoFlags.NONE,
@@ -350,58 +412,271 @@ class DatabaseSettingsDialog(Adw.PreferencesWindow):
             query_info_cb,
         )
 
+        # The version and algorithms are read from the header of the file.
+        self.database_manager.read_header_async(self._on_read_header)
+
+    def _on_read_header(self, database_manager, result):
+        try:
+            header = database_manager.read_header_finish(result)
+        except GLib.Error as err:
+            logging.error("Could not read safe header: %s", err.message)
+            return
+
         # Version
-        version = self.database_manager.db.version
+        version = header.version
         self.version_row.props.subtitle = str(version[0]) + "." + str(version[1])
 
-        # Date
-        # TODO g_file_info_get_creation_date_time introduced in GLib 2.70.
-        epoch_time = os.path.getctime(path)  # Time since UNIX epoch.
-        gdate = GLib.DateTime.new_from_unix_utc(epoch_time)
-        self.date_row.props.subtitle = format_time(gdate)
-
         # Encryption Algorithm
-        enc_alg = _("Unknown")
-        enc_alg_priv = self.database_manager.db.encryption_algorithm
-        if enc_alg_priv == "aes256":
-            # NOTE: AES is a proper name
-            enc_alg = _("AES 256-bit")
-        elif enc_alg_priv == "chacha20":
-            # NOTE: ChaCha20 is a proper name
-            enc_alg = _("ChaCha20 256-bit")
-        elif enc_alg_priv == "twofish":
-            # NOTE: Twofish is a proper name
-            enc_alg = _("Twofish 256-bit")
-        self.encryption_algorithm_row.props.subtitle = enc_alg
+        self.encryption_algorithm_row.props.subtitle = format_cipher(header.cipher)
 
         # Derivation Algorithm
-        der_alg = _("Unknown")
-        der_alg_priv = self.database_manager.db.kdf_algorithm
-        if der_alg_priv == "argon2":
-            # NOTE: Argon2 is a proper name
-            der_alg = _("Argon2")
-        if der_alg_priv == "argon2id":
-            # NOTE: Argon2id is a proper name
-            der_alg = _("Argon2id")
-        elif der_alg_priv == "aeskdf":
-            # NOTE: AES-KDF is a proper name
-            der_alg = _("AES-KDF")
-
-        self.derivation_algorithm_row.props.subtitle = der_alg
+        self.derivation_algorithm_row.props.subtitle = format_kdf(header.kdf)
+
+        # Derivation Parameters
+        parameters = format_kdf_parameters(header)
+        self.derivation_parameters_row.props.subtitle = parameters or _("Unknown")
+
+        # Compression
+        compression = _("Unknown")
+        if header.compression == "gzip":
+            # NOTE: GZip is a proper name
+            compression = _("GZip")
+        elif header.compression == "none":
+            compression = _("None")
+
+        self.compression_row.props.subtitle = compression
 
     def set_stats_values(self):
-        self.n_entries_row.props.subtitle = str(self.entries_number)
-        self.n_groups_row.props.subtitle = str(self.groups_number)
-        self.n_passwords_row.props.subtitle = str(self.passwords_number)
-
-    def start_stats_thread(self):
-        self.entries_number = len(self.database_manager.entries)
-        self.groups_number = len(self.database_manager.groups)
-        self.passwords_number = 0
-        for entry in self.database_manager.entries:
-            if entry.password is not None and entry.password != "":
-                self.passwords_number = self.passwords_number + 1
-        GLib.idle_add(self.set_stats_values)
+        stats = self.database_manager.get_statistics()
+        self.n_entries_row.props.subtitle = str(stats.entries)
+        self.n_groups_row.props.subtitle = str(stats.groups)
+        self.n_passwords_row.props.subtitle = str(stats.passwords)
+        self.n_otp_row.props.subtitle = str(stats.otp)
+        self.n_expired_row.props.subtitle = str(stats.expired)
+        self.n_history_row.props.subtitle = str(stats.history)
+        self.attachments_size_row.props.subtitle = GLib.format_size(
+            stats.attachment_bytes
+        )
+
+    def set_compression_values(self):
+        option = self.database_manager.compression
+        self.compression_combo_row.props.selected = self.compression_options.index(
+            option
+        )
+        self.compression_combo_row.connect(
+            "notify::selected", self._on_compression_selected
+        )
+        self.database_manager.estimate_compression_async(self._on_estimate_compression)
+
+    def _on_estimate_compression(self, database_manager, result):
+        try:
+            self.compression_estimates = database_manager.estimate_compression_finish(
+                result
+            )
+        except GLib.Error as err:
+            logging.error("Could not estimate compression: %s", err.message)
+        else:
+            self._update_compression_subtitle()
+
+    def _update_compression_subtitle(self):
+        option = self.compression_options[self.compression_combo_row.props.selected]
+        if estimate := self.compression_estimates.get(option):
+            # NOTE: The first placeholder is a file size, e.g. 3.2 MB, the
+            # second one the number of milliseconds needed to compress the safe.
+            subtitle = _("About {}, {} ms to compress").format(
+                GLib.format_size(estimate.size), round(estimate.seconds * 1000)
+            )
+            self.compression_combo_row.props.subtitle = subtitle
+
+    def _on_compression_selected(self, combo_row, _pspec):
+        option = self.compression_options[combo_row.props.selected]
+        if option != self.database_manager.compression:
+            self.unlocked_database.start_database_lock_timer()
+            self.database_manager.compression = option
+
+        self._update_compression_subtitle()
+
+    def set_backups_values(self):
+        self.database_manager.list_backups_async(self._on_list_backups)
+
+    def _on_list_backups(self, database_manager, result):
+        try:
+            backups = database_manager.list_backups_finish(result)
+        except GLib.Error as err:
+            logging.error("Could not list backups: %s", err.message)
+            return
+
+        self.backups_row.props.sensitive = bool(backups)
+        self.backups_row.props.subtitle = ngettext(
+            "{} backup", "{} backups", len(backups)
+        ).format(len(backups))
+
+        for backup in backups:
+            gdate = GLib.DateTime.new_from_unix_utc(backup.time)
+            row = Adw.ActionRow()
+            row.props.title = format_time(gdate)
+            row.props.subtitle = GLib.format_size(backup.size)
+
+            button = Gtk.Button.new_with_mnemonic(_("_Restore"))
+            button.props.valign = Gtk.Align.CENTER
+            button.props.sensitive = not database_manager.props.read_only
+            button.connect("clicked", self._on_restore_button_clicked, backup)
+            row.add_suffix(button)
+
+            self.backups_row.add_row(row)
+
+    def _on_restore_button_clicked(self, _button, backup):
+        self.unlocked_database.start_database_lock_timer()
+
+        dialog = Adw.MessageDialog.new(
+            self,
+            _("Restore Previous Version?"),
+            _("Unsaved changes will be lost. The current version of the safe is backed up first."),  # pylint: disable=line-too-long # noqa: E501
+        )
+        dialog.add_response("cancel", _("_Cancel"))
+        dialog.add_response("restore", _("_Restore"))
+        dialog.set_response_appearance(
+            "restore", Adw.ResponseAppearance.DESTRUCTIVE
+        )
+        dialog.connect("response::restore", self._on_restore_response, backup)
+        dialog.present()
+
+    def _on_restore_response(self, _dialog, _response, backup):
+        self.set_sensitive(False)
+        # The safe is reopened once the backup is restored.
+        self.unlocked_database.stop_save_loop()
+        self.database_manager.restore_backup_async(backup, self._on_restore_backup)
+
+    def _on_restore_backup(self, database_manager, result):
+        try:
+            database_manager.restore_backup_finish(result)
+        except GLib.Error as err:
+            logging.error("Could not restore backup: %s", err.message)
+            self.add_toast(Adw.Toast.new(_("Could not restore backup")))
+            self.set_sensitive(True)
+            self.unlocked_database.start_save_loop()
+        else:
+            window = self.unlocked_database.window
+            self.close()
+            window.reload_database()
+
+    def set_health_values(self):
+        self.database_manager.password_audit.audit_async(
+            OLD_PASSWORD_AGE, self._on_audit
+        )
+
+        if not config.get_breach_corpus_directory():
+            self.breach_check_button.props.sensitive = False
+            self.breached_row.props.subtitle = _(
+                "No breached passwords directory set"
+            )
+
+    def _on_audit(self, password_audit, result):
+        try:
+            report = password_audit.audit_finish(result)
+        except GLib.Error as err:
+            logging.error("Could not audit passwords: %s", err.message)
+            return
+
+        self._fill_health_row(self.weak_row, report.weak)
+        self._fill_health_row(self.reused_row, report.reused)
+        self._fill_health_row(self.old_row, report.old)
+        self._fill_health_row(self.expired_row, report.expired)
+
+    @staticmethod
+    def _fill_health_row(expander_row, safe_entries):
+        expander_row.props.sensitive = bool(safe_entries)
+        expander_row.props.subtitle = ngettext(
+            "{} entry", "{} entries", len(safe_entries)
+        ).format(len(safe_entries))
+
+        for safe_entry in safe_entries:
+            row = Adw.ActionRow()
+            row.props.title = GLib.markup_escape_text(
+                safe_entry.props.name or _("Title not Specified")
+            )
+            row.props.subtitle = GLib.markup_escape_text(
+                safe_entry.props.username
+            )
+            expander_row.add_row(row)
+
+    @Gtk.Template.Callback()
+    def on_breach_check_button_clicked(self, button: Gtk.Button) -> None:
+        self.unlocked_database.start_database_lock_timer()
+
+        button.set_sensitive(False)
+        self.breached_row.props.subtitle = _("Checking…")
+        self.database_manager.password_audit.check_breaches_async(
+            config.get_breach_corpus_directory(), self._on_check_breaches
+        )
+
+    def _on_check_breaches(self, password_audit, result):
+        self.breach_check_button.set_sensitive(True)
+        try:
+            breached = password_audit.check_breaches_finish(result)
+        except GLib.Error as err:
+            logging.error("Could not check breached passwords: %s", err.message)
+            self.breached_row.props.subtitle = _("Could not check passwords")
+            return
+
+        self.breached_row.props.subtitle = ngettext(
+            "{} entry", "{} entries", len(breached)
+        ).format(len(breached))
+        self.breached_row.props.enable_expansion = bool(breached)
+
+        for row in self._breached_rows:
+            self.breached_row.remove(row)
+
+        self._breached_rows.clear()
+
+        for safe_entry, count in breached:
+            row = Adw.ActionRow()
+            row.props.title = GLib.markup_escape_text(
+                safe_entry.props.name or _("Title not Specified")
+            )
+            # NOTE: Number of times a password appeared in known data breaches.
+            row.props.subtitle = ngettext(
+                "Seen {} time", "Seen {} times", count
+            ).format(count)
+            self.breached_row.add_row(row)
+            self._breached_rows.append(row)
+
+    @Gtk.Template.Callback()
+    def on_compact_button_clicked(self, button: Gtk.Button) -> None:
+        self.unlocked_database.start_database_lock_timer()
+
+        button.set_sensitive(False)
+        self.compact_progress_bar.set_fraction(0.0)
+        self.compact_progress_bar.set_visible(True)
+
+        def on_progress(fraction):
+            self.compact_progress_bar.set_fraction(fraction)
+
+        self.database_manager.compact_async(
+            self.trash_max_age, on_progress, self._on_compact
+        )
+
+    def _on_compact(self, database_manager, result):
+        try:
+            report = database_manager.compact_finish(result)
+        except GLib.Error as err:
+            logging.error("Could not compact safe: %s", err.message)
+            self.add_toast(Adw.Toast.new(_("Could not compact safe")))
+        else:
+            for element_uuid in report.purged_elements:
+                self.unlocked_database.delete_page_by_uuid(element_uuid)
+
+            self.set_stats_values()
+
+            # NOTE: The two placeholders are file sizes, e.g. 3.2 MB
+            label = _("Safe compacted from {} to {}").format(
+                GLib.format_size(report.size_before),
+                GLib.format_size(report.size_after),
+            )
+            self.add_toast(Adw.Toast.new(label))
+        finally:
+            self.compact_progress_bar.set_visible(False)
+            self.compact_button.set_sensitive(True)
 
     def __on_locked(self, database_manager, _value):
         locked = database_manager.props.locked
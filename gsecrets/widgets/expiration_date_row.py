@@ -36,6 +36,7 @@ class ExpirationDateRow(Adw.Bin):
     @safe_entry.setter  # type: ignore
     def safe_entry(self, entry: SafeEntry) -> None:
         self._safe_entry = entry
+        self.props.sensitive = not entry.read_only
 
         entry.bind_property(
             "expires",
@@ -1,4 +1,6 @@
 # SPDX-License-Identifier: GPL-3.0-only
+from __future__ import annotations
+
 from gi.repository import Adw, Gio, Gtk
 
 from gsecrets import const
@@ -18,14 +20,23 @@ class LockedHeaderBar(Adw.Bin):
     def __init__(self):
         super().__init__()
 
+        self._menu: RecentFilesMenu | None = None
+
         self.set_menu()
         self.settings.connect(
             "changed::last-opened-list", self.on_settings_changed
         )
 
     def set_menu(self):
-        menu = RecentFilesMenu()
-        if menu.is_empty:
+        if self._menu is not None:
+            self._menu.cancel()
+
+        self._menu = RecentFilesMenu()
+        self._menu.connect("notify::is-empty", self._on_menu_is_empty_changed)
+        self._on_menu_is_empty_changed(self._menu, None)
+
+    def _on_menu_is_empty_changed(self, menu, _pspec):
+        if menu.props.is_empty:
             self.split_button.set_menu_model(None)
         else:
             self.split_button.set_menu_model(menu.menu)
@@ -1,7 +1,7 @@
 # SPDX-License-Identifier: GPL-3.0-only
 from __future__ import annotations
 
-from gi.repository import Adw, GObject, Gtk
+from gi.repository import Adw, Gio, GObject, Gtk
 
 from gsecrets.password_generator import strength_async
 
@@ -11,6 +11,7 @@ class PasswordLevelBar(Adw.Bin):
     __gtype_name__ = "PasswordLevelBar"
 
     _password: str = ""
+    _cancellable: Gio.Cancellable | None = None
 
     def __init__(self) -> None:
         super().__init__()
@@ -38,7 +39,13 @@ class PasswordLevelBar(Adw.Bin):
     def password(self, password: str) -> None:
         self._password = password
 
+        # Only the strength of the latest password is relevant.
+        if self._cancellable is not None:
+            self._cancellable.cancel()
+
+        self._cancellable = Gio.Cancellable()
+
         def on_password(strength):
             self.level_bar.props.value = strength
 
-        strength_async(password, on_password)
+        strength_async(password, on_password, self._cancellable)
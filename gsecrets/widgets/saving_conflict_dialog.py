@@ -26,8 +26,7 @@ class SavingConflictDialog(Adw.MessageDialog):
             "The safe was modified from somewhere else. Saving will overwrite their version of the safe with our current version.\n\n You can also make a backup of their version of the safe."  # pylint: disable=line-too-long # noqa: E501
         )
 
-        gfile = Gio.File.new_for_path(db_manager.path)
-        file_name = os.path.splitext(gfile.get_basename())[0]
+        file_name = os.path.splitext(db_manager.gfile.get_basename())[0]
 
         self.add_response("cancel", _("_Cancel"))
         # TRANSLATORS backup and save current safe.
@@ -72,8 +71,7 @@ class SavingConflictDialog(Adw.MessageDialog):
             return
 
         if response == Gtk.ResponseType.ACCEPT:
-            gfile = Gio.File.new_for_path(self.db_manager.path)
-            gfile.copy_async(
+            self.db_manager.gfile.copy_async(
                 dest,
                 Gio.FileCopyFlags.OVERWRITE,
                 GLib.PRIORITY_DEFAULT,
@@ -1,7 +1,6 @@
 # SPDX-License-Identifier: GPL-3.0-only
 from __future__ import annotations
 
-import threading
 import typing
 
 from gi.repository import Adw, Gio, GLib, GObject, Gtk
@@ -9,7 +8,9 @@ from gi.repository import Adw, Gio, GLib, GObject, Gtk
 from pykeepass.group import Group
 
 from gsecrets.safe_element import SafeEntry, SafeGroup
+from gsecrets.scheduler import Job, Priority
 from gsecrets.sorting import SortingHat
+from gsecrets.utils import get_scheduler
 
 if typing.TYPE_CHECKING:
     from gsecrets.database_manager import DatabaseManager
@@ -36,6 +37,7 @@ class Search(Adw.Bin):
         self.unlocked_database: UnlockedDatabase = unlocked_database
         self._db_manager: DatabaseManager = unlocked_database.database_manager
         self._search_changed_id: int | None = None
+        self._search_job: Job | None = None
 
         self._search_entry = self.unlocked_database.search_entry
 
@@ -122,9 +124,15 @@ class Search(Adw.Bin):
         """Update the overlays and start a search
         if the search term is not empty.
         """
+        # A search which did not start yet is superseded by this one.
+        if self._search_job is not None:
+            self._search_job.cancel()
+            self._search_job = None
+
         if self._search_text:
-            search_thread = threading.Thread(target=self._perform_search)
-            search_thread.start()
+            self._search_job = get_scheduler().submit(
+                self._perform_search, Priority.INTERACTIVE
+            )
         else:
             self.stack.set_visible_child(self._info_search_page)
 
@@ -8,11 +8,15 @@ from logging import debug
 
 from gi.repository import Adw, Gio, GLib, GObject, Gtk
 
+import gsecrets.config_manager as config
 from gsecrets.entry_row import EntryRow
 from gsecrets.group_row import GroupRow
+from gsecrets.password_generator import generate_batch
 from gsecrets.pathbar import Pathbar
 
 if typing.TYPE_CHECKING:
+    from uuid import UUID
+
     from gsecrets.unlocked_database import UnlockedDatabase
 
 
@@ -25,12 +29,6 @@ class SelectionModeHeaderbar(Adw.Bin):
 
     _cut_mode = True
 
-    entries_selected: list[EntryRow] = []
-    groups_selected: list[GroupRow] = []
-
-    entries_cut: list[EntryRow] = []
-    groups_cut: list[GroupRow] = []
-
     hidden_rows = Gio.ListStore.new(Gtk.ListBoxRow)
 
     _cut_button = Gtk.Template.Child()
@@ -38,6 +36,7 @@ class SelectionModeHeaderbar(Adw.Bin):
     _delete_button = Gtk.Template.Child()
     _paste_button = Gtk.Template.Child()
     _pathbar_bin = Gtk.Template.Child()
+    _rotate_button = Gtk.Template.Child()
     _selection_options_button = Gtk.Template.Child()
 
     selected_elements = GObject.Property(type=int, default=0)
@@ -45,6 +44,13 @@ class SelectionModeHeaderbar(Adw.Bin):
     def __init__(self, unlocked_database):
         super().__init__()
 
+        # Selected rows, keyed by the UUID of their element.
+        self.entries_selected: dict[UUID, EntryRow] = {}
+        self.groups_selected: dict[UUID, GroupRow] = {}
+
+        self.entries_cut: dict[UUID, EntryRow] = {}
+        self.groups_cut: dict[UUID, GroupRow] = {}
+
         pathbar = Pathbar(unlocked_database)
         self._pathbar_bin.set_child(pathbar)
         unlocked_database.action_bar.bind_property(
@@ -89,7 +95,7 @@ class SelectionModeHeaderbar(Adw.Bin):
 
         # Abort the operation if there is a groups which is in the pathbar,
         # i.e. if it is a parent of the current view.
-        for group_row in self.groups_selected:
+        for group_row in self.groups_selected.values():
             group = group_row.safe_group.group
             if self.unlocked_database.database_manager.parent_checker(
                 self.unlocked_database.current_element, group
@@ -103,7 +109,7 @@ class SelectionModeHeaderbar(Adw.Bin):
         # bin and regular elements
         in_trash = False
         outside_trash = False
-        for entry_row in self.entries_selected:
+        for entry_row in self.entries_selected.values():
             element = entry_row.safe_entry
             parent = element.parentgroup
             if parent.is_trash_bin:
@@ -111,7 +117,7 @@ class SelectionModeHeaderbar(Adw.Bin):
             else:
                 outside_trash = True
 
-        for group_row in self.groups_selected:
+        for group_row in self.groups_selected.values():
             element = group_row.safe_group
             parent = element.parentgroup
             if parent.is_trash_bin or element.is_trash_bin:
@@ -122,23 +128,13 @@ class SelectionModeHeaderbar(Adw.Bin):
         mixed = in_trash and outside_trash
 
         def delete_elements():
-            # List of possible undos
-            undo_elements = []
-            for entry_row in self.entries_selected:
-                element = entry_row.safe_entry
-                parent = element.parentgroup
-                if entry_row.safe_entry.trash():
-                    self.unlocked_database.delete_page(element)
-                else:
-                    undo_elements.append((element, parent))
-
-            for group_row in self.groups_selected:
-                element = group_row.safe_group
-                parent = element.parentgroup
-                if group_row.safe_group.trash():
-                    self.unlocked_database.delete_page(element)
-                else:
-                    undo_elements.append((element, parent))
+            elements = [row.safe_entry for row in self.entries_selected.values()]
+            elements += [row.safe_group for row in self.groups_selected.values()]
+
+            database_manager = self.unlocked_database.database_manager
+            deleted, undo_elements = database_manager.trash_many(elements)
+            for element in deleted:
+                self.unlocked_database.delete_page(element)
 
             self.unlocked_database.deleted_notification(undo_elements)
             self._clear_all()
@@ -162,16 +158,65 @@ class SelectionModeHeaderbar(Adw.Bin):
         else:
             delete_elements()
 
+    @Gtk.Template.Callback()
+    def _on_rotate_button_clicked(self, _widget):
+        self.unlocked_database.start_database_lock_timer()
+
+        def response_rotate_cb(_dialog, _response):
+            self._rotate_passwords()
+
+        n_entries = len(self.entries_selected)
+        dialog = Adw.MessageDialog.new(
+            self.get_root(),
+            _("Generate New Passwords?"),
+            ngettext(
+                "The password of {} entry will be replaced, the current one is kept in its history.",  # pylint: disable=line-too-long # noqa: E501
+                "The passwords of {} entries will be replaced, the current ones are kept in their history.",  # pylint: disable=line-too-long # noqa: E501
+                n_entries,
+            ).format(n_entries),
+        )
+        dialog.add_response("cancel", _("Cancel"))
+        dialog.add_response("generate", _("Generate"))
+        dialog.set_response_appearance(
+            "generate", Adw.ResponseAppearance.DESTRUCTIVE
+        )
+        dialog.connect("response::generate", response_rotate_cb)
+        dialog.present()
+
+    def _rotate_passwords(self):
+        passwords = generate_batch(
+            len(self.entries_selected),
+            config.get_generator_length(),
+            config.get_generator_use_uppercase(),
+            config.get_generator_use_lowercase(),
+            config.get_generator_use_numbers(),
+            config.get_generator_use_symbols(),
+            config.get_generator_exclude_ambiguous(),
+        )
+        for entry_row, password in zip(self.entries_selected.values(), passwords):
+            safe_entry = entry_row.safe_entry
+            safe_entry.save_history()
+            safe_entry.props.password = password
+
+        n_entries = len(passwords)
+        self.unlocked_database.window.send_notification(
+            ngettext(
+                "Generated a new password", "Generated {} new passwords", n_entries
+            ).format(n_entries)
+        )
+        self.unlocked_database.save_database()
+        self._clear_all()
+
     @Gtk.Template.Callback()
     def _on_cut_button_clicked(self, _widget):
         self.unlocked_database.start_database_lock_timer()
 
-        self.entries_cut = self.entries_selected
-        self.groups_cut = self.groups_selected
-        for group_row in self.groups_selected:
+        self.entries_cut = dict(self.entries_selected)
+        self.groups_cut = dict(self.groups_selected)
+        for group_row in self.groups_selected.values():
             group_row.props.sensitive = False
             self.hidden_rows.append(group_row)
-        for entry_row in self.entries_selected:
+        for entry_row in self.entries_selected.values():
             entry_row.props.sensitive = False
             self.hidden_rows.append(entry_row)
 
@@ -188,7 +233,7 @@ class SelectionModeHeaderbar(Adw.Bin):
 
         # Abort the entire operation if one of the selected groups is a parent of
         # the current group.
-        for group_row in self.groups_cut:
+        for group_row in self.groups_cut.values():
             group = group_row.safe_group.group
             current_element = self.unlocked_database.current_element
             if self.unlocked_database.database_manager.parent_checker(
@@ -202,13 +247,9 @@ class SelectionModeHeaderbar(Adw.Bin):
 
         current_element = self.unlocked_database.current_element
 
-        for entry_row in self.entries_cut:
-            safe_entry = entry_row.safe_entry
-            safe_entry.move_to(current_element)
-
-        for group_row in self.groups_cut:
-            safe_group = group_row.safe_group
-            safe_group.move_to(current_element)
+        elements = [entry_row.safe_entry for entry_row in self.entries_cut.values()]
+        elements += [group_row.safe_group for group_row in self.groups_cut.values()]
+        self.unlocked_database.database_manager.move_many(elements, current_element)
 
         self.unlocked_database.window.send_notification(_("Move completed"))
         self._clear_all()
@@ -220,11 +261,12 @@ class SelectionModeHeaderbar(Adw.Bin):
         page = self.unlocked_database.get_current_page()
         list_box = page.list_box
 
-        for row in list_box:
-            if selection_type == "all":
-                row.selection_checkbox.set_active(True)
-            else:
-                row.selection_checkbox.set_active(False)
+        # Every toggled row updates the selection, the label is only updated
+        # once at the end.
+        active = selection_type == "all"
+        with self.freeze_notify():
+            for row in list_box:
+                row.selection_checkbox.set_active(active)
 
     # Helpers
 
@@ -233,7 +275,7 @@ class SelectionModeHeaderbar(Adw.Bin):
 
         :param EntryRow group: entry_row to add
         """
-        self.entries_selected.append(entry)
+        self.entries_selected[entry.safe_entry.uuid] = entry
         self._update_selection()
 
     def remove_entry(self, entry: EntryRow) -> None:
@@ -241,9 +283,7 @@ class SelectionModeHeaderbar(Adw.Bin):
 
         :param EntryRow group: entry_row to remove
         """
-        if entry in self.entries_selected:
-            self.entries_selected.remove(entry)
-
+        self.entries_selected.pop(entry.safe_entry.uuid, None)
         self._update_selection()
 
     def add_group(self, group: GroupRow) -> None:
@@ -251,24 +291,22 @@ class SelectionModeHeaderbar(Adw.Bin):
 
         :param GroupRow group: group_row to add
         """
-        if group not in self.groups_selected:
-            self.groups_selected.append(group)
-            self._update_selection()
+        self.groups_selected[group.safe_group.uuid] = group
+        self._update_selection()
 
     def remove_group(self, group: GroupRow) -> None:
         """Remove a group from selection
 
         :param GroupRow group: group_row to remove
         """
-        if group in self.groups_selected:
-            self.groups_selected.remove(group)
-
+        self.groups_selected.pop(group.safe_group.uuid, None)
         self._update_selection()
 
     def _update_selection(self) -> None:
-        non_empty_selection = self.entries_selected or self.groups_selected
+        non_empty_selection = bool(self.entries_selected or self.groups_selected)
         self._cut_button.set_sensitive(non_empty_selection)
         self._delete_button.set_sensitive(non_empty_selection)
+        self._rotate_button.set_sensitive(bool(self.entries_selected))
 
         self.props.selected_elements = len(self.entries_selected) + len(
             self.groups_selected
@@ -284,6 +322,7 @@ class SelectionModeHeaderbar(Adw.Bin):
         self.groups_selected.clear()
         self._delete_button.set_sensitive(False)
         self._cut_button.set_sensitive(False)
+        self._rotate_button.set_sensitive(False)
         for row in self.hidden_rows:
             row.props.sensitive = True
 
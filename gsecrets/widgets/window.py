@@ -221,13 +221,28 @@ class Window(Adw.ApplicationWindow):
         else:
             self.start_database_opening_routine(filepath)
 
-    def start_database_opening_routine(self, filepath: str) -> None:
-        """Start opening a safe file"""
-        # TODO Use a Gio.File instead of a path.
-        database = Gio.File.new_for_path(filepath)
+    def reload_database(self) -> None:
+        """Close the unlocked safe without saving it and open it again, used
+        after its file was replaced."""
+        database_manager = self.unlocked_db.database_manager
+        database_manager.is_dirty = False
+
+        self.unlocked_db.do_dispose()
+        self.unlocked_db = None
+        self.start_database_opening_routine(database_manager.gfile)
+
+    def start_database_opening_routine(self, database: str | Gio.File) -> None:
+        """Start opening a safe file
+
+        :param database: path of the safe or its Gio.File
+        """
+        if not isinstance(database, Gio.File):
+            database = Gio.File.new_for_path(database)
+
         unlock_db = UnlockDatabase(self, database)
         self._unlock_database_bin.props.child = unlock_db
         self.view = self.View.UNLOCK_DATABASE
+        self.application.update_locked_safes()
 
     #
     # Create Database Methods
@@ -546,6 +561,14 @@ class Window(Adw.ApplicationWindow):
     ) -> None:
         self.lookup_action("go_back").activate()
 
+    @property
+    def unlock_page(self) -> UnlockDatabase | None:
+        """The unlock page, if the window shows one."""
+        if self._view != self.View.UNLOCK_DATABASE:
+            return None
+
+        return self._unlock_database_bin.props.child
+
     @property
     def view(self) -> View:
         return self._view
@@ -0,0 +1,33 @@
+# SPDX-License-Identifier: GPL-3.0-only
+from gsecrets.backup import BackupStore
+
+
+def test_snapshot_deduplicates(tmp_path):
+    store = BackupStore(str(tmp_path / "safe"), 10, 1024)
+
+    first = store.snapshot(b"first version")
+    assert first is not None
+    assert store.snapshot(b"first version") is None
+
+    second = store.snapshot(b"second version")
+    assert [backup.digest for backup in store.backups()] == [
+        second.digest,
+        first.digest,
+    ]
+    assert store.read(first) == b"first version"
+
+
+def test_prune(tmp_path):
+    store = BackupStore(str(tmp_path / "safe"), 3, 1024)
+    for i in range(5):
+        store.snapshot(bytes([i]) * 100)
+
+    backups = store.backups()
+    assert [store.read(backup)[0] for backup in backups] == [4, 3, 2]
+
+    # The size budget only keeps what fits, but never the newest backup.
+    store.max_bytes = 250
+    assert len(store.prune()) == 1
+    store.max_bytes = 10
+    store.prune()
+    assert [store.read(backup)[0] for backup in store.backups()] == [4]
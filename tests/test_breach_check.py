@@ -0,0 +1,44 @@
+# SPDX-License-Identifier: GPL-3.0-only
+import pytest
+
+from gsecrets.breach_check import BreachChecker, sha1_hex
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    breached = {"password": 3861493, "123456": 37359195, "letmein": 2}
+    ranges = {}
+    for password, count in breached.items():
+        sha1 = sha1_hex(password)
+        ranges.setdefault(sha1[:5], []).append((sha1[5:], count))
+
+    # Padding so that the searches go through several lines.
+    for prefix, lines in ranges.items():
+        lines.extend((f"{i:035X}", 1) for i in range(100))
+        lines.sort()
+        content = "".join(f"{suffix}:{count}\r\n" for suffix, count in lines)
+        (tmp_path / f"{prefix}.txt").write_text(content)
+
+    return tmp_path
+
+
+def test_breach_check(corpus):
+    checker = BreachChecker(str(corpus))
+    hashes = [sha1_hex(p) for p in ("password", "123456", "letmein", "unbreached")]
+
+    results = checker.check(hashes)
+    assert results == dict(zip(hashes, [3861493, 37359195, 2, 0]))
+
+    # Cached results do not need the corpus anymore.
+    for path in corpus.iterdir():
+        path.unlink()
+
+    assert checker.check(hashes[:1]) == {hashes[0]: 3861493}
+
+
+def test_breach_check_malformed(tmp_path):
+    sha1 = sha1_hex("password")
+    (tmp_path / f"{sha1[:5]}.txt").write_text(f"{sha1[5:]}:many\r\n")
+
+    with pytest.raises(ValueError):
+        BreachChecker(str(tmp_path)).check([sha1])
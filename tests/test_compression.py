@@ -0,0 +1,41 @@
+# SPDX-License-Identifier: GPL-3.0-only
+import io
+import os
+
+from pykeepass import PyKeePass
+
+from gsecrets import compression
+
+PASSWORD = "dYIhZjdqNiVcGLDr"
+PATH = os.path.join(os.path.dirname(__file__), "data", "Test2Groups.kdbx")
+
+
+def save(db, level):
+    buffer = io.BytesIO()
+    with compression.compression_level(level):
+        db.save(buffer)
+
+    return buffer.getvalue()
+
+
+def test_compression_level():
+    db = PyKeePass(PATH, PASSWORD)
+    group = db.add_group(db.root_group, "Notes")
+    for i in range(50):
+        db.add_entry(group, f"Entry {i}", "user", "password", notes="lorem " * 50)
+
+    stored = save(db, 0)
+    compressed = save(db, 9)
+    assert len(stored) > len(compressed)
+
+    db = PyKeePass(io.BytesIO(compressed), PASSWORD)
+    assert len(db.find_groups(name="Notes", first=True).entries) == 50
+
+
+def test_estimate():
+    data = b"lorem ipsum " * 1000
+    estimates = compression.estimate(data)
+
+    assert estimates.keys() == {compression.NONE, *compression.LEVELS}
+    assert estimates[compression.NONE].size == len(data)
+    assert estimates["maximum"].size < len(data)
@@ -1,5 +1,6 @@
 # SPDX-License-Identifier: GPL-3.0-only
 import os
+from datetime import datetime, timedelta, timezone
 
 import pytest
 from pykeepass import PyKeePass
@@ -8,6 +9,7 @@ import gi
 
 gi.require_version("Gtk", "4.0")
 
+from gsecrets import compression
 from gsecrets.database_manager import DatabaseManager
 from gsecrets.safe_element import EntryColor, SafeGroup, SafeEntry, ICONS
 
@@ -150,3 +152,206 @@ def test_delete_entry(db_pwd):
 
     tmp_entry.delete()
     assert len(root_group.entries) == nr_entries - 1
+
+
+def test_attachment_deduplication(db_pwd):
+    root_group = SafeGroup.get_root(db_pwd)
+    nr_binaries = len(db_pwd.db.binaries)
+
+    first_entry = root_group.new_entry("first")
+    second_entry = root_group.new_entry("second")
+    first_attachment = first_entry.add_attachment(b"content", "first.txt")
+    second_attachment = second_entry.add_attachment(b"content", "second.txt")
+    assert first_attachment.id == second_attachment.id
+    assert len(db_pwd.db.binaries) == nr_binaries + 1
+
+    first_entry.delete_attachment(first_attachment)
+    assert second_entry.get_attachment_content(second_attachment) == b"content"
+
+    second_entry.delete_attachment(second_attachment)
+    assert len(db_pwd.db.binaries) == nr_binaries
+
+    first_entry.delete()
+    second_entry.delete()
+
+
+def test_password_index(db_pwd):
+    root_group = SafeGroup.get_root(db_pwd)
+
+    first_entry = root_group.new_entry("first", password="secret")
+    second_entry = root_group.new_entry("second")
+    assert db_pwd.entries_with_password("secret") == {first_entry.uuid}
+
+    second_entry.props.password = "secret"
+    assert db_pwd.entries_with_password("secret") == {
+        first_entry.uuid,
+        second_entry.uuid,
+    }
+
+    first_entry.props.password = "other"
+    assert db_pwd.entries_with_password("secret") == {second_entry.uuid}
+    assert db_pwd.entries_with_password("other") == {first_entry.uuid}
+
+    first_entry.delete()
+    second_entry.delete()
+    assert not db_pwd.entries_with_password("secret")
+
+
+def test_password_index_trash(db_pwd):
+    root_group = SafeGroup.get_root(db_pwd)
+
+    first_entry = root_group.new_entry("first", password="secret")
+    second_entry = root_group.new_entry("second", password="secret")
+    assert db_pwd.entries_with_password("secret") == {
+        first_entry.uuid,
+        second_entry.uuid,
+    }
+
+    # Trashing an entry does not remove the other entries from the index.
+    assert not second_entry.trash()
+    assert db_pwd.entries_with_password("secret") == {first_entry.uuid}
+
+    second_entry.move_to(root_group)
+    assert db_pwd.entries_with_password("secret") == {
+        first_entry.uuid,
+        second_entry.uuid,
+    }
+
+    first_entry.delete()
+    second_entry.delete()
+    assert SafeGroup.get_trash_bin(db_pwd).trash()
+    assert not db_pwd.entries_with_password("secret")
+
+
+def test_statistics(db_pwd):
+    root_group = SafeGroup.get_root(db_pwd)
+    stats = db_pwd.get_statistics()
+
+    safe_entry = root_group.new_entry("entry", password="secret")
+    safe_entry.add_attachment(b"content", "file.txt")
+    safe_entry.save_history()
+    new_stats = db_pwd.get_statistics()
+    assert new_stats.entries == stats.entries + 1
+    assert new_stats.passwords == stats.passwords + 1
+    assert new_stats.attachment_bytes == stats.attachment_bytes + len(b"content")
+    assert new_stats.history == stats.history + 1
+
+    safe_entry.delete()
+    assert db_pwd.get_statistics() == stats
+
+
+def test_statistics_shared_binary(db_pwd):
+    root_group = SafeGroup.get_root(db_pwd)
+    stats = db_pwd.get_statistics()
+
+    # Identical attachments share the same binary, it is counted once.
+    first_entry = root_group.new_entry("first")
+    second_entry = root_group.new_entry("second")
+    first_entry.add_attachment(b"shared content", "first.txt")
+    second_entry.add_attachment(b"shared content", "second.txt")
+    new_stats = db_pwd.get_statistics()
+    assert new_stats.attachment_bytes == (
+        stats.attachment_bytes + len(b"shared content")
+    )
+
+    first_entry.delete()
+    assert db_pwd.get_statistics() == new_stats._replace(
+        entries=new_stats.entries - 1
+    )
+
+    second_entry.delete()
+    assert db_pwd.get_statistics() == stats
+
+
+def test_parent_checker(db_pwd):
+    root_group = SafeGroup.get_root(db_pwd)
+    parent = root_group.new_subgroup("parent")
+    child = parent.new_subgroup("child")
+
+    assert db_pwd.parent_checker(child, parent)
+    assert db_pwd.parent_checker(child, child)
+    assert not db_pwd.parent_checker(parent, child)
+    # The root group is never considered an ancestor.
+    assert not db_pwd.parent_checker(child, root_group)
+
+    child.delete()
+    parent.delete()
+
+
+def test_move_and_trash_many(db_pwd):
+    root_group = SafeGroup.get_root(db_pwd)
+    dest = root_group.new_subgroup("dest")
+    entries = [root_group.new_entry(f"entry {i}") for i in range(5)]
+
+    db_pwd.move_many(entries, dest)
+    assert all(entry.parentgroup == dest for entry in entries)
+
+    deleted, trashed = db_pwd.trash_many(entries)
+    assert not deleted
+    assert [parent for _entry, parent in trashed] == [dest] * 5
+    assert all(entry.parentgroup.is_trash_bin for entry in entries)
+
+    deleted, trashed = db_pwd.trash_many(entries)
+    assert not trashed
+    assert len(deleted) == 5
+    assert not any(entry in db_pwd.entries for entry in entries)
+
+    db_pwd.delete_many([dest, SafeGroup.get_trash_bin(db_pwd)])
+    assert db_pwd.trash_bin is None
+
+
+def test_purge_recently_trashed(db_pwd):
+    root_group = SafeGroup.get_root(db_pwd)
+    old = datetime.now(timezone.utc) - timedelta(days=60)
+
+    recent = root_group.new_entry("trashed recently")
+    recent.entry.mtime = old
+    recent.entry._set_times_property("LocationChanged", old)
+    recent.trash()
+
+    expired = root_group.new_entry("trashed long ago")
+    expired.trash()
+    expired.entry._set_times_property("LocationChanged", old)
+
+    purged = db_pwd._purge_trash_bin(30)
+    assert recent.uuid not in purged
+    assert expired.uuid in purged
+
+
+def test_read_only_compression(db_pwd):
+    before = db_pwd.compression
+    other = compression.NONE if before != compression.NONE else compression.DEFAULT
+
+    db_pwd.props.read_only = True
+    try:
+        db_pwd.compression = other
+        assert db_pwd.compression == before
+    finally:
+        db_pwd.props.read_only = False
+
+
+def test_apply_compaction(db_pwd):
+    root_group = SafeGroup.get_root(db_pwd)
+    safe_entry = root_group.new_entry("duplicates")
+
+    # pykeepass stores identical binaries twice.
+    first_id = db_pwd.db.add_binary(b"duplicate")
+    second_id = db_pwd.db.add_binary(b"duplicate")
+    safe_entry.entry.add_attachment(first_id, "first.txt")
+    safe_entry.entry.add_attachment(second_id, "second.txt")
+
+    digests = db_pwd._binary_digests()
+    assert digests[first_id] == digests[second_id]
+
+    removed, deduplicated, _pruned, _purged = db_pwd._apply_compaction(
+        36500, digests
+    )
+    assert deduplicated >= 1
+    assert removed >= 1
+    assert db_pwd.is_dirty
+
+    ids = {attachment.id for attachment in safe_entry.entry.attachments}
+    assert len(ids) == 1
+    assert bytes(db_pwd.get_binary(ids.pop())) == b"duplicate"
+
+    safe_entry.delete()
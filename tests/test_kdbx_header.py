@@ -0,0 +1,67 @@
+# SPDX-License-Identifier: GPL-3.0-only
+import struct
+from pathlib import Path
+
+import pytest
+
+from gsecrets.kdbx_header import (
+    HEADER_READ_SIZE,
+    HeaderError,
+    TruncatedHeaderError,
+    parse_header,
+)
+
+KDBX_PATH = Path(__file__).parent / "data" / "Test2Groups.kdbx"
+
+
+def kdbx3_header(rounds):
+    data = struct.pack("<IIHH", 0x9AA2D903, 0xB54BFB67, 1, 3)
+    fields = [
+        (2, bytes.fromhex("31c1f2e6bf714350be5805216afc5aff")),
+        (3, struct.pack("<I", 0)),
+        (6, struct.pack("<Q", rounds)),
+        (0, b"\r\n\r\n"),
+    ]
+    for field_id, value in fields:
+        data += struct.pack("<BH", field_id, len(value)) + value
+
+    return data
+
+
+def test_parse_kdbx4():
+    header = parse_header(KDBX_PATH.read_bytes()[:HEADER_READ_SIZE])
+
+    assert header.version == (4, 0)
+    assert header.cipher == "chacha20"
+    assert header.kdf == "argon2"
+    assert header.compression == "gzip"
+    assert header.memory == 64 * 1024 * 1024
+    assert header.iterations == 21
+    assert header.parallelism == 4
+    assert header.rounds is None
+
+
+def test_parse_kdbx3():
+    header = parse_header(kdbx3_header(60000))
+
+    assert header.version == (3, 1)
+    assert header.cipher == "aes256"
+    assert header.kdf == "aeskdf"
+    assert header.compression == "none"
+    assert header.rounds == 60000
+    assert header.memory is None
+
+
+def test_parse_invalid():
+    with pytest.raises(HeaderError) as excinfo:
+        parse_header(b"not a safe at all")
+    assert not isinstance(excinfo.value, TruncatedHeaderError)
+
+
+def test_parse_truncated():
+    data = kdbx3_header(6000)
+    for size in (4, 20, len(data) - 1):
+        with pytest.raises(TruncatedHeaderError):
+            parse_header(data[:size])
+
+    assert parse_header(data).rounds == 6000
@@ -0,0 +1,70 @@
+# SPDX-License-Identifier: GPL-3.0-only
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import gi
+
+gi.require_version("Gtk", "4.0")
+
+from gsecrets import password_audit  # noqa: E402
+from gsecrets.password_audit import (  # noqa: E402
+    WEAK_SCORE,
+    _build_report,
+    _score_passwords,
+)
+from gsecrets.password_generator import strength  # noqa: E402
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def fake_entry(mtime, expired=False):
+    return SimpleNamespace(
+        uuid=uuid4(),
+        entry=SimpleNamespace(mtime=mtime),
+        props=SimpleNamespace(expired=expired),
+    )
+
+
+def test_score_passwords(monkeypatch):
+    passwords = ["password", "correct horse battery staple", "Xk#9v!Lq2@zR"]
+    expected = [strength(password) for password in passwords]
+
+    assert _score_passwords(passwords) == expected
+
+    # Large audits are scored in a process pool.
+    monkeypatch.setattr(password_audit, "POOL_THRESHOLD", 0)
+    assert _score_passwords(passwords) == expected
+
+
+def test_build_report():
+    weak = fake_entry(NOW)
+    reused = [fake_entry(NOW), fake_entry(NOW)]
+    old = fake_entry(NOW - timedelta(days=400))
+    expired = fake_entry(NOW, expired=True)
+    stale = fake_entry(NOW)
+
+    snapshot = [
+        (weak, b"weak"),
+        (reused[0], b"reused"),
+        (reused[1], b"reused"),
+        (old, b"old"),
+        (expired, b"expired"),
+        (stale, b"new"),
+    ]
+    scores = {
+        weak.uuid: (b"weak", WEAK_SCORE - 1),
+        reused[0].uuid: (b"reused", 4),
+        reused[1].uuid: (b"reused", 4),
+        old.uuid: (b"old", 4),
+        expired.uuid: (b"expired", 4),
+        # The password changed since it was scored.
+        stale.uuid: (b"old", 0),
+    }
+
+    report = _build_report(snapshot, scores, timedelta(days=365), NOW)
+
+    assert report.weak == [weak]
+    assert report.reused == reused
+    assert report.old == [old]
+    assert report.expired == [expired]
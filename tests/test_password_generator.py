@@ -0,0 +1,116 @@
+# SPDX-License-Identifier: GPL-3.0-only
+import string
+from collections import Counter
+
+import pytest
+
+import gi
+
+gi.require_version("Gtk", "4.0")
+
+from gsecrets import passphrase_generator  # noqa: E402
+from gsecrets.passphrase_generator import generate_passphrases  # noqa: E402
+from gsecrets.password_generator import (  # noqa: E402
+    AMBIGUOUS_CHARACTERS,
+    PasswordPolicy,
+    _random_characters,
+    generate_batch,
+    generate_with_policy,
+)
+
+
+def test_random_characters():
+    # 256 is not a multiple of 7, bytes above 252 have to be rejected.
+    alphabet = "abcdefg"
+    characters = _random_characters(alphabet, 7000)
+    assert len(characters) == 7000
+
+    counts = Counter(characters)
+    assert set(counts) == set(alphabet)
+    assert all(800 < count < 1200 for count in counts.values())
+
+    assert _random_characters(alphabet, 0) == ""
+    assert _random_characters("x", 5) == "xxxxx"
+
+
+def test_policy_required_classes():
+    policy = PasswordPolicy(
+        12,
+        min_uppercase=2,
+        min_lowercase=3,
+        min_numbers=4,
+        min_symbols=1,
+    )
+    for password in generate_with_policy(policy, 20):
+        assert len(password) == 12
+        assert sum(char in string.ascii_uppercase for char in password) >= 2
+        assert sum(char in string.ascii_lowercase for char in password) >= 3
+        assert sum(char in string.digits for char in password) >= 4
+        assert sum(char in string.punctuation for char in password) >= 1
+
+
+def test_policy_disabled_and_excluded():
+    policy = PasswordPolicy(
+        30,
+        use_symbols=False,
+        exclude="abcXYZ",
+        exclude_ambiguous=True,
+    )
+    for password in generate_with_policy(policy, 20):
+        assert len(password) == 30
+        assert not set(password) & set("abcXYZ" + AMBIGUOUS_CHARACTERS)
+        assert not set(password) & set(string.punctuation)
+
+
+def test_policy_invalid():
+    with pytest.raises(ValueError):
+        generate_with_policy(PasswordPolicy(3, min_numbers=2, min_symbols=2))
+
+    with pytest.raises(ValueError):
+        generate_with_policy(
+            PasswordPolicy(10, min_numbers=1, exclude=string.digits)
+        )
+
+    with pytest.raises(ValueError):
+        generate_with_policy(
+            PasswordPolicy(
+                10,
+                use_uppercase=False,
+                use_lowercase=False,
+                use_symbols=False,
+                exclude=string.digits,
+            )
+        )
+
+
+def test_generate_batch():
+    passwords = generate_batch(50, 20, True, True, True, True)
+    assert len(passwords) == 50
+    assert len(set(passwords)) == 50
+
+    for password in passwords:
+        assert len(password) == 20
+        assert any(char in string.ascii_uppercase for char in password)
+        assert any(char in string.ascii_lowercase for char in password)
+        assert any(char in string.digits for char in password)
+        assert any(char in string.punctuation for char in password)
+
+    # Too short to contain every class.
+    passwords = generate_batch(5, 2, True, True, True, True)
+    assert all(len(password) == 2 for password in passwords)
+
+    assert generate_batch(3, 0, True, True, True, True) == ["", "", ""]
+
+
+def test_generate_passphrases(monkeypatch):
+    words = ["apple", "banana", "cherry", "damson"]
+    monkeypatch.setattr(passphrase_generator, "_word_list", words)
+
+    passphrases = generate_passphrases(10, 5, "_")
+    assert len(passphrases) == 10
+    for passphrase in passphrases:
+        parts = passphrase.split("_")
+        assert len(parts) == 5
+        assert set(parts) <= set(words)
+
+    assert generate_passphrases(0, 5) == []
@@ -0,0 +1,83 @@
+# SPDX-License-Identifier: GPL-3.0-only
+import threading
+
+from gsecrets.scheduler import JobState, Priority, Scheduler
+
+
+def block(scheduler, gate):
+    """Keeps the only worker available to non interactive jobs busy."""
+    started = threading.Event()
+
+    def func():
+        started.set()
+        gate.wait()
+
+    scheduler.submit(func, Priority.SAVE)
+    assert started.wait(5)
+
+
+def test_priority_and_reserved_worker():
+    scheduler = Scheduler(max_workers=2)
+    gate = threading.Event()
+    order = []
+    done = threading.Event()
+
+    block(scheduler, gate)
+    save = scheduler.submit(lambda: order.append("save"), Priority.SAVE)
+    scheduler.submit(lambda: order.append("stats"), Priority.STATS)
+
+    def search():
+        order.append("search")
+        done.set()
+
+    # Runs in the reserved worker even though the others wait.
+    scheduler.submit(search, Priority.INTERACTIVE)
+    assert done.wait(5)
+    assert order == ["search"]
+    assert save.state == JobState.PENDING
+
+    gate.set()
+    scheduler.shutdown()
+    # Lower priority jobs pending at shutdown are cancelled or ran in order.
+    assert order in (["search"], ["search", "stats"], ["search", "stats", "save"])
+
+    metrics = scheduler.metrics()
+    assert metrics[Priority.INTERACTIVE].completed == 1
+    assert sum(m.completed + m.cancelled for m in metrics.values()) == 4
+
+
+def test_cancel_and_bounded_queue():
+    scheduler = Scheduler(max_workers=2, max_pending=2)
+    gate = threading.Event()
+    cancelled = []
+
+    block(scheduler, gate)
+    jobs = [
+        scheduler.submit(
+            lambda: None, Priority.STATS, on_cancelled=lambda i=i: cancelled.append(i)
+        )
+        for i in range(3)
+    ]
+    # The oldest pending job was dropped to make room.
+    assert cancelled == [0]
+
+    assert jobs[1].cancel()
+    assert cancelled == [0, 1]
+
+    # Saves are never dropped.
+    saves = [
+        scheduler.submit(
+            lambda: None, Priority.SAVE, on_cancelled=lambda: cancelled.append("save")
+        )
+        for _i in range(3)
+    ]
+    assert cancelled == [0, 1]
+    assert all(save.state == JobState.PENDING for save in saves)
+
+    gate.set()
+    scheduler.shutdown()
+    assert jobs[2].state in (JobState.DONE, JobState.CANCELLED)
+
+    # Jobs submitted after shutdown never run.
+    late = scheduler.submit(lambda: None, Priority.SAVE)
+    assert late.state == JobState.CANCELLED
@@ -0,0 +1,56 @@
+# SPDX-License-Identifier: GPL-3.0-only
+from gsecrets.unlock_queue import UnlockQueue
+
+MIB = 1024 * 1024
+
+
+def test_budget():
+    queue = UnlockQueue(max_threads=4, max_memory=128 * MIB)
+    started = []
+    releases = []
+
+    def start(name):
+        def func(release):
+            started.append(name)
+            releases.append(release)
+
+        return func
+
+    assert queue.submit(2, 64 * MIB, start("a"))
+    assert queue.submit(2, 64 * MIB, start("b"))
+    # Neither threads nor memory are left.
+    assert not queue.submit(1, 0, start("c"))
+    assert started == ["a", "b"]
+    assert queue.n_pending == 1
+
+    releases[0]()
+    # Releasing twice does not free more than was taken.
+    releases[0]()
+    assert started == ["a", "b", "c"]
+    assert queue.n_running == 2
+
+
+def test_order_and_oversized():
+    queue = UnlockQueue(max_threads=8, max_memory=64 * MIB)
+    started = []
+    releases = []
+
+    def start(name):
+        def func(release):
+            started.append(name)
+            releases.append(release)
+
+        return func
+
+    queue.submit(1, 32 * MIB, start("a"))
+    # Needs more than the whole budget, waits until nothing else runs.
+    queue.submit(1, 256 * MIB, start("b"))
+    # Is not started before the large one.
+    queue.submit(1, 0, start("c"))
+    assert started == ["a"]
+
+    releases[0]()
+    assert started == ["a", "b"]
+
+    releases[1]()
+    assert started == ["a", "b", "c"]